@@ -0,0 +1,2 @@
+from .commands import main
+from .headless import Headless
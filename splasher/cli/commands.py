@@ -0,0 +1,251 @@
+import argparse
+import logging
+import re
+import sys
+from typing import Any, Callable, Optional
+
+from PySide6.QtCore import QCoreApplication, QDateTime, QDir, QFileInfo, QLockFile, QRect, QSize, QTimer, QUrl
+from PySide6.QtNetwork import QNetworkRequest
+
+from splasher.__version__ import __version__
+from splasher.config import PATH, UNSPLASH, get_settings_arg, init_app
+from splasher.downloader import (BackendRegistry, HttpCache, PreviewFetcher, RotationScheduler, VariantBuilder,
+                                 WallpaperDownloader, WallpaperSetter, get_backend_registry, get_endpoint_selector,
+                                 screen_variants)
+
+from .headless import Headless
+
+# the size of the previews fetched without a window, the one of the QLabel in 'MainWindow'
+PREVIEW_RESOLUTION: str = "960x540"
+# the screen size used when '--size' is not given
+DEFAULT_SIZE: str = "1920x1080"
+
+
+class Screen:
+    """
+    The Screen class stands in for QScreen, which needs QGuiApplication, in 'screen_variants'.
+    """
+
+    def __init__(self, size: QSize, ratio: float, geometry: QRect) -> None:
+        """
+        :param size: the size in logical pixels
+        :param ratio: the device pixel ratio
+        :param geometry: the position and size on the virtual desktop
+        """
+        self.logical_size: QSize = size
+        self.ratio: float = ratio
+        self.rect: QRect = geometry
+
+    def size(self) -> QSize:
+        """
+        :return: the size in logical pixels
+        """
+        return self.logical_size
+
+    def devicePixelRatio(self) -> float:  # pylint: disable=invalid-name
+        """
+        :return: the device pixel ratio
+        """
+        return self.ratio
+
+    def geometry(self) -> QRect:
+        """
+        :return: the position and size on the virtual desktop
+        """
+        return self.rect
+
+
+def screen_size(text: str) -> tuple[int, int, float]:
+    """
+    Parse a screen size of the command line.
+    :param text: "<width>x<height>" or "<width>x<height>@<device pixel ratio>", e.g. "2560x1440@2"
+    :return: (width, height, ratio)
+    """
+    match: Optional[re.Match] = re.fullmatch(r"([1-9][0-9]*)x([1-9][0-9]*)(?:@([0-9]+(?:\.[0-9]+)?))?", text)
+    if match is None or float(match.group(3) or 1) <= 0:
+        raise argparse.ArgumentTypeError(f"invalid screen size: '{text}', e.g. 1920x1080 or 2560x1440@2")
+    return int(match.group(1)), int(match.group(2)), float(match.group(3) or 1)
+
+
+def screens(sizes: list[tuple[int, int, float]]) -> list[Screen]:
+    """
+    Place the screens from left to right, the first one is the primary screen.
+    :param sizes: the parsed '--size' arguments
+    :return: the screens for 'screen_variants'
+    """
+    placed: list[Screen] = []
+    left: int = 0
+    for width, height, ratio in sizes:
+        placed.append(Screen(QSize(width, height), ratio, QRect(left, 0, width, height)))
+        left += width
+    return placed
+
+
+def preview_id() -> Optional[str]:
+    """
+    Get the image id of the current preview.
+    :return: e.g. "photo-xxx", None if there is no preview
+    """
+    res, img_name = get_settings_arg("PREVIEW")
+    found: list[str] = re.findall(r"photo-[0-9]{13}-[0-9a-z]{12}", img_name) if res and img_name else []
+    if not found:
+        print("There is no preview, run 'splasher refresh' first.", file=sys.stderr)
+        return None
+    return found[0]
+
+
+def when_applied(callback: Callable[[], None]) -> None:
+    """
+    Call back once the desktop has applied the wallpaper, a failure finishes the command in 'main' instead.
+    :param callback: called when no wallpaper is being applied
+    """
+    registry: BackendRegistry = get_backend_registry()
+    if registry.busy():
+        registry.applied.connect(lambda *_: callback())  # pylint: disable=no-member
+    else:
+        callback()
+
+
+# ======== commands ========
+
+
+def refresh(headless: Headless, args: argparse.Namespace) -> None:  # pylint: disable=unused-argument
+    """
+    Fetch a new preview, it is the image 'apply' and 'download' use next.
+    """
+    before: Any = get_settings_arg("PREVIEW")
+    fetcher: PreviewFetcher = PreviewFetcher(headless)
+    fetcher.destroyed.connect(  # pylint: disable=no-member
+        lambda: headless.finish(0 if get_settings_arg("PREVIEW") != before else 1))
+    headless.show_message("Attempt to fetch a new preview.")
+    fetcher.fetch_preview(QNetworkRequest(QUrl(f"{UNSPLASH['SOURCE']}{PREVIEW_RESOLUTION}")))
+
+
+def apply(headless: Headless, args: argparse.Namespace) -> None:
+    """
+    Set the preview as the wallpaper of the screens of '--size'.
+    """
+    img_id: Optional[str] = preview_id()
+    if img_id is None:
+        headless.finish(1)
+        return
+
+    def on_built(variants: list[tuple[str, str, list]]) -> None:
+        if not variants:
+            headless.show_message("Failed to prepare the wallpaper.")
+            headless.finish(1)
+            return
+        setter: WallpaperSetter = WallpaperSetter(headless)
+        setter.set_wallpapers(variants)
+        setter.done()
+        when_applied(headless.finish)
+
+    builder: VariantBuilder = VariantBuilder(headless, img_id, screen_variants(screens(args.size)), apply=False)
+    builder.built.connect(on_built)  # pylint: disable=no-member
+    builder.build()
+
+
+def download(headless: Headless, args: argparse.Namespace) -> None:
+    """
+    Download the full resolution preview to a file.
+    """
+    img_id: Optional[str] = preview_id()
+    if img_id is None:
+        headless.finish(1)
+        return
+    img_path: str = args.path or f"{QDir.homePath()}/{img_id}.jpg"
+    before: QDateTime = QFileInfo(img_path).lastModified()
+
+    def on_destroyed() -> None:
+        file_info: QFileInfo = QFileInfo(img_path)
+        headless.finish(0 if file_info.exists() and file_info.lastModified() != before else 1)
+
+    url: str = get_endpoint_selector().route(img_id, headless.manager)
+    downloader: WallpaperDownloader = WallpaperDownloader(headless)
+    downloader.destroyed.connect(on_destroyed)  # pylint: disable=no-member
+    downloader.download(HttpCache.no_store(QNetworkRequest(QUrl(url))), img_path)
+
+
+def rotate(headless: Headless, args: argparse.Namespace) -> None:
+    """
+    Rotate the wallpaper once and prepare the next one, or keep rotating on the schedule with '--daemon'.
+    """
+    scheduler: RotationScheduler = RotationScheduler(headless, f"{UNSPLASH['SOURCE']}{PREVIEW_RESOLUTION}",
+                                                     lambda: screen_variants(screens(args.size)))
+    if args.daemon:
+        scheduler.start()
+        return
+    # the rotation is over once the next wallpaper is prepared, so the next run only applies it
+    scheduler.ready.connect(lambda _: when_applied(headless.finish))  # pylint: disable=no-member
+    scheduler.failed.connect(lambda: headless.finish(1 if scheduler.due else 0))  # pylint: disable=no-member
+    scheduler.rotate()
+
+
+COMMANDS: dict[str, Callable[[Headless, argparse.Namespace], None]] = {
+    "refresh": refresh,
+    "apply": apply,
+    "download": download,
+    "rotate": rotate,
+}
+
+
+def parser() -> argparse.ArgumentParser:
+    """
+    Build the parser of the command line.
+    :return: ArgumentParser
+    """
+    size_args: dict[str, Any] = {
+        "metavar": "WxH[@DPR]",
+        "type": screen_size,
+        "action": "append",
+        "help": f"the size of a screen, repeat it for more screens, the primary one first (default: {DEFAULT_SIZE})",
+    }
+    root: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="splasher", description="Change the desktop wallpaper with images from Unsplash, "
+        "without a command the window is shown.")
+    root.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    commands = root.add_subparsers(dest="command", metavar="COMMAND")
+    commands.add_parser("refresh", help="fetch a new preview")
+    apply_parser: argparse.ArgumentParser = commands.add_parser("apply", help="set the preview as the wallpaper")
+    apply_parser.add_argument("--size", **size_args)
+    download_parser: argparse.ArgumentParser = commands.add_parser("download", help="download the preview")
+    download_parser.add_argument("path", nargs="?", help="the image path (default: ~/<image id>.jpg)")
+    rotate_parser: argparse.ArgumentParser = commands.add_parser("rotate", help="rotate the wallpaper")
+    rotate_parser.add_argument("--size", **size_args)
+    rotate_parser.add_argument("--daemon", action="store_true", help="keep rotating on the schedule in the settings")
+    return root
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    The entry point of the 'splasher' command, the commands run on QCoreApplication without QtWidgets.
+    :param argv: the arguments, 'sys.argv[1:]' by default
+    :return: the exit code
+    """
+    args: argparse.Namespace = parser().parse_args(argv)
+    if args.command is None:
+        from splasher.main import main as gui  # pylint: disable=import-outside-toplevel
+        gui()
+        return 0
+    if getattr(args, "size", False) is None:
+        args.size = [screen_size(DEFAULT_SIZE)]
+
+    init_app()
+    logger: logging.Logger = logging.getLogger(__name__)
+    app: QCoreApplication = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    applock: Optional[QLockFile] = None
+    if args.command == "rotate" and args.daemon:
+        applock = QLockFile(PATH["APPLOCK"])  # the window and the daemon would rotate twice
+        if not applock.tryLock():
+            print("The application is already running!", file=sys.stderr)
+            return 1
+    logger.info("Run the command '%s'", args.command)
+    headless: Headless = Headless()
+    get_backend_registry().failed.connect(headless.show_message)  # pylint: disable=no-member
+    if applock is None:
+        get_backend_registry().failed.connect(lambda _: headless.finish(1))  # pylint: disable=no-member
+    QTimer.singleShot(0, lambda: COMMANDS[args.command](headless, args))  # 'exit' only works in the event loop
+    code: int = app.exec()
+    if applock is not None:
+        applock.unlock()
+    return code
@@ -0,0 +1,56 @@
+import logging
+import sys
+
+from PySide6.QtCore import QCoreApplication, QObject
+from PySide6.QtNetwork import QNetworkAccessManager
+
+from splasher.config import get_settings_arg
+from splasher.downloader import HttpCache
+from splasher.downloader.network_estimator import DEFAULT_TIMEOUT
+
+
+class Headless(QObject):
+    """
+    The Headless class stands in for MainWindow as the parent of the downloaders when there is no GUI:
+    1. it owns the QNetworkAccessManager and the HTTP disk cache, like 'MainWindow.init_manager',
+    2. the messages for the status bar are printed on the terminal, the ones which stay until they are replaced
+       are left out, they show the progress and the errors among them are logged by the downloaders anyway,
+    3. 'finish' quits the event loop with the exit code of the command, only the first call counts.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.manager: QNetworkAccessManager = QNetworkAccessManager(self)
+        self.manager.setAutoDeleteReplies(True)
+        self.manager.setTransferTimeout(DEFAULT_TIMEOUT)  # requests of the downloaders get adaptive timeouts
+        self.http_cache: HttpCache = HttpCache(self.manager)
+        self.manager.setCache(self.http_cache)
+        self.finished: bool = False
+
+    def show_message(self, msg: str, timeout: int = 5000) -> None:
+        """
+        Print a message of the status bar.
+        :param msg: message string.
+        :param timeout: 0 for messages which stay until they are replaced, they are left out.
+        """
+        if timeout:
+            print(msg, file=sys.stderr)
+
+    def set_preview(self) -> None:
+        """
+        Print the new preview, there is no QLabel to repaint.
+        """
+        _, img_subpath = get_settings_arg("PREVIEW")
+        print(img_subpath)
+
+    def finish(self, code: int = 0) -> None:
+        """
+        Quit the event loop once the command is over.
+        :param code: the exit code
+        """
+        if self.finished:
+            return
+        self.finished = True
+        self.logger.info("The command is over with the exit code %d", code)
+        QCoreApplication.exit(code)
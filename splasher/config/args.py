@@ -26,6 +26,20 @@ PATH: dict[str, str] = {
 SETTINGS: dict[str, Any] = {
     "PREVIEW": "",  # image name, e.g. unsplash/photo-xxx
     "CNM": False,  # use a mirror site if users are in mainland China
+    "WALLPAPER": "",  # the image set as the desktop wallpaper, e.g. unsplash/photo-xxx.jpg
+    "CACHE_MAX_BYTES": 200 * 1024 * 1024,  # the size limit of the image cache, 200MB
+    "CACHE_MAX_ENTRIES": 100,  # the number limit of images in the cache
+    "BACKGROUND_MAX_ENTRIES": 10,  # the number of images kept in the background folder
+    "HTTP_CACHE_MAX_BYTES": 100 * 1024 * 1024,  # the size limit of the HTTP disk cache, 100MB
+    "PREFETCH_COUNT": 3,  # the number of previews kept ready for refreshing
+    "PREFETCH_MAX_IN_FLIGHT": 2,  # the number of previews fetched at the same time
+    "PREWARM": True,  # open connections to the image servers before they are needed
+    "ROTATION": False,  # change the wallpaper on a schedule
+    "ROTATION_INTERVAL": 60,  # the minutes between two rotations, 0 turns the interval off
+    "ROTATION_TIMES": [],  # the times of day to rotate at, e.g. ["08:00", "20:00"]
+    "ROTATION_ON_WAKE": False,  # rotate when the computer wakes up
+    "ROTATION_LAST": 0,  # when the wallpaper was last rotated, in seconds since the epoch
+    "ROTATION_NEXT": "",  # the image prepared for the next rotation, e.g. photo-xxx
 }
 
 # API for fetching Unsplash images
@@ -5,3 +5,4 @@ lock: QReadWriteLock = QReadWriteLock()
 from .settings_arg_getter import get_settings_arg
 from .settings_arg_setter import set_settings_arg
 from .settings_creator import create_settings
+from .settings_store import SettingsStore, get_settings_store
@@ -0,0 +1,212 @@
+import json
+import logging
+from typing import Any, Optional
+
+from PySide6.QtCore import QCoreApplication, QFile, QIODevice, QSaveFile, QTextStream, QTimer
+
+from ..args import PATH, SETTINGS
+from . import lock
+
+# default window (ms) in which settings updates are coalesced
+FLUSH_INTERVAL: int = 1000
+
+
+class SettingsStore:
+    """
+    The SettingsStore class keeps a copy of 'settings.json' in memory:
+    1. the file is read and parsed only once, on the first access,
+    2. reads are served from memory,
+    3. changes are appended to a journal at once and flushed to the file in batches,
+       each flush is one atomic commit using QSaveFile.
+
+    The journal ('settings.json.journal') holds one json line per update.
+    It is replayed on the next load if the app is killed before a flush.
+    """
+
+    def __init__(self,
+                 file_path: str,
+                 flush_interval: int = FLUSH_INTERVAL,
+                 defaults: Optional[dict[str, Any]] = None) -> None:
+        """
+        Create the store, the file is not read until it is needed.
+        :param file_path: the path of 'settings.json'
+        :param flush_interval: updates within this window (ms) are coalesced into one write.
+        :param defaults: values of keys missing from the file, e.g. keys added by a newer version.
+        """
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.file_path: str = file_path
+        self.journal_path: str = f"{file_path}.journal"
+        self.flush_interval: int = flush_interval
+        self.defaults: dict[str, Any] = defaults or {}
+        self.settings: Optional[dict[str, Any]] = None
+        self.timer: Optional[QTimer] = None
+
+    def load(self) -> bool:
+        """
+        Read json from 'settings.json' into memory if it has not been loaded yet.
+        A failed read is not cached, so the next access tries again.
+        :return: bool
+        """
+        if self.settings is not None:
+            return True
+
+        lock.lockForRead()
+        file: QFile = QFile(self.file_path)
+        if file.open(QIODevice.ReadOnly | QIODevice.Text | QIODevice.ExistingOnly):
+            stream: QTextStream = QTextStream(file)
+            try:
+                self.settings = {**self.defaults, **json.loads(stream.readAll())}
+            except json.JSONDecodeError:
+                self.logger.warning("'%s' is empty", self.file_path)
+        else:
+            self.logger.error("Failed to open '%s': %s", self.file_path, file.errorString())
+        file.close()
+        lock.unlock()
+
+        if self.settings is not None and self.replay_journal():
+            self.flush()
+        return self.settings is not None
+
+    def replay_journal(self) -> bool:
+        """
+        Apply the updates left in the journal by a previous run that did not flush.
+        A truncated last line (killed while appending) is ignored.
+        :return: bool, whether any update was replayed
+        """
+        replayed: bool = False
+        journal: QFile = QFile(self.journal_path)
+        if journal.open(QIODevice.ReadOnly | QIODevice.Text | QIODevice.ExistingOnly):
+            for line in bytes(journal.readAll().data()).decode("utf-8").splitlines():
+                try:
+                    arg_key, arg_value = json.loads(line)
+                except (json.JSONDecodeError, ValueError):
+                    self.logger.warning("Skip a broken line in '%s'", self.journal_path)
+                    continue
+                if arg_key in self.settings:
+                    self.settings[arg_key] = arg_value
+                    replayed: bool = True
+            self.logger.info("Replay '%s'", self.journal_path)
+        journal.close()
+        return replayed
+
+    def append_journal(self, arg_key: str, arg_value: Any) -> bool:
+        """
+        Append an update to the journal.
+        The data is handed to the OS before returning, so it survives the app being killed.
+        :param arg_key: the updated configuration key
+        :param arg_value: the updated configuration value
+        :return: bool
+        """
+        res: bool = False
+        journal: QFile = QFile(self.journal_path)
+        if journal.open(QIODevice.WriteOnly | QIODevice.Append | QIODevice.Text):
+            line: bytes = (json.dumps([arg_key, arg_value]) + "\n").encode("utf-8")
+            res: bool = journal.write(line) == len(line) and journal.flush()
+        else:
+            self.logger.error("Failed to open '%s': %s", self.journal_path, journal.errorString())
+        journal.close()
+        return res
+
+    def get(self, arg_key: str) -> tuple[bool, Any]:
+        """
+        Get the configuration value from memory.
+        :param arg_key: configuration key
+        :return tuple: (bool, configuration value)
+        """
+        res: tuple[bool, Any] = (False, "")
+        if self.load():
+            lock.lockForRead()
+            try:
+                res: tuple[bool, Any] = (True, self.settings[arg_key])
+            except KeyError:
+                self.logger.error("Key: %s does not exist in '%s'", arg_key, self.file_path)
+            finally:
+                lock.unlock()
+        return res
+
+    def set(self, arg_key: str, arg_value: Any) -> bool:
+        """
+        Modify the configuration value in memory, record it in the journal and schedule a flush.
+        Without a running Qt application there is nothing to drive the timer, so the file is written at once.
+        Creating a new pair of key and value is not allowed.
+        :param arg_key: the configuration key that needs to be updated
+        :param arg_value: the configuration value for update
+        :return: bool
+        """
+        if not self.load():
+            return False
+        if arg_key not in self.settings:
+            self.logger.error("Key: %s does not exist in '%s'", arg_key, self.file_path)
+            return False
+
+        lock.lockForWrite()
+        self.settings[arg_key] = arg_value
+        lock.unlock()
+
+        if self.flush_interval > 0 and QCoreApplication.instance() is not None \
+                and self.append_journal(arg_key, arg_value):
+            self.schedule_flush()
+            return True
+        return self.flush()
+
+    def schedule_flush(self) -> None:
+        """
+        Start the flush timer unless it is already running,
+        so all updates within the window end up in the same commit.
+        """
+        if self.timer is None:
+            self.timer = QTimer()
+            self.timer.setSingleShot(True)
+            self.timer.timeout.connect(self.flush)  # pylint: disable=no-member
+            QCoreApplication.instance().aboutToQuit.connect(self.flush)
+        if not self.timer.isActive():
+            self.timer.start(self.flush_interval)
+
+    def flush(self) -> bool:
+        """
+        Write pending updates to 'settings.json' and clear the journal.
+        :return: bool
+        """
+        if self.timer is not None:
+            self.timer.stop()
+        if self.settings is None:
+            return False
+        res: bool = self.save()
+        if res and QFile.exists(self.journal_path):
+            QFile.remove(self.journal_path)
+        return res
+
+    def save(self) -> bool:
+        """
+        Write the settings in memory back to 'settings.json'.
+        :return: bool
+        """
+        res: bool = False
+        lock.lockForWrite()
+        file: QSaveFile = QSaveFile(self.file_path)
+        if file.open(QIODevice.WriteOnly | QIODevice.Text):
+            stream: QTextStream = QTextStream(file)
+            stream << json.dumps(self.settings, indent=2)  # pylint: disable=expression-not-assigned
+            stream.flush()
+            res: bool = file.commit()
+        else:
+            file.cancelWriting()
+            self.logger.error("Failed to open '%s'", self.file_path)
+        lock.unlock()
+        return res
+
+
+# one store per settings file, shared by the whole process
+stores: dict[str, SettingsStore] = {}
+
+
+def get_settings_store(file_path: str = f"{PATH['CONFIG']}settings.json") -> SettingsStore:
+    """
+    Get the process-wide store of a settings file, create it on the first call.
+    :param file_path: the path of 'settings.json'
+    :return: SettingsStore
+    """
+    if file_path not in stores:
+        defaults: dict[str, Any] = SETTINGS if file_path == f"{PATH['CONFIG']}settings.json" else {}
+        stores[file_path] = SettingsStore(file_path, defaults=defaults)
+    return stores[file_path]
@@ -0,0 +1,8 @@
+from .dbus_backend import DBusBackend
+from .dconf_backend import CinnamonBackend, DconfBackend, MateBackend, dconf_changeset
+from .gnome_backend import GnomeBackend
+from .kde_backend import KdeBackend
+from .portal_backend import PortalBackend
+from .sway_backend import SwayBackend
+from .wallpaper_backend import WallpaperBackend
+from .xfce_backend import XfceBackend
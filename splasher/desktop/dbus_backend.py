@@ -0,0 +1,77 @@
+from typing import Any, Callable, Optional
+
+from PySide6.QtCore import QObject
+from PySide6.QtDBus import QDBusConnection, QDBusMessage, QDBusPendingCallWatcher, QDBusVariant
+
+from .wallpaper_backend import WallpaperBackend
+
+# how long a desktop service may take to answer a call
+CALL_TIMEOUT: int = 5000  # 5s
+
+
+class DBusBackend(WallpaperBackend):
+    """
+    The DBusBackend class is the base of the wallpaper backends which talk to the desktop over D-Bus,
+    'call' sends a method call asynchronously and the answer is handled by a QDBusPendingCallWatcher,
+    so the GUI thread never waits for the desktop and no process is spawned.
+    The connection is the session bus by default, tests pass a connection to a private bus instead.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None, connection: Optional[QDBusConnection] = None) -> None:
+        """
+        :param parent: QObject
+        :param connection: the bus the desktop services are on, the session bus if it is None
+        """
+        super().__init__(parent)
+        self.connection: QDBusConnection = connection if connection is not None else QDBusConnection.sessionBus()
+        self.watchers: set[QDBusPendingCallWatcher] = set()  # the calls waiting for an answer
+
+    @staticmethod
+    def unwrap(value: Any) -> Any:
+        """
+        Get the value inside (nested) D-Bus variants.
+        :param value: an argument of a reply
+        :return: the plain value
+        """
+        while isinstance(value, QDBusVariant):
+            value = value.variant()
+        return value
+
+    def call(self, service: str, path: str, interface: str, method: str, args: list[Any],
+             callback: Callable[[Optional[QDBusMessage]], None]) -> None:
+        """
+        Call a method of a service without blocking.
+        :param service: the bus name, e.g. "org.kde.plasmashell"
+        :param path: the object path, e.g. "/PlasmaShell"
+        :param interface: the interface of the method
+        :param method: the method name
+        :param args: the arguments
+        :param callback: receives the reply, or None if the call failed
+        """
+        if not self.connection.isConnected():
+            self.logger.error("Failed to call '%s.%s': the bus is not connected", interface, method)
+            callback(None)
+            return
+        message: QDBusMessage = QDBusMessage.createMethodCall(service, path, interface, method)
+        message.setArguments(args)
+        watcher: QDBusPendingCallWatcher = QDBusPendingCallWatcher(self.connection.asyncCall(message, CALL_TIMEOUT),
+                                                                   self)
+        self.watchers.add(watcher)
+
+        def on_finished(finished: QDBusPendingCallWatcher) -> None:
+            self.watchers.discard(finished)
+            finished.deleteLater()
+            if finished.isError():
+                self.logger.error("Failed to call '%s.%s': %s", interface, method, finished.error().message())
+                callback(None)
+            else:
+                callback(finished.reply())
+
+        watcher.finished.connect(on_finished)  # pylint: disable=no-member
+
+    def busy(self) -> bool:
+        """
+        Check whether a call is waiting for an answer.
+        :return: bool
+        """
+        return bool(self.watchers)
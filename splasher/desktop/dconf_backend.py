@@ -0,0 +1,105 @@
+from typing import Optional
+
+from PySide6.QtCore import QByteArray
+from PySide6.QtDBus import QDBusMessage
+
+from .dbus_backend import DBusBackend
+
+
+def frame(body: bytes, ends: list[int]) -> bytes:
+    """
+    Append the framing offsets of a GVariant container, their size depends on the size of the container.
+    :param body: the serialized members
+    :param ends: the offsets to append
+    :return: the serialized container
+    """
+    size: int = 1
+    while len(body) + size * len(ends) >= 1 << (8 * size):
+        size *= 2
+    return body + b"".join(end.to_bytes(size, "little") for end in ends)
+
+
+def dconf_changeset(values: dict[str, str]) -> bytes:
+    """
+    Serialize string values as a dconf changeset, which is a GVariant of type "a{smv}" in little-endian,
+    each key maps to 'Just' a variant of the value.
+    :param values: {the full key path, e.g. "/org/gnome/desktop/background/picture-uri": the value}
+    :return: the changeset for 'ca.desrt.dconf.Writer.Change'
+
+    Reference:
+        https://developer.gnome.org/documentation/specifications/gvariant-specification-1.0.html
+    """
+    body: bytes = b""
+    ends: list[int] = []
+    for key, value in values.items():
+        key_bytes: bytes = key.encode() + b"\0"
+        # 'Just' a variant: the string, the type of the variant, then the zero byte of the maybe
+        child: bytes = value.encode() + b"\0" + b"\0s" + b"\0"
+        padding: bytes = b"\0" * (-len(key_bytes) % 8)  # 'mv' is aligned to 8
+        entry: bytes = frame(key_bytes + padding + child, [len(key_bytes)])
+        body += b"\0" * (-len(body) % 8) + entry  # dict entries are aligned to 8
+        ends.append(len(body))
+    return frame(body, ends)
+
+
+class DconfBackend(DBusBackend):
+    """
+    The DconfBackend class sets the wallpaper of the desktops which keep it in GSettings,
+    without the 'gsettings' tool: the key is written to dconf through its writer service on the session bus.
+    Subclasses choose the key and whether it holds a uri or a path.
+
+    Reference:
+        https://gitlab.gnome.org/GNOME/dconf/-/blob/main/service/ca.desrt.dconf.xml
+    """
+
+    DCONF_SERVICE: str = "ca.desrt.dconf"
+    DCONF_PATH: str = "/ca/desrt/dconf/Writer/user"
+    DCONF_INTERFACE: str = "ca.desrt.dconf.Writer"
+    KEY: str = ""  # the full dconf path of the key
+    URI: bool = True  # whether the key holds "file://..." or a plain path
+
+    def apply(self, img_path: str, screens: Optional[dict[str, str]] = None) -> None:
+        """
+        Set the wallpaper, 'applied' or 'failed' is emitted when dconf answers.
+        :param img_path: the wallpaper path
+        :param screens: unused, one image is shown on all screens
+        """
+        self.write(img_path, self.KEY)
+
+    def write(self, img_path: str, key: str) -> None:
+        """
+        Write the wallpaper into a key.
+        :param img_path: the wallpaper path
+        :param key: the full dconf path of the key
+        """
+
+        def on_reply(reply: Optional[QDBusMessage]) -> None:
+            if reply is None:
+                self.fail(img_path, "Failed to set the wallpaper through dconf")
+            else:
+                self.succeed(img_path)
+
+        changeset: bytes = dconf_changeset({key: f"file://{img_path}" if self.URI else img_path})
+        self.call(self.DCONF_SERVICE, self.DCONF_PATH, self.DCONF_INTERFACE, "Change", [QByteArray(changeset)],
+                  on_reply)
+
+
+class MateBackend(DconfBackend):
+    """
+    The MateBackend class sets 'picture-filename' of 'org.mate.background'.
+    """
+
+    NAME: str = "mate"
+    DESKTOPS: tuple[str, ...] = ("MATE",)
+    KEY: str = "/org/mate/desktop/background/picture-filename"
+    URI: bool = False
+
+
+class CinnamonBackend(DconfBackend):
+    """
+    The CinnamonBackend class sets 'picture-uri' of 'org.cinnamon.desktop.background'.
+    """
+
+    NAME: str = "cinnamon"
+    DESKTOPS: tuple[str, ...] = ("X-Cinnamon", "Cinnamon")
+    KEY: str = "/org/cinnamon/desktop/background/picture-uri"
@@ -0,0 +1,85 @@
+from typing import Optional
+
+from PySide6.QtCore import SLOT, QObject, Slot
+from PySide6.QtDBus import QDBusConnection, QDBusMessage, QDBusVariant
+
+from .dconf_backend import DconfBackend
+
+# the dconf path of the GSettings schema 'org.gnome.desktop.background'
+BACKGROUND_PATH: str = "/org/gnome/desktop/background/"
+
+
+class GnomeBackend(DconfBackend):
+    """
+    The GnomeBackend class sets the wallpaper in GNOME and the desktops built on its settings:
+    1. the color scheme is read from the settings portal, a dark scheme shows 'picture-uri-dark',
+       the scheme is kept and updated by the 'SettingChanged' signal of the portal,
+       so it is only read on the first apply,
+    2. the key is written to dconf, see 'DconfBackend'.
+
+    Reference:
+        https://flatpak.github.io/xdg-desktop-portal/docs/doc-org.freedesktop.portal.Settings.html
+    """
+
+    NAME: str = "gnome"
+    DESKTOPS: tuple[str, ...] = ("GNOME", "Unity", "Budgie")
+    KEY: str = f"{BACKGROUND_PATH}picture-uri"
+    PORTAL_SERVICE: str = "org.freedesktop.portal.Desktop"
+    PORTAL_PATH: str = "/org/freedesktop/portal/desktop"
+    PORTAL_INTERFACE: str = "org.freedesktop.portal.Settings"
+
+    def __init__(self, parent: Optional[QObject] = None, connection: Optional[QDBusConnection] = None) -> None:
+        """
+        :param parent: QObject
+        :param connection: the bus the desktop services are on, the session bus if it is None
+        """
+        super().__init__(parent, connection)
+        self.key: Optional[str] = None  # the key of the current color scheme, None until it is known
+        self.connection.connect(self.PORTAL_SERVICE, self.PORTAL_PATH, self.PORTAL_INTERFACE, "SettingChanged",
+                                self, SLOT("on_setting_changed(QString,QString,QDBusVariant)"))
+
+    def scheme_key(self, value: object) -> str:
+        """
+        Get the key the wallpaper is shown from in a color scheme.
+        :param value: the value of 'color-scheme' of 'org.freedesktop.appearance', 1 is "prefer dark"
+        :return: "/org/gnome/desktop/background/picture-uri" or ".../picture-uri-dark"
+        """
+        return f"{BACKGROUND_PATH}picture-uri-dark" if self.unwrap(value) == 1 else self.KEY
+
+    @Slot(str, str, QDBusVariant)
+    def on_setting_changed(self, namespace: str, key: str, value: QDBusVariant) -> None:
+        """
+        Follow the color scheme.
+        :param namespace: the namespace of the setting
+        :param key: the setting
+        :param value: the new value
+        """
+        if (namespace, key) == ("org.freedesktop.appearance", "color-scheme"):
+            self.key = self.scheme_key(value)
+
+    def state(self) -> str:
+        """
+        The wallpaper depends on the color scheme.
+        :return: the key of the current color scheme, "" until it is known
+        """
+        return self.key or ""
+
+    def apply(self, img_path: str, screens: Optional[dict[str, str]] = None) -> None:
+        """
+        Set the wallpaper, 'applied' or 'failed' is emitted when dconf answers.
+        :param img_path: the wallpaper path
+        :param screens: unused, one image is shown on all screens
+        """
+        if self.key is not None:  # the scheme is followed, no need to read it
+            self.write(img_path, self.key)
+            return
+
+        def on_scheme(reply: Optional[QDBusMessage]) -> None:
+            if reply is None or not reply.arguments():  # a missing portal means the default scheme
+                self.write(img_path, self.KEY)
+                return
+            self.key = self.scheme_key(reply.arguments()[0])
+            self.write(img_path, self.key)
+
+        self.call(self.PORTAL_SERVICE, self.PORTAL_PATH, self.PORTAL_INTERFACE, "Read",
+                  ["org.freedesktop.appearance", "color-scheme"], on_scheme)
@@ -0,0 +1,60 @@
+from typing import Optional
+
+from PySide6.QtDBus import QDBusMessage
+
+from .dbus_backend import DBusBackend
+
+
+class KdeBackend(DBusBackend):
+    """
+    The KdeBackend class sets the wallpaper on KDE Plasma by its scripting API,
+    the script is evaluated by 'org.kde.PlasmaShell.evaluateScript' over D-Bus.
+
+    Reference:
+        https://develop.kde.org/docs/plasma/scripting/api/
+    """
+
+    NAME: str = "kde"
+    DESKTOPS: tuple[str, ...] = ("KDE",)
+    PER_SCREEN: bool = True
+    SERVICE: str = "org.kde.plasmashell"
+    PATH: str = "/PlasmaShell"
+    INTERFACE: str = "org.kde.PlasmaShell"
+
+    @staticmethod
+    def script(img_path: str, screens: Optional[dict[str, str]] = None) -> str:
+        """
+        Build the script which sets the wallpaper of every desktop.
+        :param img_path: the wallpaper path
+        :param screens: the wallpapers of some screens by the position of the screen, e.g. {"1920,0": path},
+                        other screens show 'img_path'
+        :return: the script
+        """
+        images: str = ", ".join(f"'{position}': 'file://{path}'" for position, path in (screens or {}).items())
+        return (
+            f"var images = {{{images}}};\n"
+            f"var allDesktops = desktops();\n"
+            f"for (i=0; i<allDesktops.length; i++) {{\n"
+            f"    d = allDesktops[i];\n"
+            f"    g = screenGeometry(d.screen);\n"
+            f"    d.wallpaperPlugin = 'org.kde.image';\n"
+            f"    d.currentConfigGroup = Array('Wallpaper','org.kde.image','General');\n"
+            f"    d.writeConfig('Image', images[g.x + ',' + g.y] || 'file://{img_path}');\n"
+            f"}}"
+        )
+
+    def apply(self, img_path: str, screens: Optional[dict[str, str]] = None) -> None:
+        """
+        Set the wallpaper, 'applied' or 'failed' is emitted when Plasma answers.
+        :param img_path: the wallpaper path
+        :param screens: the wallpapers of some screens, see 'script'
+        """
+
+        def on_reply(reply: Optional[QDBusMessage]) -> None:
+            if reply is None:
+                self.fail(img_path, "Failed to set the wallpaper through Plasma")
+            else:
+                self.succeed(img_path)
+
+        self.call(self.SERVICE, self.PATH, self.INTERFACE, "evaluateScript", [self.script(img_path, screens)],
+                  on_reply)
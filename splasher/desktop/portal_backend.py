@@ -0,0 +1,45 @@
+from typing import Optional
+
+from PySide6.QtDBus import QDBusMessage
+
+from .dbus_backend import DBusBackend
+
+
+class PortalBackend(DBusBackend):
+    """
+    The PortalBackend class is the generic fallback, it asks the wallpaper portal of xdg-desktop-portal,
+    which is implemented by the portal backend of the running desktop.
+
+    Reference:
+        https://flatpak.github.io/xdg-desktop-portal/docs/doc-org.freedesktop.portal.Wallpaper.html
+    """
+
+    NAME: str = "generic"
+    SERVICE: str = "org.freedesktop.portal.Desktop"
+    PATH: str = "/org/freedesktop/portal/desktop"
+    INTERFACE: str = "org.freedesktop.portal.Wallpaper"
+
+    @classmethod
+    def matches(cls, desktops: list[str]) -> bool:
+        """
+        The portal serves any desktop.
+        :param desktops: the names in 'XDG_CURRENT_DESKTOP' in lower case
+        :return: True
+        """
+        return True
+
+    def apply(self, img_path: str, screens: Optional[dict[str, str]] = None) -> None:
+        """
+        Set the wallpaper, 'applied' or 'failed' is emitted when the portal has accepted the request.
+        :param img_path: the wallpaper path
+        :param screens: unused, one image is shown on all screens
+        """
+
+        def on_reply(reply: Optional[QDBusMessage]) -> None:
+            if reply is None:
+                self.fail(img_path, "Failed to set the wallpaper through the desktop portal")
+            else:
+                self.succeed(img_path)
+
+        self.call(self.SERVICE, self.PATH, self.INTERFACE, "SetWallpaperURI",
+                  ["", f"file://{img_path}", {"show-preview": False, "set-on": "background"}], on_reply)
@@ -0,0 +1,120 @@
+import json
+import os
+import struct
+from typing import Any, Optional
+
+from PySide6.QtCore import QObject
+from PySide6.QtNetwork import QLocalSocket
+
+from .wallpaper_backend import WallpaperBackend
+
+# the header of an IPC message: the magic string, the length of the payload and the message type
+MAGIC: bytes = b"i3-ipc"
+HEADER: struct.Struct = struct.Struct("=6sII")
+RUN_COMMAND: int = 0
+GET_OUTPUTS: int = 3
+
+
+class SwayBackend(WallpaperBackend):
+    """
+    The SwayBackend class sets the wallpaper in sway through its IPC socket, on a QLocalSocket without blocking:
+    1. the outputs are listed if some screens have their own image, so each output gets the image of its position,
+    2. an "output <name> bg <path> fill" command is run for the outputs.
+
+    Reference:
+        https://man.archlinux.org/man/sway-ipc.7
+    """
+
+    NAME: str = "sway"
+    DESKTOPS: tuple[str, ...] = ("sway",)
+    PER_SCREEN: bool = True
+
+    def __init__(self, parent: Optional[QObject] = None, socket_path: Optional[str] = None) -> None:
+        """
+        :param parent: QObject
+        :param socket_path: the IPC socket, 'SWAYSOCK' if it is None
+        """
+        super().__init__(parent)
+        self.socket_path: str = socket_path if socket_path is not None else os.getenv("SWAYSOCK", "")
+        self.sockets: set[QLocalSocket] = set()  # the applies waiting for sway
+
+    @classmethod
+    def matches(cls, desktops: list[str]) -> bool:
+        """
+        Sway may not set 'XDG_CURRENT_DESKTOP', its socket is enough.
+        :param desktops: the names in 'XDG_CURRENT_DESKTOP' in lower case
+        :return: bool
+        """
+        return super().matches(desktops) or bool(os.getenv("SWAYSOCK"))
+
+    @staticmethod
+    def command(output: str, img_path: str) -> str:
+        """
+        Build the command which sets the wallpaper of an output.
+        :param output: the output name, "*" for all outputs
+        :param img_path: the wallpaper path
+        :return: the command
+        """
+        quoted: str = img_path.replace("\\", "\\\\").replace('"', '\\"')
+        return f'output {output} bg "{quoted}" fill'
+
+    def busy(self) -> bool:
+        """
+        Check whether an apply waits for sway.
+        :return: bool
+        """
+        return bool(self.sockets)
+
+    def apply(self, img_path: str, screens: Optional[dict[str, str]] = None) -> None:
+        """
+        Set the wallpaper, 'applied' or 'failed' is emitted when sway answers.
+        :param img_path: the wallpaper path
+        :param screens: the wallpapers of some screens by the position of the screen, e.g. {"1920,0": path}
+        """
+        socket: QLocalSocket = QLocalSocket(self)
+        self.sockets.add(socket)
+        buffer: bytearray = bytearray()
+
+        def send(kind: int, payload: str) -> None:
+            data: bytes = payload.encode()
+            socket.write(HEADER.pack(MAGIC, len(data), kind) + data)
+
+        def finish(res: bool) -> None:
+            if socket not in self.sockets:  # the socket reports an error when it is aborted
+                return
+            self.sockets.discard(socket)
+            socket.abort()
+            socket.deleteLater()
+            if res:
+                self.succeed(img_path)
+            else:
+                self.fail(img_path, "Failed to set the wallpaper through sway")
+
+        def on_connected() -> None:
+            if screens:
+                send(GET_OUTPUTS, "")
+            else:
+                send(RUN_COMMAND, self.command("*", img_path))
+
+        def on_ready_read() -> None:
+            buffer.extend(socket.readAll().data())
+            while len(buffer) >= HEADER.size:
+                _, length, kind = HEADER.unpack_from(buffer)
+                if len(buffer) < HEADER.size + length:
+                    return
+                reply: Any = json.loads(bytes(buffer[HEADER.size:HEADER.size + length]))
+                del buffer[:HEADER.size + length]
+                if kind == GET_OUTPUTS:
+                    commands: list[str] = [
+                        self.command(f'"{output["name"]}"', (screens or {}).get(
+                            f"{output['rect']['x']},{output['rect']['y']}", img_path))
+                        for output in reply if output.get("active", True)
+                    ]
+                    send(RUN_COMMAND, "; ".join(commands) or self.command("*", img_path))
+                else:
+                    finish(all(result.get("success", False) for result in reply))
+
+        socket.connected.connect(on_connected)  # pylint: disable=no-member
+        socket.readyRead.connect(on_ready_read)  # pylint: disable=no-member
+        socket.errorOccurred.connect(lambda _: finish(False))  # pylint: disable=no-member
+        socket.connectToServer(self.socket_path)
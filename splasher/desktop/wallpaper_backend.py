@@ -0,0 +1,88 @@
+import logging
+import os
+from typing import Optional
+
+from PySide6.QtCore import QObject, Signal
+
+
+class WallpaperBackend(QObject):
+    """
+    The WallpaperBackend class is the base of the backends which set the wallpaper of a desktop environment:
+    1. 'matches' tells whether the backend serves the running desktop, see 'BackendRegistry',
+    2. 'apply' returns at once, 'applied' or 'failed' is emitted when the desktop has answered,
+    3. 'PER_SCREEN' backends show a different image on each screen.
+    Every backend in 'BACKENDS' must override 'apply', the base class can not set a wallpaper by itself,
+    the other methods have defaults which fit a desktop without a wallpaper state.
+    """
+
+    NAME: str = "generic"
+    DESKTOPS: tuple[str, ...] = ()  # the names in 'XDG_CURRENT_DESKTOP' the backend serves
+    PER_SCREEN: bool = False
+
+    applied: Signal = Signal(str)  # the wallpaper path
+    failed: Signal = Signal(str, str)  # the wallpaper path, the message for the status bar
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        """
+        :param parent: QObject
+        """
+        super().__init__(parent)
+        self.logger: logging.Logger = logging.getLogger(__name__)
+
+    @classmethod
+    def matches(cls, desktops: list[str]) -> bool:
+        """
+        Check whether the backend serves the running desktop.
+        :param desktops: the names in 'XDG_CURRENT_DESKTOP' in lower case, e.g. ["ubuntu", "gnome"]
+        :return: bool
+        """
+        return any(desktop.lower() in desktops for desktop in cls.DESKTOPS)
+
+    @staticmethod
+    def current_desktops() -> list[str]:
+        """
+        Get the names of the running desktop, 'XDG_CURRENT_DESKTOP' may list several, e.g. "ubuntu:GNOME".
+        :return: the names in lower case
+        """
+        return [desktop.lower() for desktop in os.getenv("XDG_CURRENT_DESKTOP", "").split(":") if desktop]
+
+    def apply(self, img_path: str, screens: Optional[dict[str, str]] = None) -> None:
+        """
+        Start setting the wallpaper, subclasses must override it and report the answer by 'succeed' or 'fail'.
+        :param img_path: the wallpaper path
+        :param screens: the wallpapers of some screens by the position of the screen, e.g. {"1920,0": path},
+                        only used by 'PER_SCREEN' backends
+        """
+        raise NotImplementedError
+
+    def state(self) -> str:
+        """
+        Get the part of the desktop state the wallpaper depends on, e.g. the color scheme,
+        a wallpaper applied in another state is applied again, see 'WallpaperSetter.fingerprint'.
+        :return: the state, "" if the wallpaper does not depend on any
+        """
+        return ""
+
+    def busy(self) -> bool:
+        """
+        Check whether the backend waits for the desktop.
+        :return: bool
+        """
+        return False
+
+    def succeed(self, img_path: str) -> None:
+        """
+        Report a wallpaper which has been set.
+        :param img_path: the wallpaper path
+        """
+        self.logger.info("Set '%s' as the desktop wallpaper", img_path)
+        self.applied.emit(img_path)
+
+    def fail(self, img_path: str, msg: str) -> None:
+        """
+        Report a wallpaper which could not be set.
+        :param img_path: the wallpaper path
+        :param msg: the message for the status bar
+        """
+        self.logger.error("%s: '%s'", msg, img_path)
+        self.failed.emit(img_path, msg)
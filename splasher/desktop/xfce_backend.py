@@ -0,0 +1,80 @@
+from typing import Optional
+
+from PySide6.QtCore import QFile, QIODevice, QStandardPaths, QXmlStreamReader
+from PySide6.QtDBus import QDBusMessage, QDBusVariant
+
+from .dbus_backend import DBusBackend
+
+# the xfconf channel of the desktop and the property of a default monitor, used if none has a wallpaper yet
+CHANNEL: str = "xfce4-desktop"
+DEFAULT_PROPERTY: str = "/backdrop/screen0/monitor0/workspace0/last-image"
+
+
+class XfceBackend(DBusBackend):
+    """
+    The XfceBackend class sets the wallpaper in XFCE through xfconf over D-Bus:
+    1. the wallpaper properties of all monitors and workspaces, which end with "/last-image",
+       are listed from the channel file of xfconf, the a{sv} answer of 'GetAllProperties' can not be read by PySide,
+    2. every one of them is set to the image, the wallpaper is applied once all writes are answered.
+
+    Reference:
+        https://docs.xfce.org/xfce/xfconf/xfconf-query
+    """
+
+    NAME: str = "xfce"
+    DESKTOPS: tuple[str, ...] = ("XFCE",)
+    SERVICE: str = "org.xfce.Xfconf"
+    PATH: str = "/org/xfce/Xfconf"
+    INTERFACE: str = "org.xfce.Xfconf"
+
+    @staticmethod
+    def properties(channel_path: Optional[str] = None) -> list[str]:
+        """
+        List the wallpaper properties in the channel file.
+        :param channel_path: the channel file, the one in the user config folder if it is None
+        :return: the property paths, e.g. ["/backdrop/screen0/monitorDP-1/workspace0/last-image"]
+        """
+        if channel_path is None:
+            channel_path = f"{QStandardPaths.writableLocation(QStandardPaths.GenericConfigLocation)}" \
+                           f"/xfce4/xfconf/xfce-perchannel-xml/{CHANNEL}.xml"
+        file: QFile = QFile(channel_path)
+        if not file.open(QIODevice.ReadOnly):
+            return []
+        reader: QXmlStreamReader = QXmlStreamReader(file)
+        names: list[str] = []  # the names of the open property elements
+        keys: list[str] = []
+        while not reader.atEnd():
+            reader.readNext()
+            if reader.isStartElement() and reader.name() == "property":
+                names.append(reader.attributes().value("name"))
+                if names[-1] == "last-image":
+                    keys.append(f"/{'/'.join(names)}")
+            elif reader.isEndElement() and reader.name() == "property":
+                names.pop()
+        file.close()
+        return keys
+
+    def apply(self, img_path: str, screens: Optional[dict[str, str]] = None) -> None:
+        """
+        Set the wallpaper, 'applied' or 'failed' is emitted when xfconf answers.
+        :param img_path: the wallpaper path
+        :param screens: unused, one image is shown on all screens
+        """
+        keys: list[str] = self.properties() or [DEFAULT_PROPERTY]
+        waiting: set[str] = set(keys)
+        failed: list[str] = []
+
+        def on_reply(key: str, reply: Optional[QDBusMessage]) -> None:
+            waiting.discard(key)
+            if reply is None:
+                failed.append(key)
+            if waiting:
+                return
+            if failed:
+                self.fail(img_path, "Failed to set the wallpaper through xfconf")
+            else:
+                self.succeed(img_path)
+
+        for key in keys:
+            self.call(self.SERVICE, self.PATH, self.INTERFACE, "SetProperty", [CHANNEL, key, QDBusVariant(img_path)],
+                      lambda reply, key=key: on_reply(key, reply))
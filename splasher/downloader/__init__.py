@@ -1,4 +1,17 @@
-from .area_detector import AreaDetector
+from .backend_registry import BackendRegistry, get_backend_registry
+from .cache_manager import CacheManager, get_cache_manager
+from .connection_warmer import ConnectionWarmer, get_connection_warmer
+from .downloader import Downloader, live_downloaders
+from .endpoint_selector import EndpointSelector, get_endpoint_selector
+from .http_cache import HttpCache
+from .network_estimator import NetworkEstimator, get_network_estimator
 from .preview_fetcher import PreviewFetcher
+from .preview_prefetcher import PreviewPrefetcher
+from .request_registry import RequestRegistry, get_request_registry
+from .request_scheduler import Priority, RequestScheduler, get_request_scheduler
+from .retry_policy import RetryPolicy
+from .rotation_scheduler import RotationScheduler
+from .variant_builder import VariantBuilder, screen_variants
 from .wallpaper_downloader import WallpaperDownloader
+from .wallpaper_publisher import WallpaperPublisher
 from .wallpaper_setter import WallpaperSetter
@@ -0,0 +1,169 @@
+import logging
+import time
+from typing import Any, Optional
+
+from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtDBus import QDBusConnection
+
+from splasher.desktop import (CinnamonBackend, DBusBackend, GnomeBackend, KdeBackend, MateBackend, PortalBackend,
+                              SwayBackend, WallpaperBackend, XfceBackend)
+
+# the backends in the order they are tried, the portal serves any other desktop
+BACKENDS: list[type[WallpaperBackend]] = [
+    KdeBackend, GnomeBackend, XfceBackend, SwayBackend, MateBackend, CinnamonBackend, PortalBackend,
+]
+
+
+class BackendRegistry(QObject):
+    """
+    The BackendRegistry class sets wallpapers through the backend of the running desktop:
+    1. the desktop is detected once, the backend and its capabilities are kept for the whole process,
+    2. 'apply' returns at once, 'applied' or 'failed' is emitted when the desktop has answered,
+    3. the state of the last applied wallpaper is kept for the whole process,
+       so applying the same wallpaper again is skipped, see 'is_applied',
+    4. the time every apply takes is recorded per backend, see 'stats'.
+    """
+
+    applied: Signal = Signal(str, float)  # the wallpaper path, the time it took in ms
+    failed: Signal = Signal(str)  # the message for the status bar
+
+    def __init__(self, parent: Optional[QObject] = None, connection: Optional[QDBusConnection] = None) -> None:
+        """
+        :param parent: QObject
+        :param connection: the bus of the D-Bus backends, the session bus if it is None
+        """
+        super().__init__(parent)
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.connection: Optional[QDBusConnection] = connection
+        self.backend: Optional[WallpaperBackend] = None
+        self.capabilities: dict[str, Any] = {}
+        self.started: dict[str, float] = {}  # {wallpaper path: when it was applied}
+        self.fingerprints: dict[str, str] = {}  # {wallpaper path: the fingerprint of its images and screens}
+        self.last_applied: str = ""  # the state of the last applied wallpaper, see 'applied_state'
+        self.timings: dict[str, list[float]] = {}  # {backend name: the time of every apply in ms}
+        self.failures: dict[str, int] = {}  # {backend name: the number of failed applies}
+
+    def detect(self) -> WallpaperBackend:
+        """
+        Choose the backend of the running desktop, only on the first call.
+        :return: WallpaperBackend
+        """
+        if self.backend is None:
+            desktops: list[str] = WallpaperBackend.current_desktops()
+            backend_class: type[WallpaperBackend] = next(cls for cls in BACKENDS if cls.matches(desktops))
+            if issubclass(backend_class, DBusBackend):
+                self.backend = backend_class(self, self.connection)
+            else:
+                self.backend = backend_class(self)
+            self.backend.applied.connect(self.on_applied)  # pylint: disable=no-member
+            self.backend.failed.connect(self.on_failed)  # pylint: disable=no-member
+            self.capabilities = {
+                "name": backend_class.NAME,
+                "desktops": desktops,
+                "per_screen": backend_class.PER_SCREEN,
+            }
+            self.logger.info("Detect the desktop %s, use the '%s' backend", desktops, backend_class.NAME)
+        return self.backend
+
+    def applied_state(self, fingerprint: str) -> str:
+        """
+        Combine the fingerprint of a wallpaper with the backend and the desktop state it depends on.
+        :param fingerprint: the fingerprint of the images and the screens, see 'WallpaperSetter.fingerprint'
+        :return: e.g. "gnome:<fingerprint>:/org/gnome/desktop/background/picture-uri-dark"
+        """
+        backend: WallpaperBackend = self.detect()
+        return f"{backend.NAME}:{fingerprint}:{backend.state()}"
+
+    def is_applied(self, fingerprint: str) -> bool:
+        """
+        Check whether a wallpaper is already shown in the current desktop state.
+        :param fingerprint: the fingerprint of the images and the screens
+        :return: bool
+        """
+        return bool(self.last_applied) and self.last_applied == self.applied_state(fingerprint)
+
+    def apply(self, img_path: str, screens: Optional[dict[str, str]] = None, fingerprint: str = "") -> None:
+        """
+        Start setting the wallpaper.
+        :param img_path: the wallpaper path
+        :param screens: the wallpapers of some screens by the position of the screen, e.g. {"1920,0": path},
+                        ignored unless the backend shows one image per screen
+        :param fingerprint: the fingerprint of the images and the screens, recorded once the wallpaper is applied
+        """
+        backend: WallpaperBackend = self.detect()
+        self.started[img_path] = time.monotonic()
+        self.fingerprints[img_path] = fingerprint
+        backend.apply(img_path, screens if backend.PER_SCREEN else None)
+
+    def busy(self) -> bool:
+        """
+        Check whether an apply waits for the desktop.
+        :return: bool
+        """
+        return self.backend is not None and self.backend.busy()
+
+    def elapsed(self, img_path: str) -> float:
+        """
+        Record the time an apply took.
+        :param img_path: the wallpaper path
+        :return: the time in ms
+        """
+        started: Optional[float] = self.started.pop(img_path, None)
+        elapsed: float = (time.monotonic() - started) * 1000 if started is not None else 0.0
+        self.timings.setdefault(self.capabilities["name"], []).append(elapsed)
+        return elapsed
+
+    @Slot(str)
+    def on_applied(self, img_path: str) -> None:
+        """
+        Pass on a wallpaper which has been set.
+        :param img_path: the wallpaper path
+        """
+        elapsed: float = self.elapsed(img_path)
+        self.logger.info("Applied '%s' in %.0f ms", img_path, elapsed)
+        fingerprint: str = self.fingerprints.pop(img_path, "")
+        if fingerprint:
+            self.last_applied = self.applied_state(fingerprint)
+        self.applied.emit(img_path, elapsed)
+
+    @Slot(str, str)
+    def on_failed(self, img_path: str, msg: str) -> None:
+        """
+        Pass on a wallpaper which could not be set.
+        :param img_path: the wallpaper path
+        :param msg: the message for the status bar
+        """
+        self.elapsed(img_path)
+        self.fingerprints.pop(img_path, None)
+        self.failures[self.capabilities["name"]] = self.failures.get(self.capabilities["name"], 0) + 1
+        self.failed.emit(f"{msg}.")
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """
+        Get the time applies take per backend for diagnostics.
+        :return: dict: {backend name: {"count", "failures", "avg_ms", "last_ms"}}
+        """
+        return {
+            name: {
+                "count": len(samples),
+                "failures": self.failures.get(name, 0),
+                "avg_ms": round(sum(samples) / len(samples), 1),
+                "last_ms": round(samples[-1], 1),
+            }
+            for name, samples in self.timings.items()
+        }
+
+
+# one registry shared by the whole process
+registry: Optional[BackendRegistry] = None
+
+
+def get_backend_registry() -> BackendRegistry:
+    """
+    Get the process-wide registry, create it on the first call.
+    :return: BackendRegistry
+    """
+    global registry  # pylint: disable=global-statement
+    if registry is None:
+        registry = BackendRegistry()
+    return registry
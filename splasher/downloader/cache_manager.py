@@ -0,0 +1,226 @@
+import json
+import logging
+import time
+from typing import Any, Callable, Optional
+
+from PySide6.QtCore import QCoreApplication, QDir, QFile, QFileInfo, QIODevice, QSaveFile, QTimer
+
+from splasher.config import PATH, get_settings_arg
+from splasher.config.args import SETTINGS
+from splasher.image import get_size_prober
+
+# default window (ms) in which changes of the index are coalesced into one write
+FLUSH_INTERVAL: int = 5000  # 5s
+
+
+def current_images() -> set[str]:
+    """
+    Get the images the settings refer to, the current 'PREVIEW' and 'WALLPAPER'.
+    :return: set of image paths relative to the cache folder
+    """
+    images: set[str] = set()
+    res, preview = get_settings_arg("PREVIEW")
+    if res and preview:
+        images.add(f"{preview}.jpg")
+    res, wallpaper = get_settings_arg("WALLPAPER")
+    if res and wallpaper:
+        images.add(wallpaper)
+    return images
+
+
+class CacheManager:
+    """
+    The CacheManager class keeps the image cache (~/.cache/splasher/unsplash/) within its limits:
+    1. every image written or shown is recorded with its size and last access time,
+    2. the least recently accessed images are removed when 'CACHE_MAX_BYTES' or 'CACHE_MAX_ENTRIES' is exceeded,
+    3. the current 'PREVIEW', the current 'WALLPAPER' and pinned images, e.g. the variants of the other screens,
+       are never removed.
+
+    The records are kept in 'index.json' in the cache folder,
+    so the folder is only listed once, when the index does not exist yet.
+    Like 'SettingsStore', changes are kept in memory and written in batches by a timer and when the app quits,
+    the index is only a hint, an access lost by a crash only makes an image look older.
+    """
+
+    def __init__(self,
+                 cache_path: str = PATH["CACHE"],
+                 subfolder: str = PATH["SUBFOLDER"],
+                 max_bytes: Optional[int] = None,
+                 max_entries: Optional[int] = None,
+                 current: Callable[[], set[str]] = current_images,
+                 flush_interval: int = FLUSH_INTERVAL) -> None:
+        """
+        :param cache_path: the cache folder, e.g. "~/.cache/splasher/"
+        :param subfolder: the subfolder of images, e.g. "unsplash/"
+        :param max_bytes: the size limit, 'CACHE_MAX_BYTES' in the settings is used if it is None
+        :param max_entries: the number limit, 'CACHE_MAX_ENTRIES' in the settings is used if it is None
+        :param current: returns the images in use which are never evicted, see 'current_images'
+        :param flush_interval: changes within this window (ms) are coalesced into one write
+        """
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.cache_path: str = cache_path
+        self.subfolder: str = subfolder
+        self.index_path: str = f"{cache_path}index.json"
+        self.index: Optional[dict[str, dict[str, Any]]] = None
+        self.pinned: set[str] = set()
+        self.max_bytes: Optional[int] = max_bytes
+        self.max_entries: Optional[int] = max_entries
+        self.current: Callable[[], set[str]] = current
+        self.flush_interval: int = flush_interval
+        self.dirty: bool = False
+        self.timer: Optional[QTimer] = None
+
+    def load(self) -> dict[str, dict[str, Any]]:
+        """
+        Read the index, build it from the cache folder if it does not exist.
+        :return: the index, {"unsplash/photo-xxx.jpg": {"size": int, "atime": float}}
+        """
+        if self.index is not None:
+            return self.index
+
+        file: QFile = QFile(self.index_path)
+        if file.open(QIODevice.ReadOnly | QIODevice.Text | QIODevice.ExistingOnly):
+            try:
+                self.index = json.loads(bytes(file.readAll().data()).decode("utf-8"))
+            except json.JSONDecodeError:
+                self.logger.warning("'%s' is broken", self.index_path)
+        file.close()
+
+        if self.index is None:
+            self.index = {}
+            directory: QDir = QDir(f"{self.cache_path}{self.subfolder}")
+            for info in directory.entryInfoList(["*.jpg"], QDir.Files):
+                self.index[f"{self.subfolder}{info.fileName()}"] = {
+                    "size": info.size(),
+                    "atime": info.lastRead().toSecsSinceEpoch(),
+                }
+            self.logger.info("Build '%s' with %d images", self.index_path, len(self.index))
+            self.schedule_flush()
+        return self.index
+
+    def schedule_flush(self) -> None:
+        """
+        Mark the index as changed and start the flush timer unless it is already running.
+        Without a running Qt application there is nothing to drive the timer, so the index is written at once.
+        """
+        self.dirty = True
+        if self.flush_interval <= 0 or QCoreApplication.instance() is None:
+            self.flush()
+            return
+        if self.timer is None:
+            self.timer = QTimer()
+            self.timer.setSingleShot(True)
+            self.timer.timeout.connect(self.flush)  # pylint: disable=no-member
+            QCoreApplication.instance().aboutToQuit.connect(self.flush)
+        if not self.timer.isActive():
+            self.timer.start(self.flush_interval)
+
+    def flush(self) -> bool:
+        """
+        Write the index if it has changed since the last write.
+        :return: bool, False if the write failed
+        """
+        if self.timer is not None:
+            self.timer.stop()
+        if not self.dirty:
+            return True
+        self.dirty = not self.save()
+        return not self.dirty
+
+    def save(self) -> bool:
+        """
+        Write the index back to 'index.json'.
+        :return: bool
+        """
+        file: QSaveFile = QSaveFile(self.index_path)
+        if file.open(QIODevice.WriteOnly | QIODevice.Text):
+            file.write(json.dumps(self.index).encode("utf-8"))
+            return file.commit()
+        file.cancelWriting()
+        self.logger.error("Failed to open '%s'", self.index_path)
+        return False
+
+    def touch(self, img_subpath: str) -> None:
+        """
+        Record that an image has been written or accessed.
+        Only a new or changed image can push the cache over its limits, so only then images are evicted.
+        :param img_subpath: the image path relative to the cache folder, e.g. "unsplash/photo-xxx.jpg"
+        """
+        info: QFileInfo = QFileInfo(f"{self.cache_path}{img_subpath}")
+        if not info.exists():
+            return
+        index: dict[str, dict[str, Any]] = self.load()
+        grown: bool = index.get(img_subpath, {}).get("size") != info.size()
+        index[img_subpath] = {"size": info.size(), "atime": time.time()}
+        if grown:
+            self.evict()
+        self.schedule_flush()
+
+    def pin(self, img_subpath: str) -> None:
+        """
+        Protect an image from eviction, e.g. a prefetched preview that has not been shown yet.
+        :param img_subpath: the image path relative to the cache folder
+        """
+        self.pinned.add(img_subpath)
+
+    def unpin(self, img_subpath: str) -> None:
+        """
+        Stop protecting an image.
+        :param img_subpath: the image path relative to the cache folder
+        """
+        self.pinned.discard(img_subpath)
+
+    def protected(self) -> set[str]:
+        """
+        Get the images that must be kept.
+        :return: set of image paths relative to the cache folder
+        """
+        return self.pinned | self.current()
+
+    def limits(self) -> tuple[int, int]:
+        """
+        Get the size and number limits of the cache.
+        :return: tuple: (max bytes, max entries)
+        """
+        limits: list[int] = []
+        for key, value in (("CACHE_MAX_BYTES", self.max_bytes), ("CACHE_MAX_ENTRIES", self.max_entries)):
+            if value is None:
+                res, value = get_settings_arg(key)
+                if not res:
+                    value = SETTINGS[key]
+            limits.append(value)
+        return limits[0], limits[1]
+
+    def evict(self) -> None:
+        """
+        Remove the least recently accessed images until the cache is within its limits.
+        """
+        index: dict[str, dict[str, Any]] = self.load()
+        max_bytes, max_entries = self.limits()
+        keep: set[str] = self.protected()
+        total: int = sum(entry["size"] for entry in index.values())
+        for img_subpath in sorted(index, key=lambda name: index[name]["atime"]):
+            if total <= max_bytes and len(index) <= max_entries:
+                break
+            if img_subpath in keep:
+                continue
+            if QFile.remove(f"{self.cache_path}{img_subpath}") \
+                    or not QFile.exists(f"{self.cache_path}{img_subpath}"):
+                self.logger.info("Evict '%s' from the cache", img_subpath)
+                total -= index.pop(img_subpath)["size"]
+                get_size_prober().forget(f"{self.cache_path}{img_subpath}")
+
+
+# one manager per cache folder, shared by the whole process
+managers: dict[str, CacheManager] = {}
+
+
+def get_cache_manager(cache_path: str = PATH["CACHE"]) -> CacheManager:
+    """
+    Get the process-wide manager of a cache folder, create it on the first call.
+    :param cache_path: the cache folder
+    :return: CacheManager
+    """
+    if cache_path not in managers:
+        managers[cache_path] = CacheManager(cache_path)
+    return managers[cache_path]
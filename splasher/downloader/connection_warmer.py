@@ -0,0 +1,114 @@
+import logging
+import time
+from typing import Optional
+
+from PySide6.QtCore import QByteArray, QObject, QUrl
+from PySide6.QtNetwork import QNetworkAccessManager, QSslConfiguration, QSslSocket
+
+from splasher.config import get_settings_arg
+from splasher.config.args import SETTINGS
+
+# the shortest time between two warm-ups of an origin, e.g. when the window is shown repeatedly
+WARM_INTERVAL: float = 10  # 10s
+# how long an unused connection is expected to stay open, most servers close idle connections after a minute
+IDLE_TIMEOUT: float = 60  # 1min
+
+
+class ConnectionWarmer(QObject):
+    """
+    The ConnectionWarmer class opens connections before they are needed,
+    so the DNS lookup, the TCP and the TLS handshakes are not paid on the click path:
+    1. 'warm' connects to origins in the background, HTTPS connections offer HTTP/2 by ALPN,
+       the next request to the origin reuses the connection,
+    2. the time to first byte of every request is recorded as cold or warm,
+       depending on whether its origin had an open connection, so the win is visible in 'stats'.
+    'PREWARM' in the settings turns the warm-ups off, e.g. to compare the measurements.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        """
+        :param parent: QObject
+        """
+        super().__init__(parent)
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.connected: dict[str, float] = {}  # {origin: when it was last warmed or used}
+        self.warmed: dict[str, float] = {}  # {origin: when it was last warmed}
+        self.ttfb: dict[str, list[float]] = {"cold": [], "warm": []}  # the time to first byte in ms
+
+    @staticmethod
+    def origin(url: QUrl) -> str:
+        """
+        Get the origin of a url, connections are shared per origin.
+        :param url: QUrl
+        :return: e.g. "https://images.unsplash.com:443"
+        """
+        return f"{url.scheme()}://{url.host()}:{url.port(443 if url.scheme() == 'https' else 80)}"
+
+    def warm(self, manager: QNetworkAccessManager, urls: list[str]) -> None:
+        """
+        Connect to the origins of the urls unless they have been warmed recently.
+        :param manager: the QNetworkAccessManager which sends the following requests
+        :param urls: url strings
+        """
+        res, enabled = get_settings_arg("PREWARM")
+        if not (enabled if res else SETTINGS["PREWARM"]):
+            return
+        now: float = time.monotonic()
+        for url_str in urls:
+            url: QUrl = QUrl(url_str)
+            origin: str = self.origin(url)
+            if origin in self.warmed and now - self.warmed[origin] < WARM_INTERVAL:
+                continue
+            if url.scheme() == "https":
+                if not QSslSocket.supportsSsl():
+                    self.logger.warning("Can not warm '%s' up without TLS support", origin)
+                    continue
+                config: QSslConfiguration = QSslConfiguration.defaultConfiguration()
+                config.setAllowedNextProtocols([QByteArray(QSslConfiguration.ALPNProtocolHTTP2.encode()),
+                                                QByteArray(QSslConfiguration.NextProtocolHttp1_1.encode())])
+                manager.connectToHostEncrypted(url.host(), url.port(443), config)
+            else:
+                manager.connectToHost(url.host(), url.port(80))
+            self.warmed[origin] = self.connected[origin] = now
+            self.logger.info("Warm the connection to '%s' up", origin)
+
+    def record_ttfb(self, url: QUrl, ttfb: float) -> None:
+        """
+        Add the time to first byte of a request.
+        :param url: the request url
+        :param ttfb: the time from sending the request to its response headers in ms
+        """
+        origin: str = self.origin(url)
+        now: float = time.monotonic()
+        kind: str = "warm" if origin in self.connected and now - self.connected[origin] < IDLE_TIMEOUT else "cold"
+        self.ttfb[kind].append(ttfb)
+        self.connected[origin] = now
+        self.logger.info("Time to first byte of '%s': %.0f ms on a %s connection", origin, ttfb, kind)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """
+        Get the time to first byte on cold and warm connections for diagnostics.
+        :return: dict: {"cold" | "warm": {"count", "avg_ms"}}
+        """
+        return {
+            kind: {
+                "count": len(samples),
+                "avg_ms": round(sum(samples) / len(samples), 1) if samples else 0.0,
+            }
+            for kind, samples in self.ttfb.items()
+        }
+
+
+# one warmer shared by the whole process
+warmer: Optional[ConnectionWarmer] = None
+
+
+def get_connection_warmer() -> ConnectionWarmer:
+    """
+    Get the process-wide warmer, create it on the first call.
+    :return: ConnectionWarmer
+    """
+    global warmer  # pylint: disable=global-statement
+    if warmer is None:
+        warmer = ConnectionWarmer()
+    return warmer
@@ -1,24 +1,264 @@
 import logging
-from typing import Optional
+import time
+from typing import Any, Callable, Optional, Union
 
-from PySide6.QtCore import QObject, Slot
-from PySide6.QtNetwork import QNetworkReply
-from PySide6.QtWidgets import QMainWindow
+from PySide6.QtCore import QIODevice, QObject, QSaveFile, QTimer, Slot
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+
+from .connection_warmer import get_connection_warmer
+from .endpoint_selector import EndpointSelector, get_endpoint_selector
+from .http_cache import HttpCache
+from .network_estimator import get_network_estimator
+from .partial_download import PartialDownload
+from .request_registry import get_request_registry
+from .request_scheduler import Priority, get_request_scheduler
+from .retry_policy import RetryPolicy
+
+# the most bytes a reply buffers in memory before they are written to disk in the streaming mode
+READ_BUFFER_SIZE: int = 256 * 1024  # 256KB
 
 
 class Downloader(QObject):
     """
     The basic downloader class.
+
+    In the streaming mode, the reply body is written into a QSaveFile chunk by chunk as it arrives,
+    so the memory usage does not depend on the size of the image.
+    The file only replaces its target when the whole body has been received.
+    In the resumable mode, a failed download is kept next to its target and continued by the next request.
+
+    Requests are not sent directly, they are queued in the request scheduler by their 'priority',
+    the reply is passed to a callback once the request has been sent.
+
+    A downloader is used for one task, it deletes itself by 'done' when the task is over.
+    A request which fails with a transient error is sent again by 'retry' as its 'retry_policy' allows.
+    Unless a request has its own transfer timeout, the timeout is derived from the network estimate of its host,
+    which every attempt feeds with its latency and throughput.
+    A request to an image endpoint is sent to the best one when it is queued, and reports its result to the selector.
     """
 
-    def __init__(self, parent: QMainWindow) -> None:
+    priority: Priority = Priority.DOWNLOAD  # the scheduling class of the requests
+    retry_policy: Optional[RetryPolicy] = RetryPolicy()  # None means no retries
+
+    def __init__(self, parent: QObject) -> None:
         """
         Create some variables that will be used later and initialize them.
-        :param parent: MainWindow
+        :param parent: MainWindow or the headless parent of the CLI, which provide 'manager' and 'show_message'
         """
         super().__init__(parent)
         self.logger: logging.Logger = logging.getLogger(__name__)
+        self.manager: QNetworkAccessManager = parent.manager
         self.reply: Optional[QNetworkReply] = None
+        self.save_path: str = ""
+        self.save_file: Optional[Union[QSaveFile, PartialDownload]] = None
+        self.partial: Optional[PartialDownload] = None
+        self.canceled: bool = False
+        self.attempts: dict[QNetworkReply, dict[str, Any]] = {}  # {reply: how to send its request again}
+        # ======== count the live downloaders ========
+        name: str = type(self).__name__
+        live[name] = live.get(name, 0) + 1
+        self.destroyed.connect(lambda: Downloader.on_destroyed(name))  # pylint: disable=no-member
+
+    def get(self,
+            request: QNetworkRequest,
+            started: Callable[[QNetworkReply], None],
+            priority: Optional[Priority] = None) -> None:
+        """
+        Queue a GET request, it is sent through the shared QNetworkAccessManager when the scheduler allows.
+        A resumable download asks only for the missing bytes unless it is answered by the cache.
+        :param request: QNetworkRequest
+        :param started: called with the reply once the request has been sent
+        :param priority: the scheduling class, 'priority' of the downloader is used if it is None
+        """
+        self.send("GET", request, started, priority)
+
+    def head(self,
+             request: QNetworkRequest,
+             started: Callable[[QNetworkReply], None],
+             priority: Optional[Priority] = None) -> None:
+        """
+        Queue a HEAD request.
+        :param request: QNetworkRequest
+        :param started: called with the reply once the request has been sent
+        :param priority: the scheduling class, 'priority' of the downloader is used if it is None
+        """
+        self.send("HEAD", request, started, priority)
+
+    def send(self,
+             operation: str,
+             request: QNetworkRequest,
+             started: Callable[[QNetworkReply], None],
+             priority: Optional[Priority] = None,
+             attempt: int = 1,
+             first: Optional[float] = None) -> None:
+        """
+        Queue a request in the scheduler and record it in the request registry until its reply finishes,
+        under the saving path if it is known, otherwise under the url.
+        :param operation: "GET" or "HEAD"
+        :param request: QNetworkRequest
+        :param started: called with the reply once the request has been sent
+        :param priority: the scheduling class, 'priority' of the downloader is used if it is None
+        :param attempt: the number of the attempt, starting from 1
+        :param first: when the first attempt was queued, from time.monotonic()
+        """
+        if request.attribute(QNetworkRequest.CacheLoadControlAttribute) != QNetworkRequest.AlwaysCache:
+            get_endpoint_selector().reroute(request)  # fail over to another endpoint, e.g. for a retry
+        context: dict[str, Any] = {
+            "operation": operation,
+            "request": QNetworkRequest(request),  # before 'prepare', the range may differ in the next attempt
+            "started": started,
+            "priority": priority,
+            "attempt": attempt,
+            "first": time.monotonic() if first is None else first,
+        }
+        if operation == "GET" and self.partial is not None \
+                and request.attribute(QNetworkRequest.CacheLoadControlAttribute) != QNetworkRequest.AlwaysCache:
+            self.partial.prepare(request)
+        if not request.transferTimeout():
+            request.setTransferTimeout(get_network_estimator().timeout(request.url().host(),
+                                                                       self.expected_size(operation, request)))
+        key: str = self.save_path or request.url().toString()
+        get_request_registry().reserve(key)
+        get_request_scheduler().submit(self.manager, operation, request,
+                                       self.priority if priority is None else priority,
+                                       lambda reply: self.on_sent(key, reply, context))
+
+    def on_sent(self, key: str, reply: QNetworkReply, context: dict[str, Any]) -> None:
+        """
+        Track a reply that has just been sent and pass it on, unless the downloader has been canceled meanwhile.
+        :param key: the key of the request in the registry
+        :param reply: QNetworkReply
+        :param context: how the request was sent
+        """
+        get_request_registry().track(key, reply)
+        if isinstance(self.manager.cache(), HttpCache):
+            self.manager.cache().watch(reply)
+        context["sent"] = time.monotonic()
+        self.attempts[reply] = context
+        reply.metaDataChanged.connect(lambda: self.on_attempt_headers(reply))
+        reply.downloadProgress.connect(lambda received, _: context.update(received=received, active=time.monotonic()))
+        reply.finished.connect(lambda: self.on_attempt_finished(reply))
+        started: Callable[[QNetworkReply], None] = context["started"]
+        if self.canceled:
+            reply.abort()
+            self.done()
+            return
+        started(reply)
+
+    @staticmethod
+    def expected_size(operation: str, request: QNetworkRequest) -> Optional[int]:
+        """
+        Get the expected size of the response body from the request.
+        :param operation: "GET" or "HEAD"
+        :param request: QNetworkRequest
+        :return: the number of bytes, None if it is unknown
+        """
+        if operation == "HEAD":
+            return 0
+        first, _, last = request.rawHeader("Range").data().decode().removeprefix("bytes=").partition("-")
+        if first.isdigit() and last.isdigit():
+            return int(last) - int(first) + 1
+        return None
+
+    def on_attempt_headers(self, reply: QNetworkReply) -> None:
+        """
+        Measure the latency, i.e. the time to first byte, of an attempt when its response headers arrive.
+        :param reply: QNetworkReply
+        """
+        context: Optional[dict[str, Any]] = self.attempts.get(reply)
+        if context is None or "headers" in context:
+            return
+        context["headers"] = context["active"] = time.monotonic()
+        if not reply.attribute(QNetworkRequest.SourceIsFromCacheAttribute):
+            latency: float = (context["headers"] - context["sent"]) * 1000
+            get_network_estimator().record_latency(reply.url().host(), latency)
+            get_endpoint_selector().record_latency(reply.request().url(), latency)
+            get_connection_warmer().record_ttfb(reply.request().url(), latency)
+
+    def on_attempt_finished(self, reply: QNetworkReply) -> None:
+        """
+        Log the result and the duration of an attempt, measure the throughput of its body,
+        and back off the timeouts of the host if it has timed out, rather than being aborted.
+        The result is reported to the endpoint selector unless the attempt was aborted or answered by the cache.
+        :param reply: QNetworkReply
+        """
+        context: dict[str, Any] = self.attempts[reply]
+        idle: float = (time.monotonic() - context.get("active", context["sent"])) * 1000
+        timed_out: bool = reply.error() == QNetworkReply.OperationCanceledError \
+            and idle >= reply.request().transferTimeout()
+        if (reply.error() != QNetworkReply.OperationCanceledError or timed_out) \
+                and not reply.attribute(QNetworkRequest.SourceIsFromCacheAttribute):
+            get_endpoint_selector().record_result(reply.request().url(), EndpointSelector.failed(reply))
+        if timed_out:
+            get_network_estimator().record_timeout(reply.request().url().host())
+        elif reply.error() == QNetworkReply.NoError and "headers" in context \
+                and not reply.attribute(QNetworkRequest.SourceIsFromCacheAttribute):
+            get_network_estimator().record_transfer(reply.url().host(), context.get("received", 0),
+                                                    (time.monotonic() - context["headers"]) * 1000)
+        self.logger.info("Attempt %d of %s '%s' finished in %.0f ms: %s",
+                         context["attempt"], context["operation"], context["request"].url().toString(),
+                         (time.monotonic() - context["sent"]) * 1000,
+                         "OK" if reply.error() == QNetworkReply.NoError else reply.errorString())
+
+    def retry_delay(self, reply: QNetworkReply) -> Optional[int]:
+        """
+        Get the delay before the request of a failed reply is sent again, it is decided once per reply.
+        :param reply: QNetworkReply
+        :return: the delay in ms, None if it is not sent again
+        """
+        context: Optional[dict[str, Any]] = self.attempts.get(reply)
+        if context is None or self.retry_policy is None or self.canceled or reply.error() == QNetworkReply.NoError:
+            return None
+        if "delay" not in context:
+            context["delay"] = self.retry_policy.delay_for(reply, context["attempt"],
+                                                           (time.monotonic() - context["first"]) * 1000)
+        return context["delay"]
+
+    def retry(self, reply: Optional[QNetworkReply] = None) -> bool:
+        """
+        Send the request of a failed reply again if its error is transient and the retry policy allows it.
+        The stream of the reply must be finished first, so a resumable download continues where it stopped.
+        :param reply: the failed reply, 'reply' of the downloader is used if it is None
+        :return: bool, whether the request will be sent again, the caller should stop handling the reply then
+        """
+        reply = reply or self.reply
+        delay: Optional[int] = self.retry_delay(reply)
+        if delay is None:
+            return False
+        context: dict[str, Any] = self.attempts.pop(reply)
+        self.logger.warning("Retry %s '%s' in %d ms, attempt %d failed: %s",
+                            context["operation"], context["request"].url().toString(), delay,
+                            context["attempt"], reply.errorString())
+        QTimer.singleShot(delay, self, lambda: self.send(context["operation"], context["request"], context["started"],
+                                                         context["priority"], context["attempt"] + 1,
+                                                         context["first"]))
+        reply.deleteLater()
+        return True
+
+    def done(self) -> None:
+        """
+        The task is over, delete the downloader when the control returns to the event loop.
+        """
+        self.deleteLater()
+
+    @staticmethod
+    def on_destroyed(name: str) -> None:
+        """
+        Stop counting a deleted downloader.
+        :param name: the class name of the downloader
+        """
+        live[name] -= 1
+        if not live[name]:
+            del live[name]
+
+    def cancel(self) -> None:
+        """
+        Give up the request, e.g. when a newer one supersedes it, the abort is not reported as an error.
+        """
+        self.canceled = True
+        if self.reply is not None and get_request_registry().in_flight(self.reply):
+            self.logger.info("Abort the superseded request to '%s'", self.reply.request().url().toString())
+            self.reply.abort()
 
     def run(self, reply: QNetworkReply) -> None:
         """
@@ -30,6 +270,90 @@ class Downloader(QObject):
         self.reply.requestSent.connect(self.on_request_sent)
         self.reply.errorOccurred.connect(self.on_error)
 
+    def resume(self, path: str) -> None:
+        """
+        Enable the resumable mode, must be called before 'get'.
+        The body is streamed into '<path>.part' and moved onto the path when it is complete.
+        :param path: the saving path
+        """
+        self.partial: PartialDownload = PartialDownload(path)
+        self.save_path: str = path
+
+    def stream(self, path: str = "") -> None:
+        """
+        Enable the streaming mode, must be called right after 'run'.
+        :param path: the saving path, 'stream_path' is asked for it when it is empty.
+        """
+        if path:
+            self.save_path: str = path
+        self.reply.setReadBufferSize(READ_BUFFER_SIZE)
+        self.reply.readyRead.connect(self.on_ready_read)
+
+    def stream_path(self) -> str:
+        """
+        Get the path the reply body is streamed into.
+        Subclasses can override it when the path depends on the (redirected) reply url.
+        :return: file path
+        """
+        return self.save_path
+
+    @Slot()
+    def on_ready_read(self) -> None:
+        """
+        Move the buffered chunk of the reply body into the save file.
+        The file is opened on the first chunk, when the final url of the reply is known.
+        """
+        if self.reply is None:
+            return
+        status: Any = self.reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        if status is not None and not 200 <= status < 300:  # redirects and error pages are not images
+            return
+        if self.reply.error() != QNetworkReply.NoError and self.partial is None:  # it is discarded anyway
+            return
+        if self.save_file is None:
+            path: str = self.stream_path()
+            if self.partial is not None:
+                opened: bool = self.partial.open(self.reply)
+                self.save_file: PartialDownload = self.partial
+            else:
+                self.save_file: QSaveFile = QSaveFile(path)
+                opened: bool = self.save_file.open(QIODevice.WriteOnly)
+            if not opened:
+                self.show_message("Can not open file when trying to save an image.")
+                self.logger.error("Can not open file '%s' when trying to save an image", path)
+                self.reply.abort()
+                return
+            self.logger.info("Open and stream an image into '%s'", path)
+        if self.save_file.write(self.reply.readAll()) == -1:  # if an error occurred
+            self.show_message("Failed to save an image.")
+            self.logger.error("Failed to write an image into '%s'", self.stream_path())
+            self.reply.abort()
+
+    def finish_stream(self) -> bool:
+        """
+        Write the rest of the reply body and commit the save file.
+        If the reply or a write failed, the target is left untouched:
+        the partial file is discarded, or kept for the next request in the resumable mode.
+        :return: bool, whether the target has been replaced
+        """
+        res: bool = False
+        if self.reply.error() == QNetworkReply.NoError or self.partial is not None:
+            self.on_ready_read()  # bytes received before an error are still worth keeping for resuming
+        if isinstance(self.save_file, QSaveFile):
+            if self.reply.error() != QNetworkReply.NoError:
+                self.logger.warning("Discard the partial file of '%s'", self.save_file.fileName())
+                self.save_file.cancelWriting()
+            res: bool = self.save_file.commit()
+        elif self.partial is not None:
+            if self.reply.error() == QNetworkReply.NoError and self.save_file is not None:
+                res: bool = self.partial.commit()
+            elif self.reply.attribute(QNetworkRequest.HttpStatusCodeAttribute) == 416:  # range not satisfiable
+                self.partial.discard()
+            else:
+                self.partial.suspend()
+        self.save_file = None
+        return res
+
     @Slot()
     def on_request_sent(self) -> None:
         """
@@ -41,10 +365,16 @@ class Downloader(QObject):
     @Slot(QNetworkReply.NetworkError)
     def on_error(self, code: QNetworkReply.NetworkError) -> None:
         """
-        Handle error messages.
+        Handle error messages, a request aborted by a newer one or about to be retried is not an error.
         :param code: QNetworkReply.NetworkError Code.
         """
-        if self.reply:
+        if self.reply and self.canceled:
+            self.logger.info("The request to '%s' is superseded", self.reply.request().url().toString())
+            self.reply.deleteLater()
+        elif self.reply and self.retry_delay(self.reply) is not None:
+            self.logger.warning("Transient error of '%s': %s",
+                                self.reply.request().url().toString(), self.reply.errorString())
+        elif self.reply:
             error_message: str = self.reply.errorString()
             self.show_message(f"An error occured: '{error_message}'", 0)
             self.logger.error("QNetworkReply NetworkError - Code: %s, Content: %s", code, error_message)
@@ -71,8 +401,21 @@ class Downloader(QObject):
 
     def show_message(self, msg: str, timeout: int = 5000) -> None:
         """
-        Show some messages in the status bar of 'MainWindow' using its show_message() function.
+        Show some messages by the show_message() function of the parent,
+        in the status bar of 'MainWindow' or on the terminal of the CLI.
         :param msg: message string.
         :param timeout: default timeout is 5000 ms.
         """
         self.parent().show_message(msg, timeout)
+
+
+# the number of live downloaders of each class, it should go back to zero when the app is idle
+live: dict[str, int] = {}
+
+
+def live_downloaders() -> dict[str, int]:
+    """
+    Get the number of live downloaders of each class for diagnostics.
+    :return: dict: {class name: number}
+    """
+    return dict(live)
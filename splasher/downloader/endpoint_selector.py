@@ -0,0 +1,262 @@
+import logging
+import time
+from typing import Any, Optional
+
+from PySide6.QtCore import QObject, QUrl
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+
+from splasher.config import UNSPLASH, get_settings_arg, set_settings_arg
+
+from .network_estimator import get_network_estimator
+from .request_scheduler import Priority, get_request_scheduler
+
+# how long the measurements of an endpoint stay valid before it is raced again
+REEVALUATE_INTERVAL: float = 600  # 10min
+# the consecutive failures after which an endpoint is skipped, and for how long
+FAILURE_LIMIT: int = 2
+COOLDOWN: float = 60  # 1min
+# the weights of a new sample in the moving averages
+LATENCY_GAIN: float = 1 / 4
+FAILURE_GAIN: float = 1 / 4
+
+
+class EndpointSelector(QObject):
+    """
+    The EndpointSelector class routes image requests to the fastest healthy endpoint,
+    e.g. the original site or its mirror in mainland China:
+    1. every request to an endpoint reports its latency or its failure,
+       the moving averages of both rank the endpoints,
+    2. when a request is routed, the other endpoints whose measurements are missing or older than
+       'REEVALUATE_INTERVAL' are raced with a HEAD request for the same image,
+    3. an endpoint which fails 'FAILURE_LIMIT' times in a row is skipped for 'COOLDOWN' seconds,
+       the retries of a failed request are routed again, so the session fails over without a restart.
+    The best endpoint is saved as 'CNM' in the settings, the next launch starts with it.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None, endpoints: Optional[list[str]] = None) -> None:
+        """
+        :param parent: QObject
+        :param endpoints: the base urls which serve the same paths, the original site and its mirror if it is None
+        """
+        super().__init__(parent)
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.endpoints: list[str] = endpoints or [UNSPLASH["IMAGES"], UNSPLASH["IMAGES-MIRROR"]]
+        self.stats: dict[str, dict[str, float]] = {endpoint: {
+            "latency": 0.0, "failure_rate": 0.0, "failures": 0, "samples": 0, "measured": 0.0, "down_until": 0.0,
+        } for endpoint in self.endpoints}
+        self.probing: set[str] = set()  # endpoints with a race in flight
+        self.current: str = self.preferred()
+
+    def preferred(self) -> str:
+        """
+        Get the endpoint to start with before any measurement, the mirror if 'CNM' is set.
+        :return: the base url
+        """
+        _, is_cnm = get_settings_arg("CNM")
+        mirror: str = UNSPLASH["IMAGES-MIRROR"]
+        return mirror if is_cnm and mirror in self.endpoints else self.endpoints[0]
+
+    def endpoint_of(self, url: QUrl) -> Optional[str]:
+        """
+        Find the endpoint a url belongs to.
+        :param url: QUrl
+        :return: the base url, None if the url is not served by an endpoint
+        """
+        url_str: str = url.toString()
+        return next((endpoint for endpoint in self.endpoints if url_str.startswith(endpoint)), None)
+
+    def healthy(self, endpoint: str) -> bool:
+        """
+        Check whether an endpoint is not being skipped after failures.
+        :param endpoint: the base url
+        :return: bool
+        """
+        return self.stats[endpoint]["down_until"] <= time.monotonic()
+
+    def stale(self, endpoint: str) -> bool:
+        """
+        Check whether an endpoint should be raced again.
+        :param endpoint: the base url
+        :return: bool
+        """
+        stats: dict[str, float] = self.stats[endpoint]
+        return self.healthy(endpoint) and (not stats["samples"]
+                                           or time.monotonic() - stats["measured"] > REEVALUATE_INTERVAL
+                                           or stats["failures"] > 0)
+
+    def score(self, endpoint: str) -> float:
+        """
+        Rank an endpoint, a lower score is better.
+        The latency is weighted by the failure rate, as a failed request costs at least another round trip.
+        :param endpoint: the base url
+        :return: the score
+        """
+        stats: dict[str, float] = self.stats[endpoint]
+        if not stats["samples"]:  # unmeasured: keep the current endpoint until the other one proves faster
+            return 0.0 if endpoint == self.current else float("inf")
+        return stats["latency"] * (1 + 4 * stats["failure_rate"])
+
+    def best(self) -> str:
+        """
+        Get the fastest healthy endpoint, or the one that comes back first if all of them are skipped.
+        :return: the base url
+        """
+        healthy: list[str] = [endpoint for endpoint in self.endpoints if self.healthy(endpoint)]
+        if healthy:
+            best: str = min(healthy, key=self.score)
+        else:
+            best: str = min(self.endpoints, key=lambda endpoint: self.stats[endpoint]["down_until"])
+        if best != self.current:
+            self.logger.info("Switch the image endpoint from '%s' to '%s'", self.current, best)
+            self.current = best
+            if UNSPLASH["IMAGES-MIRROR"] in self.endpoints:
+                set_settings_arg("CNM", best == UNSPLASH["IMAGES-MIRROR"])
+        return best
+
+    def route(self, path: str, manager: Optional[QNetworkAccessManager] = None) -> str:
+        """
+        Get the url of a path on the best endpoint, and race the stale endpoints with the same path.
+        :param path: the path after the base url, e.g. "photo-xxx?w=1920"
+        :param manager: the QNetworkAccessManager which sends the races, no race is started if it is None
+        :return: url string
+        """
+        endpoint: str = self.best()
+        if manager is not None:
+            for other in self.endpoints:
+                if other != endpoint and other not in self.probing and self.stale(other):
+                    self.race(manager, other, f"{other}{path}")
+        return f"{endpoint}{path}"
+
+    def reroute(self, request: QNetworkRequest) -> None:
+        """
+        Move a request to the best endpoint if it was routed to another one.
+        Range requests are left alone, their bytes must come from the same copy of the image.
+        :param request: QNetworkRequest
+        """
+        endpoint: Optional[str] = self.endpoint_of(request.url())
+        if endpoint is None or request.hasRawHeader("Range"):
+            return
+        best: str = self.best()
+        if best != endpoint:
+            request.setUrl(QUrl(best + request.url().toString()[len(endpoint):]))
+
+    def race(self, manager: QNetworkAccessManager, endpoint: str, url: str) -> None:
+        """
+        Measure an endpoint with a background HEAD request, it bypasses the HTTP cache.
+        :param manager: QNetworkAccessManager
+        :param endpoint: the base url
+        :param url: the url to probe
+        """
+        self.probing.add(endpoint)
+        request: QNetworkRequest = QNetworkRequest(QUrl(url))
+        request.setAttribute(QNetworkRequest.CacheLoadControlAttribute, QNetworkRequest.AlwaysNetwork)
+        request.setTransferTimeout(get_network_estimator().timeout(request.url().host(), 0))
+        get_request_scheduler().submit(manager, "HEAD", request, Priority.PREFETCH,
+                                       lambda reply: self.on_race_sent(endpoint, reply))
+
+    def on_race_sent(self, endpoint: str, reply: QNetworkReply) -> None:
+        """
+        Measure the race of an endpoint once it has been sent.
+        :param endpoint: the base url
+        :param reply: QNetworkReply
+        """
+        sent: float = time.monotonic()
+        self.logger.info("Race the image endpoint '%s'", endpoint)
+        reply.metaDataChanged.connect(lambda: self.on_race_headers(reply, sent))
+        reply.finished.connect(lambda: self.on_race_finished(endpoint, reply))
+
+    def on_race_headers(self, reply: QNetworkReply, sent: float) -> None:
+        """
+        Record the latency of a race when its response headers arrive.
+        :param reply: QNetworkReply
+        :param sent: when the race was sent, from time.monotonic()
+        """
+        if not reply.property("measured"):
+            reply.setProperty("measured", True)
+            self.record_latency(reply.request().url(), (time.monotonic() - sent) * 1000)
+
+    def on_race_finished(self, endpoint: str, reply: QNetworkReply) -> None:
+        """
+        Record the result of a race.
+        :param endpoint: the base url
+        :param reply: QNetworkReply
+        """
+        self.probing.discard(endpoint)
+        self.record_result(reply.request().url(), self.failed(reply))
+        reply.deleteLater()
+
+    @staticmethod
+    def failed(reply: QNetworkReply) -> bool:
+        """
+        Check whether a finished reply counts as a failure of its endpoint:
+        no response or a server error, a missing image is the answer of a working endpoint.
+        :param reply: QNetworkReply
+        :return: bool
+        """
+        status: Any = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        if status is not None:
+            return status >= 500
+        return reply.error() != QNetworkReply.NoError
+
+    def record_latency(self, url: QUrl, latency: float) -> None:
+        """
+        Add the time a request took to get its response headers.
+        :param url: the request url
+        :param latency: the time in ms
+        """
+        endpoint: Optional[str] = self.endpoint_of(url)
+        if endpoint is None:
+            return
+        stats: dict[str, float] = self.stats[endpoint]
+        stats["latency"] = latency if not stats["samples"] else \
+            stats["latency"] + LATENCY_GAIN * (latency - stats["latency"])
+        stats["samples"] += 1
+        stats["measured"] = time.monotonic()
+
+    def record_result(self, url: QUrl, failed: bool) -> None:
+        """
+        Add the result of a finished request.
+        :param url: the request url
+        :param failed: whether the endpoint failed, e.g. no response or a server error
+        """
+        endpoint: Optional[str] = self.endpoint_of(url)
+        if endpoint is None:
+            return
+        stats: dict[str, float] = self.stats[endpoint]
+        stats["failure_rate"] += FAILURE_GAIN * (failed - stats["failure_rate"])
+        stats["failures"] = stats["failures"] + 1 if failed else 0
+        if stats["failures"] >= FAILURE_LIMIT:
+            self.logger.warning("Skip the image endpoint '%s' for %d s after %d failures",
+                                endpoint, COOLDOWN, stats["failures"])
+            stats["down_until"] = time.monotonic() + COOLDOWN
+            stats["failures"] = 0
+
+    def report(self) -> dict[str, dict[str, float]]:
+        """
+        Get the measurements for diagnostics.
+        :return: dict: {endpoint: {"latency_ms", "failure_rate", "samples", "healthy"}}
+        """
+        return {
+            endpoint: {
+                "latency_ms": round(stats["latency"], 1),
+                "failure_rate": round(stats["failure_rate"], 2),
+                "samples": stats["samples"],
+                "healthy": self.healthy(endpoint),
+            }
+            for endpoint, stats in self.stats.items()
+        }
+
+
+# one selector shared by the whole process
+selector: Optional[EndpointSelector] = None
+
+
+def get_endpoint_selector() -> EndpointSelector:
+    """
+    Get the process-wide selector, create it on the first call.
+    :return: EndpointSelector
+    """
+    global selector  # pylint: disable=global-statement
+    if selector is None:
+        selector = EndpointSelector()
+    return selector
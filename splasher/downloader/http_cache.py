@@ -0,0 +1,115 @@
+import logging
+from typing import Optional
+
+from PySide6.QtCore import QObject, QUrl, Slot
+from PySide6.QtNetwork import QNetworkDiskCache, QNetworkReply, QNetworkRequest
+
+from splasher.config import PATH, get_settings_arg
+from splasher.config.args import SETTINGS
+
+
+class HttpCache(QNetworkDiskCache):
+    """
+    The HttpCache class is the HTTP disk cache of the QNetworkAccessManager (~/.cache/splasher/http/):
+    1. cacheable responses are kept up to 'HTTP_CACHE_MAX_BYTES', the oldest are expired first,
+    2. stale responses are revalidated with 'If-None-Match'/'If-Modified-Since' by Qt,
+       requests in the "prefer cache" mode use a cached response without asking the server,
+    3. every watched reply is counted as a hit or a miss.
+
+    Range requests are never answered from the cache,
+    so segmented and resumed downloads always go to the network.
+    The scaled variants of 'VariantBuilder' are stored and a re-choose of the same size prefers them,
+    the unscaled originals of a download are not stored, see 'no_store', they would push the variants out.
+    Random previews neither read nor write the cache, see 'bypass'.
+    """
+
+    def __init__(self,
+                 parent: Optional[QObject] = None,
+                 cache_path: str = f"{PATH['CACHE']}http/",
+                 max_bytes: Optional[int] = None) -> None:
+        """
+        :param parent: QObject
+        :param cache_path: the cache folder
+        :param max_bytes: the size limit, 'HTTP_CACHE_MAX_BYTES' in the settings is used if it is None
+        """
+        super().__init__(parent)
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        if max_bytes is None:
+            res, max_bytes = get_settings_arg("HTTP_CACHE_MAX_BYTES")
+            if not res:
+                max_bytes = SETTINGS["HTTP_CACHE_MAX_BYTES"]
+        self.setCacheDirectory(cache_path)
+        self.setMaximumCacheSize(max_bytes)
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def prefer_cache(self, request: QNetworkRequest) -> QNetworkRequest:
+        """
+        Answer the request from the cache without asking the server if a response is cached, even a stale one,
+        otherwise send it and revalidate as usual.
+        Qt still revalidates stale responses in its own 'PreferCache' mode, so 'AlwaysCache' is used for them.
+        :param request: QNetworkRequest
+        :return: the same request
+        """
+        request.setAttribute(QNetworkRequest.CacheLoadControlAttribute,
+                             QNetworkRequest.AlwaysCache if self.cached(request.url()) else QNetworkRequest.PreferCache)
+        return request
+
+    @staticmethod
+    def bypass(request: QNetworkRequest) -> QNetworkRequest:
+        """
+        Neither read nor write the cache, e.g. for random previews which must differ every time.
+        :param request: QNetworkRequest
+        :return: the same request
+        """
+        request.setAttribute(QNetworkRequest.CacheLoadControlAttribute, QNetworkRequest.AlwaysNetwork)
+        request.setAttribute(QNetworkRequest.CacheSaveControlAttribute, False)
+        return request
+
+    @staticmethod
+    def no_store(request: QNetworkRequest) -> QNetworkRequest:
+        """
+        Load from the network as usual but do not write the response into the cache, e.g. for the originals.
+        :param request: QNetworkRequest
+        :return: the same request
+        """
+        request.setAttribute(QNetworkRequest.CacheLoadControlAttribute, QNetworkRequest.PreferNetwork)
+        request.setAttribute(QNetworkRequest.CacheSaveControlAttribute, False)
+        return request
+
+    def cached(self, url: QUrl) -> bool:
+        """
+        Check whether a response of the url is in the cache.
+        :param url: QUrl
+        :return: bool
+        """
+        return self.metaData(url).isValid()
+
+    def watch(self, reply: QNetworkReply) -> None:
+        """
+        Count the reply as a hit or a miss when it finishes.
+        :param reply: QNetworkReply
+        """
+        reply.finished.connect(lambda: self.on_finished(reply))
+
+    @Slot()
+    def on_finished(self, reply: QNetworkReply) -> None:
+        """
+        A reply is a hit if its body comes from the cache, after a revalidation or without one.
+        :param reply: QNetworkReply
+        """
+        if reply.error() != QNetworkReply.NoError:
+            return
+        if reply.attribute(QNetworkRequest.SourceIsFromCacheAttribute):
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.logger.debug("HTTP cache of '%s': %d hits, %d misses, %d bytes",
+                          reply.url().toString(), self.hits, self.misses, self.cacheSize())
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the counters for diagnostics.
+        :return: dict: {"hits": int, "misses": int, "size": int}
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": self.cacheSize()}
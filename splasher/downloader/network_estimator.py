@@ -0,0 +1,137 @@
+import logging
+from typing import Optional
+
+from PySide6.QtCore import QObject
+
+# the timeout of a host without measurements, it is also the transfer timeout of the manager
+DEFAULT_TIMEOUT: int = 5000  # 5s
+# the bounds of the derived timeouts
+MIN_TIMEOUT: int = 2000  # 2s
+MAX_TIMEOUT: int = 30000  # 30s
+# the most bytes expected to arrive between two reads before a transfer counts as stalled
+STALL_BYTES: int = 64 * 1024  # 64KB
+# transfers smaller than this are dominated by the latency and say little about the throughput
+MIN_SAMPLE_BYTES: int = 16 * 1024  # 16KB
+# the weights of a new sample in the moving averages, as in the TCP retransmission timer (RFC 6298)
+LATENCY_GAIN: float = 1 / 8
+DEVIATION_GAIN: float = 1 / 4
+THROUGHPUT_GAIN: float = 1 / 4
+
+
+class NetworkEstimator(QObject):
+    """
+    The NetworkEstimator class keeps a rolling estimate of the latency and the throughput of each host,
+    so transfer timeouts follow the network instead of fixed constants:
+    1. the latency is the time from sending a request to its response headers,
+       its moving average and deviation are kept like the round-trip time of TCP,
+    2. the throughput is measured over the body of each large enough transfer,
+    3. the timeout of a request covers a late response and the slowest expected gap between two reads,
+       it doubles after each timeout of the host until the host answers again.
+    Responses from the HTTP cache are not measured.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        """
+        :param parent: QObject
+        """
+        super().__init__(parent)
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.hosts: dict[str, dict[str, float]] = {}  # {host: estimate}
+
+    def estimate(self, host: str) -> dict[str, float]:
+        """
+        Get the estimate of a host, create an empty one on the first call.
+        :param host: the host name
+        :return: dict: latency and deviation in ms, throughput in bytes/ms, samples and the timeout backoff
+        """
+        return self.hosts.setdefault(host, {
+            "latency": 0.0, "deviation": 0.0, "throughput": 0.0, "samples": 0, "backoff": 1,
+        })
+
+    def record_latency(self, host: str, latency: float) -> None:
+        """
+        Add the time a request took to get its response headers.
+        :param host: the host name
+        :param latency: the time in ms
+        """
+        estimate: dict[str, float] = self.estimate(host)
+        if estimate["samples"]:
+            estimate["deviation"] += DEVIATION_GAIN * (abs(latency - estimate["latency"]) - estimate["deviation"])
+            estimate["latency"] += LATENCY_GAIN * (latency - estimate["latency"])
+        else:
+            estimate["latency"], estimate["deviation"] = latency, latency / 2
+        estimate["samples"] += 1
+        estimate["backoff"] = 1
+
+    def record_transfer(self, host: str, size: int, duration: float) -> None:
+        """
+        Add a finished transfer of a response body.
+        :param host: the host name
+        :param size: the number of bytes received
+        :param duration: the time from the response headers to the end of the body in ms
+        """
+        if size < MIN_SAMPLE_BYTES or duration <= 0:
+            return
+        estimate: dict[str, float] = self.estimate(host)
+        throughput: float = size / duration
+        if estimate["throughput"]:
+            estimate["throughput"] += THROUGHPUT_GAIN * (throughput - estimate["throughput"])
+        else:
+            estimate["throughput"] = throughput
+        self.logger.debug("Throughput of '%s': %.0f KB/s", host, estimate["throughput"] * 1000 / 1024)
+
+    def record_timeout(self, host: str) -> None:
+        """
+        Double the next timeouts of a host whose request has timed out.
+        :param host: the host name
+        """
+        estimate: dict[str, float] = self.estimate(host)
+        estimate["backoff"] = min(estimate["backoff"] * 2, MAX_TIMEOUT // MIN_TIMEOUT)
+
+    def timeout(self, host: str, expected: Optional[int] = None) -> int:
+        """
+        Get the transfer timeout of a request, Qt aborts the request after this long without any data.
+        :param host: the host name
+        :param expected: the expected size of the response body, None if it is unknown, 0 for no body
+        :return: the timeout in ms
+        """
+        estimate: Optional[dict[str, float]] = self.hosts.get(host)
+        if estimate is None or not estimate["samples"]:
+            return DEFAULT_TIMEOUT * (estimate["backoff"] if estimate else 1)
+        timeout: float = estimate["latency"] + 4 * estimate["deviation"]
+        stall: int = STALL_BYTES if expected is None else min(expected, STALL_BYTES)
+        if stall and estimate["throughput"]:
+            timeout = max(timeout, stall / estimate["throughput"])
+        timeout *= estimate["backoff"]
+        return int(min(max(timeout, MIN_TIMEOUT), MAX_TIMEOUT))
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """
+        Get the estimates for diagnostics.
+        :return: dict: {host: {"latency_ms", "deviation_ms", "throughput_kbps", "samples", "timeout_ms"}}
+        """
+        return {
+            host: {
+                "latency_ms": round(estimate["latency"], 1),
+                "deviation_ms": round(estimate["deviation"], 1),
+                "throughput_kbps": round(estimate["throughput"] * 1000 / 1024, 1),
+                "samples": estimate["samples"],
+                "timeout_ms": self.timeout(host),
+            }
+            for host, estimate in self.hosts.items()
+        }
+
+
+# one estimator shared by the whole process
+estimator: Optional[NetworkEstimator] = None
+
+
+def get_network_estimator() -> NetworkEstimator:
+    """
+    Get the process-wide estimator, create it on the first call.
+    :return: NetworkEstimator
+    """
+    global estimator  # pylint: disable=global-statement
+    if estimator is None:
+        estimator = NetworkEstimator()
+    return estimator
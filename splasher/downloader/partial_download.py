@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import re
+from typing import Any, Optional
+
+from PySide6.QtCore import QByteArray, QFile, QFileInfo, QIODevice
+from PySide6.QtNetwork import QNetworkReply, QNetworkRequest
+
+
+def raw_header(reply: QNetworkReply, name: str) -> str:
+    """
+    Get a response header by its case-insensitive name.
+    :param reply: QNetworkReply
+    :param name: header name, e.g. "ETag"
+    :return: header value, empty if it does not exist
+    """
+    for key, value in reply.rawHeaderPairs():
+        if bytes(key.data()).decode("latin-1").lower() == name.lower():
+            return bytes(value.data()).decode("latin-1")
+    return ""
+
+
+class PartialDownload:
+    """
+    The PartialDownload class keeps an unfinished download next to its target, so it can be resumed later:
+    1. '<target>.part' holds the bytes received so far,
+    2. '<target>.part.json' holds the validators (url, ETag, Last-Modified, length) of the response,
+    3. a retry asks for the rest with 'Range' and 'If-Range' headers,
+       the server answers '206' to continue or '200' when the image has changed.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: the target path of the download
+        """
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.path: str = path
+        self.part_path: str = f"{path}.part"
+        self.meta_path: str = f"{path}.part.json"
+        self.file: QFile = QFile(self.part_path)
+        self.offset: int = 0
+        self.length: int = -1
+
+    def read_meta(self) -> Optional[dict[str, Any]]:
+        """
+        Read the validators of the partial file.
+        :return: dictionary | None
+        """
+        meta: QFile = QFile(self.meta_path)
+        res: Optional[dict[str, Any]] = None
+        if meta.open(QIODevice.ReadOnly | QIODevice.Text | QIODevice.ExistingOnly):
+            try:
+                res = json.loads(bytes(meta.readAll().data()).decode("utf-8"))
+            except json.JSONDecodeError:
+                self.logger.warning("'%s' is broken", self.meta_path)
+        meta.close()
+        return res
+
+    def write_meta(self, reply: QNetworkReply) -> bool:
+        """
+        Save the validators of a new '200' response.
+        :param reply: QNetworkReply
+        :return: bool
+        """
+        length: Any = reply.header(QNetworkRequest.ContentLengthHeader)
+        self.length = int(length) if length is not None else -1
+        meta_dict: dict[str, Any] = {
+            "url": reply.request().url().toString(),
+            "etag": raw_header(reply, "ETag"),
+            "last_modified": raw_header(reply, "Last-Modified"),
+            "length": self.length,
+        }
+        meta: QFile = QFile(self.meta_path)
+        res: bool = False
+        if meta.open(QIODevice.WriteOnly | QIODevice.Truncate | QIODevice.Text):
+            res = meta.write(json.dumps(meta_dict).encode("utf-8")) != -1
+        meta.close()
+        return res
+
+    def prepare(self, request: QNetworkRequest) -> QNetworkRequest:
+        """
+        Add 'Range' and 'If-Range' headers to the request if a matching partial file exists.
+        :param request: the request of the download
+        :return: the same request
+        """
+        request.setRawHeader(QByteArray(b"Accept-Encoding"), QByteArray(b"identity"))  # keep byte offsets stable
+        meta: Optional[dict[str, Any]] = self.read_meta()
+        part_size: int = QFileInfo(self.part_path).size() if QFile.exists(self.part_path) else 0
+        validator: str = (meta.get("etag") or meta.get("last_modified")) if meta else ""
+        if meta and meta.get("url") == request.url().toString() and validator and part_size > 0 \
+                and (meta.get("length", -1) < 0 or part_size < meta["length"]):
+            self.offset = part_size
+            self.length = meta.get("length", -1)
+            request.setRawHeader(QByteArray(b"Range"), QByteArray(f"bytes={part_size}-".encode("latin-1")))
+            request.setRawHeader(QByteArray(b"If-Range"), QByteArray(validator.encode("latin-1")))
+            self.logger.info("Resume '%s' from byte %d", self.path, part_size)
+        else:
+            self.offset = 0
+            self.discard()
+        return request
+
+    def open(self, reply: QNetworkReply) -> bool:
+        """
+        Open the partial file according to the response status,
+        append for '206' and start over for '200'.
+        :param reply: QNetworkReply
+        :return: bool
+        """
+        status: Any = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        if status == 206 and self.offset > 0:
+            content_range: str = raw_header(reply, "Content-Range")
+            matched: Optional[re.Match] = re.match(r"bytes (\d+)-\d+/(\d+|\*)", content_range)
+            if matched is None or int(matched.group(1)) != self.offset:
+                self.logger.error("Unexpected 'Content-Range' for '%s': '%s'", self.path, content_range)
+                return False
+            return self.file.open(QIODevice.WriteOnly | QIODevice.Append)
+        self.offset = 0
+        return self.write_meta(reply) and self.file.open(QIODevice.WriteOnly | QIODevice.Truncate)
+
+    def write(self, data: QByteArray) -> int:
+        """
+        Append data to the partial file.
+        :param data: a chunk of the response body
+        :return: the number of bytes written, -1 if an error occurred
+        """
+        return self.file.write(data)
+
+    def commit(self) -> bool:
+        """
+        Move the complete partial file onto its target.
+        A short file is kept for resuming, e.g. the connection was closed without an error,
+        a longer one or a file which can not be moved is discarded, it can never be resumed.
+        :return: bool
+        """
+        self.file.close()
+        size: int = QFileInfo(self.part_path).size()
+        if 0 <= self.length != size:
+            self.logger.error("The size of '%s' is %d, %d expected", self.part_path, size, self.length)
+            if size > self.length:
+                self.discard()
+            return False
+        try:
+            os.replace(self.part_path, self.path)  # atomic on the same filesystem
+        except OSError:
+            self.logger.exception("Failed to move '%s' to '%s'", self.part_path, self.path)
+            self.discard()
+            return False
+        QFile.remove(self.meta_path)
+        return True
+
+    def suspend(self) -> None:
+        """
+        Close the partial file and keep it, so the next attempt can continue from here.
+        """
+        if self.file.isOpen():
+            self.file.close()
+            self.logger.info("Keep %d bytes of '%s' for resuming", QFileInfo(self.part_path).size(), self.path)
+
+    def discard(self) -> None:
+        """
+        Remove the partial file and its validators.
+        """
+        self.file.close()
+        QFile.remove(self.part_path)
+        QFile.remove(self.meta_path)
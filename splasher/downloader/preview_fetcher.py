@@ -1,65 +1,110 @@
-from PySide6.QtCore import QFile, QIODevice, Slot
-from PySide6.QtNetwork import QNetworkReply
+from PySide6.QtCore import Signal, Slot
+from PySide6.QtNetwork import QNetworkReply, QNetworkRequest
 
 from splasher.config import PATH, set_settings_arg
 
+from .cache_manager import get_cache_manager
 from .downloader import Downloader
+from .http_cache import HttpCache
+from .request_registry import get_request_registry
+from .request_scheduler import Priority
 
 
 class PreviewFetcher(Downloader):
     """
     The PreviewFetcher class contains the following functions:
     1. Bind the reply to different handler functions.
-    2. Save the preview to cache and show it by updating widgets.
+    2. Stream the preview to cache and show it by updating widgets.
+    3. Prefetch a preview into the cache without showing it.
     """
 
-    def fetch_preview(self, reply: QNetworkReply) -> None:
+    fetched: Signal = Signal(str)  # the prefetched image, e.g. "unsplash/photo-xxx", empty if it failed
+    priority: Priority = Priority.PREVIEW
+
+    def fetch_preview(self, request: QNetworkRequest) -> None:
+        """
+        Send the request and bind the reply to the handler functions.
+        :param request: QNetworkRequest
+        """
+        get_request_registry().supersede("preview", self)  # a newer refresh replaces this one
+        self.get(HttpCache.bypass(request), self.on_preview_sent)
+
+    def on_preview_sent(self, reply: QNetworkReply) -> None:
         """
-        Receive the network reply and bind the reply to the handler functions.
+        Bind the reply of the preview to the handler functions.
         :param reply: QNetworkReply
         """
         super().run(reply)
+        self.stream()
         self.reply.finished.connect(self.on_finished)
 
-    @Slot()
-    def on_finished(self) -> None:
+    def prefetch(self, request: QNetworkRequest) -> None:
         """
-        Read the reply data and write the preview to the app cache folder.
-        The 'PREVIEW' argument in 'settings.json' will be modified and the QLabel in 'MainWindow' will be repainted.
+        Send the request in the background, the progress and errors are not shown in the status bar.
+        'fetched' is emitted when the reply finishes.
+        :param request: QNetworkRequest
+        """
+        self.get(HttpCache.bypass(request), self.on_prefetch_sent, Priority.PREFETCH)
+
+    def on_prefetch_sent(self, reply: QNetworkReply) -> None:
+        """
+        Bind the reply of the prefetched preview to the handler functions.
+        :param reply: QNetworkReply
+        """
+        self.reply = reply
+        self.reply.requestSent.connect(self.on_request_sent)
+        self.stream()
+        self.reply.finished.connect(self.on_prefetched)
+
+    def stream_path(self) -> str:
+        """
+        The preview is named after the redirected url.
 
         reply.url(): "https://images.unsplash.com/photo-123456789?xxx=xxx&xxx=..."
         reply.url().path(): "/photo-123456789"
-        reply.readAll(): binary data
+        :return: file path
+        """
+        img_id: str = self.reply.url().path()[1:]
+        return f"{PATH['CACHE']}{PATH['SUBFOLDER']}{img_id}.jpg"
+
+    @Slot()
+    def on_finished(self) -> None:
+        """
+        Finish writing the preview to the app cache folder.
+        The 'PREVIEW' argument in 'settings.json' will be modified and the QLabel in 'MainWindow' will be repainted,
+        unless a newer preview has been requested in the meantime.
+        A transient failure is retried.
         """
         if self.reply:
-            if self.reply.error() == QNetworkReply.NoError:
-                # ======== variables ========
+            if self.finish_stream():
                 img_id: str = self.reply.url().path()[1:]
-                subfolder: str = PATH["SUBFOLDER"]
-                img_fullpath: str = f"{PATH['CACHE']}{subfolder}{img_id}.jpg"
-                failed: bool = False
-                # ======== save the image ========
-                file: QFile = QFile(img_fullpath)
-                if file.open(QIODevice.WriteOnly | QIODevice.NewOnly):
-                    self.logger.info("Open and write an preview: '%s'", img_fullpath)
-                    if file.write(self.reply.readAll()) == -1:  # if an error occurred
-                        self.show_message("Failed to write a preview")
-                        self.logger.error("Failed to write a preview")
-                        failed: bool = True
+                if not get_request_registry().is_current("preview", self):
+                    self.logger.info("Skip the superseded preview '%s'", img_id)
+                    get_cache_manager().touch(f"{PATH['SUBFOLDER']}{img_id}.jpg")
+                elif set_settings_arg("PREVIEW",
+                                    f"{PATH['SUBFOLDER']}{img_id}"):  # write the preview name into 'settings.json'
+                    get_cache_manager().touch(f"{PATH['SUBFOLDER']}{img_id}.jpg")
+                    self.parent().set_preview()  # refresh and update an previw
                 else:
-                    self.show_message("Can not open file when trying to write a preview.")
-                    self.logger.error("Can not open file '%s' when trying to write a preview: '%s'", img_fullpath,
-                                      file.errorString())
-                    failed: bool = True
-                file.close()
-                # ======== modify 'settings.json' ========
-                if not failed:
-                    if set_settings_arg("PREVIEW",
-                                        f"{subfolder}{img_id}"):  # write the preview name into 'settings.json'
-                        self.parent().set_preview()  # refresh and update an previw
-                    else:
-                        self.logger.error("Failed to set the value of 'PREVIEW' from 'settings.json'")
-                else:
-                    self.logger.warning("Remove file: %s", img_fullpath)
-                    QFile.remove(img_fullpath)
+                    self.logger.error("Failed to set the value of 'PREVIEW' from 'settings.json'")
+            elif self.retry():
+                return
             self.reply.deleteLater()
+        self.done()
+
+    @Slot()
+    def on_prefetched(self) -> None:
+        """
+        Finish writing the prefetched preview to the app cache folder and pass on its name.
+        A transient failure is retried.
+        """
+        img_subpath: str = ""
+        if self.finish_stream():
+            img_subpath = f"{PATH['SUBFOLDER']}{self.reply.url().path()[1:]}"
+        elif self.retry():
+            return
+        else:
+            self.logger.warning("Failed to prefetch a preview: '%s'", self.reply.errorString())
+        self.reply.deleteLater()
+        self.fetched.emit(img_subpath)
+        self.done()
@@ -0,0 +1,161 @@
+import logging
+from collections import deque
+from typing import Optional
+
+from PySide6.QtCore import QObject, QSize, QTimer, QUrl, Slot
+from PySide6.QtGui import QImage
+from PySide6.QtNetwork import QNetworkInformation, QNetworkRequest
+
+from splasher.config import PATH, get_settings_arg
+from splasher.config.args import SETTINGS
+from splasher.image import PreviewDecoder
+
+from .cache_manager import get_cache_manager
+from .preview_fetcher import PreviewFetcher
+
+# how long to wait before refilling again after a prefetch failed
+RETRY_INTERVAL: int = 30000  # 30s
+
+
+class PreviewPrefetcher(QObject):
+    """
+    The PreviewPrefetcher class keeps previews ready to be shown, so refreshing does not wait for the network:
+    1. up to 'PREFETCH_COUNT' previews are fetched into the cache by 'PreviewFetcher' and decoded in the background,
+    2. at most 'PREFETCH_MAX_IN_FLIGHT' previews are fetched at the same time,
+       only one on a metered network and none while the network is disconnected,
+    3. prefetched images are pinned in the cache until they are taken.
+    """
+
+    def __init__(self,
+                 parent: QObject,
+                 url: str,
+                 size: QSize,
+                 count: Optional[int] = None,
+                 max_in_flight: Optional[int] = None) -> None:
+        """
+        :param parent: MainWindow, the parent of the fetchers
+        :param url: the url of a random preview
+        :param size: the size previews are decoded to, in device pixels
+        :param count: the number of ready previews, 'PREFETCH_COUNT' in the settings is used if it is None
+        :param max_in_flight: the number of concurrent fetches, 'PREFETCH_MAX_IN_FLIGHT' is used if it is None
+        """
+        super().__init__(parent)
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.url: str = url
+        self.size: QSize = size
+        self.count: Optional[int] = count
+        self.max_in_flight: Optional[int] = max_in_flight
+        self.queue: deque[tuple[str, QImage]] = deque()  # (image name, decoded image), e.g. "unsplash/photo-xxx"
+        self.decoding: dict[str, str] = {}  # {image path: image name}
+        self.in_flight: int = 0
+        self.decoder: PreviewDecoder = PreviewDecoder(self, latest_only=False)
+        self.decoder.ready.connect(self.on_decoded)  # pylint: disable=no-member
+        self.decoder.failed.connect(self.on_decode_failed)  # pylint: disable=no-member
+        self.retry_timer: QTimer = QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.setInterval(RETRY_INTERVAL)
+        self.retry_timer.timeout.connect(self.refill)  # pylint: disable=no-member
+        # ======== refill when the network comes back ========
+        if QNetworkInformation.instance() is None:
+            QNetworkInformation.loadDefaultBackend()
+        self.network: Optional[QNetworkInformation] = QNetworkInformation.instance()
+        if self.network is not None:
+            self.network.reachabilityChanged.connect(self.refill)  # pylint: disable=no-member
+            self.network.isMeteredChanged.connect(self.refill)  # pylint: disable=no-member
+
+    def limits(self) -> tuple[int, int]:
+        """
+        Get the number of ready previews to keep and the number of concurrent fetches allowed right now.
+        :return: tuple: (count, max in flight)
+        """
+        limits: list[int] = []
+        for key, value in (("PREFETCH_COUNT", self.count), ("PREFETCH_MAX_IN_FLIGHT", self.max_in_flight)):
+            if value is None:
+                res, value = get_settings_arg(key)
+                if not res:
+                    value = SETTINGS[key]
+            limits.append(value)
+        count, max_in_flight = limits
+        if self.network is not None:
+            if self.network.reachability() == QNetworkInformation.Reachability.Disconnected:
+                max_in_flight = 0
+            elif self.network.isMetered():
+                count, max_in_flight = min(count, 1), min(max_in_flight, 1)
+        return count, max_in_flight
+
+    @Slot()
+    def refill(self) -> None:
+        """
+        Start fetching previews until the queue will be full or the concurrency limit is reached.
+        """
+        count, max_in_flight = self.limits()
+        while self.in_flight < max_in_flight and len(self.queue) + len(self.decoding) + self.in_flight < count:
+            self.in_flight += 1
+            fetcher: PreviewFetcher = PreviewFetcher(self.parent())
+            fetcher.fetched.connect(self.on_fetched)  # pylint: disable=no-member
+            fetcher.prefetch(QNetworkRequest(QUrl(self.url)))
+        self.logger.debug("Prefetch queue: %d ready, %d decoding, %d in flight",
+                          len(self.queue), len(self.decoding), self.in_flight)
+
+    def take(self) -> Optional[tuple[str, QImage]]:
+        """
+        Take the oldest ready preview and refill the queue.
+        :return: tuple: (image name, decoded image), None if no preview is ready
+        """
+        item: Optional[tuple[str, QImage]] = self.queue.popleft() if self.queue else None
+        if item is not None:
+            get_cache_manager().unpin(f"{item[0]}.jpg")
+        self.refill()
+        return item
+
+    def known(self, img_subpath: str) -> bool:
+        """
+        Check whether a preview is already shown, queued or being decoded,
+        the random url may return the same image twice.
+        :param img_subpath: the image name, e.g. "unsplash/photo-xxx"
+        :return: bool
+        """
+        _, preview = get_settings_arg("PREVIEW")
+        return img_subpath == preview \
+            or img_subpath in self.decoding.values() \
+            or any(img_subpath == name for name, _ in self.queue)
+
+    @Slot(str)
+    def on_fetched(self, img_subpath: str) -> None:
+        """
+        Decode a fetched preview, or retry later if the fetch failed.
+        :param img_subpath: the image name, empty if the fetch failed
+        """
+        self.in_flight -= 1
+        if not img_subpath or self.known(img_subpath):
+            self.retry_timer.start()
+            return
+        get_cache_manager().pin(f"{img_subpath}.jpg")
+        get_cache_manager().touch(f"{img_subpath}.jpg")
+        img_path: str = f"{PATH['CACHE']}{img_subpath}.jpg"
+        self.decoding[img_path] = img_subpath
+        self.decoder.decode(img_path, self.size)
+        self.refill()
+
+    @Slot(str, QImage)
+    def on_decoded(self, img_path: str, image: QImage) -> None:
+        """
+        Put a decoded preview into the queue.
+        :param img_path: the image path
+        :param image: the decoded image
+        """
+        img_subpath: Optional[str] = self.decoding.pop(img_path, None)
+        if img_subpath is not None:
+            self.queue.append((img_subpath, image))
+            self.logger.info("Preview '%s' is ready", img_subpath)
+
+    @Slot(str)
+    def on_decode_failed(self, img_path: str) -> None:
+        """
+        Forget a preview that can not be decoded and retry later.
+        :param img_path: the image path
+        """
+        img_subpath: Optional[str] = self.decoding.pop(img_path, None)
+        if img_subpath is not None:
+            get_cache_manager().unpin(f"{img_subpath}.jpg")
+            self.retry_timer.start()
@@ -0,0 +1,124 @@
+import logging
+from typing import Optional
+
+from PySide6.QtCore import QObject
+from PySide6.QtNetwork import QNetworkReply
+
+
+class RequestRegistry(QObject):
+    """
+    The RequestRegistry class keeps track of the requests in flight, so work is neither repeated nor wasted:
+    1. requests are recorded under a key, e.g. the file they are saved to, a busy key should not be requested again,
+    2. the newest downloader of a group, e.g. "preview", supersedes the older one, which is canceled,
+       so only the result of the newest request is applied.
+    A request counts as in flight from the moment it is queued in the scheduler until its reply finishes.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        """
+        :param parent: QObject
+        """
+        super().__init__(parent)
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.queued: dict[str, int] = {}  # {key: number of requests waiting in the scheduler}
+        self.replies: dict[str, list[QNetworkReply]] = {}  # {key: replies in flight}
+        self.newest: dict[str, QObject] = {}  # {group: the newest downloader}
+
+    def reserve(self, key: str) -> None:
+        """
+        Record a request which is waiting to be sent.
+        :param key: what the request is for, e.g. the saving path or the url
+        """
+        self.queued[key] = self.queued.get(key, 0) + 1
+
+    def track(self, key: str, reply: QNetworkReply) -> None:
+        """
+        Record the reply of a reserved request until it finishes.
+        :param key: the key of the request
+        :param reply: QNetworkReply
+        """
+        self.queued[key] -= 1
+        if not self.queued[key]:
+            del self.queued[key]
+        self.replies.setdefault(key, []).append(reply)
+        reply.finished.connect(lambda: self.untrack(key, reply))
+
+    def untrack(self, key: str, reply: QNetworkReply) -> None:
+        """
+        Forget a finished reply.
+        :param key: the key of the reply
+        :param reply: QNetworkReply
+        """
+        replies: list[QNetworkReply] = self.replies.get(key, [])
+        if reply in replies:
+            replies.remove(reply)
+        if not replies:
+            self.replies.pop(key, None)
+
+    def busy(self, key: str) -> bool:
+        """
+        Check whether a request of the key is queued or in flight.
+        :param key: the key of the requests
+        :return: bool
+        """
+        return key in self.queued or key in self.replies
+
+    def in_flight(self, reply: QNetworkReply) -> bool:
+        """
+        Check whether a reply is tracked and has not finished.
+        :param reply: QNetworkReply
+        :return: bool
+        """
+        return any(reply in replies for replies in self.replies.values())
+
+    def supersede(self, group: str, downloader: QObject) -> None:
+        """
+        Make the downloader the newest of its group and cancel the previous one.
+        :param group: the group name, e.g. "preview"
+        :param downloader: Downloader
+        """
+        self.cancel(group)
+        self.newest[group] = downloader
+        downloader.destroyed.connect(lambda: self.forget(group, downloader))  # pylint: disable=no-member
+
+    def forget(self, group: str, downloader: QObject) -> None:
+        """
+        Forget a deleted downloader if it is still the newest of its group.
+        :param group: the group name
+        :param downloader: Downloader
+        """
+        if self.newest.get(group) is downloader:
+            del self.newest[group]
+
+    def cancel(self, group: str) -> None:
+        """
+        Cancel the newest downloader of a group, e.g. when its result is not wanted anymore.
+        :param group: the group name
+        """
+        downloader: Optional[QObject] = self.newest.pop(group, None)
+        if downloader is not None:
+            downloader.cancel()
+
+    def is_current(self, group: str, downloader: QObject) -> bool:
+        """
+        Check whether the downloader is the newest of its group, only its result should be applied.
+        :param group: the group name
+        :param downloader: Downloader
+        :return: bool
+        """
+        return self.newest.get(group) is downloader
+
+
+# one registry shared by the whole process
+registry: Optional[RequestRegistry] = None
+
+
+def get_request_registry() -> RequestRegistry:
+    """
+    Get the process-wide registry, create it on the first call.
+    :return: RequestRegistry
+    """
+    global registry  # pylint: disable=global-statement
+    if registry is None:
+        registry = RequestRegistry()
+    return registry
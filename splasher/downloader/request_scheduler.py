@@ -0,0 +1,178 @@
+import logging
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Callable, Optional
+
+from PySide6.QtCore import QObject
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+
+
+class Priority(IntEnum):
+    """
+    The scheduling classes of requests, a lower value is served first.
+    """
+    PREVIEW = 0  # the preview the user is waiting for
+    APPLY = 1  # the image being set as the wallpaper
+    DOWNLOAD = 2  # the image being saved for the user
+    PREFETCH = 3  # background work, e.g. prefetched previews
+
+
+# the priority Qt gives to a request on its connections to a host
+REQUEST_PRIORITIES: dict[Priority, QNetworkRequest.Priority] = {
+    Priority.PREVIEW: QNetworkRequest.HighPriority,
+    Priority.APPLY: QNetworkRequest.HighPriority,
+    Priority.DOWNLOAD: QNetworkRequest.NormalPriority,
+    Priority.PREFETCH: QNetworkRequest.LowPriority,
+}
+# the most requests running to one host while a request of the class is started,
+# lower classes leave connections free for the higher ones (Qt opens up to 6 connections per host)
+HOST_LIMITS: dict[Priority, int] = {
+    Priority.PREVIEW: 6,
+    Priority.APPLY: 6,
+    Priority.DOWNLOAD: 4,
+    Priority.PREFETCH: 2,
+}
+
+
+class RequestScheduler(QObject):
+    """
+    The RequestScheduler class decides when the requests of all downloaders are sent:
+    1. requests are queued by their class, a higher class is always started first,
+    2. each class may only start a request while its host has fewer running requests than 'HOST_LIMITS' allows,
+    3. the queue depth and the waiting time of each class are recorded for diagnostics.
+    Every request allows HTTP/2, Qt reuses the connections to a host itself.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None, limits: Optional[dict[Priority, int]] = None) -> None:
+        """
+        :param parent: QObject
+        :param limits: the per host limits of the classes, 'HOST_LIMITS' is used if it is None
+        """
+        super().__init__(parent)
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.limits: dict[Priority, int] = limits or HOST_LIMITS
+        self.queues: dict[Priority, deque[dict[str, Any]]] = {priority: deque() for priority in Priority}
+        self.running: dict[str, int] = {}  # {host: number of running requests}
+        self.counters: dict[Priority, dict[str, float]] = {
+            priority: {"sent": 0, "max_queued": 0, "wait_ms": 0.0, "max_wait_ms": 0.0} for priority in Priority
+        }
+        self.dispatching: bool = False
+        self.redispatch: bool = False
+
+    def submit(self,
+               manager: QNetworkAccessManager,
+               operation: str,
+               request: QNetworkRequest,
+               priority: Priority,
+               started: Callable[[QNetworkReply], None]) -> None:
+        """
+        Queue a request, it is sent as soon as its class and host allow.
+        :param manager: the QNetworkAccessManager which sends the request
+        :param operation: "GET" or "HEAD"
+        :param request: QNetworkRequest
+        :param priority: the class of the request
+        :param started: called with the reply once the request has been sent
+        """
+        request.setPriority(REQUEST_PRIORITIES[priority])
+        # multiplex the requests to a host over HTTP/2 where possible, Qt keeps HTTP/1.1 connections alive itself
+        request.setAttribute(QNetworkRequest.Http2AllowedAttribute, True)
+        queue: deque[dict[str, Any]] = self.queues[priority]
+        queue.append({
+            "manager": manager,
+            "operation": operation,
+            "request": request,
+            "started": started,
+            "queued_at": time.monotonic(),
+        })
+        counters: dict[str, float] = self.counters[priority]
+        counters["max_queued"] = max(counters["max_queued"], len(queue))
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        """
+        Start the queued requests which are allowed to run, from the highest class to the lowest.
+        """
+        if self.dispatching:  # called again by a 'started' callback
+            self.redispatch = True
+            return
+        self.dispatching = True
+        try:
+            self.redispatch = True
+            while self.redispatch:
+                self.redispatch = False
+                for priority in Priority:
+                    waiting: deque[dict[str, Any]] = deque()
+                    queue: deque[dict[str, Any]] = self.queues[priority]
+                    while queue:
+                        job: dict[str, Any] = queue.popleft()
+                        if self.running.get(job["request"].url().host(), 0) < self.limits[priority]:
+                            self.start(priority, job)
+                        else:
+                            waiting.append(job)
+                    queue.extend(waiting)
+        finally:
+            self.dispatching = False
+
+    def start(self, priority: Priority, job: dict[str, Any]) -> None:
+        """
+        Send a queued request and count it as running until it finishes.
+        :param priority: the class of the request
+        :param job: the queued request
+        """
+        request: QNetworkRequest = job["request"]
+        host: str = request.url().host()
+        self.running[host] = self.running.get(host, 0) + 1
+        wait_ms: float = (time.monotonic() - job["queued_at"]) * 1000
+        counters: dict[str, float] = self.counters[priority]
+        counters["sent"] += 1
+        counters["wait_ms"] += wait_ms
+        counters["max_wait_ms"] = max(counters["max_wait_ms"], wait_ms)
+        if wait_ms >= 1:
+            self.logger.debug("%s request to '%s' waited %.0f ms", priority.name, request.url().toString(), wait_ms)
+
+        manager: QNetworkAccessManager = job["manager"]
+        reply: QNetworkReply = manager.head(request) if job["operation"] == "HEAD" else manager.get(request)
+        reply.finished.connect(lambda: self.on_finished(host))
+        job["started"](reply)
+
+    def on_finished(self, host: str) -> None:
+        """
+        Free the slot of a finished request and start the next ones.
+        :param host: the host of the request
+        """
+        self.running[host] -= 1
+        if not self.running[host]:
+            del self.running[host]
+        self.dispatch()
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """
+        Get the queue depth and the waiting time of each class for diagnostics.
+        :return: dict: {class name: {"queued", "max_queued", "sent", "avg_wait_ms", "max_wait_ms"}}
+        """
+        return {
+            priority.name: {
+                "queued": len(self.queues[priority]),
+                "max_queued": counters["max_queued"],
+                "sent": counters["sent"],
+                "avg_wait_ms": counters["wait_ms"] / counters["sent"] if counters["sent"] else 0.0,
+                "max_wait_ms": counters["max_wait_ms"],
+            }
+            for priority, counters in self.counters.items()
+        }
+
+
+# one scheduler shared by the whole process
+scheduler: Optional[RequestScheduler] = None
+
+
+def get_request_scheduler() -> RequestScheduler:
+    """
+    Get the process-wide scheduler, create it on the first call.
+    :return: RequestScheduler
+    """
+    global scheduler  # pylint: disable=global-statement
+    if scheduler is None:
+        scheduler = RequestScheduler()
+    return scheduler
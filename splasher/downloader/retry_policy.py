@@ -0,0 +1,114 @@
+import random
+from typing import Any, Optional
+
+from PySide6.QtCore import QDateTime, Qt
+from PySide6.QtNetwork import QNetworkReply, QNetworkRequest
+
+from .partial_download import raw_header
+
+# network errors which may not happen again, e.g. a dropped connection or a transfer timeout
+RETRYABLE_ERRORS: set[QNetworkReply.NetworkError] = {
+    QNetworkReply.ConnectionRefusedError,
+    QNetworkReply.RemoteHostClosedError,
+    QNetworkReply.HostNotFoundError,
+    QNetworkReply.TimeoutError,
+    QNetworkReply.OperationCanceledError,  # a transfer timeout, requests aborted on purpose are not retried
+    QNetworkReply.TemporaryNetworkFailureError,
+    QNetworkReply.NetworkSessionFailedError,
+    QNetworkReply.UnknownNetworkError,
+    QNetworkReply.ProxyConnectionClosedError,
+    QNetworkReply.ProxyTimeoutError,
+}
+# HTTP status codes which ask the client to come back later
+RETRYABLE_STATUS: set[int] = {408, 429, 500, 502, 503, 504}
+
+
+class RetryPolicy:
+    """
+    The RetryPolicy class decides whether and when a failed request is sent again:
+    1. only transient network errors and HTTP status codes are retried,
+    2. the n-th retry waits about 'base_delay' * 2^(n-1) ms, at most 'max_delay' ms,
+       half of the delay is random, so clients do not come back at the same time,
+    3. a 'Retry-After' header of the server is honoured,
+    4. there are at most 'max_attempts' attempts, and no retry starts after 'budget' ms since the first attempt.
+    """
+
+    def __init__(self,
+                 max_attempts: int = 4,
+                 base_delay: int = 500,
+                 max_delay: int = 8000,
+                 budget: int = 30000) -> None:
+        """
+        :param max_attempts: the number of attempts, including the first one
+        :param base_delay: the delay before the first retry in ms
+        :param max_delay: the longest delay in ms
+        :param budget: the total time in ms a request may take, from its first attempt to the start of its last one
+        """
+        self.max_attempts: int = max_attempts
+        self.base_delay: int = base_delay
+        self.max_delay: int = max_delay
+        self.budget: int = budget
+
+    @staticmethod
+    def retryable(error: QNetworkReply.NetworkError, status: Optional[int]) -> bool:
+        """
+        Check whether a failure is transient.
+        :param error: the error of the reply
+        :param status: the HTTP status code, None if there is no response
+        :return: bool
+        """
+        if status is not None and status >= 400:
+            return status in RETRYABLE_STATUS
+        return error in RETRYABLE_ERRORS
+
+    @staticmethod
+    def retry_after(value: str) -> Optional[int]:
+        """
+        Parse a 'Retry-After' header, either seconds or an HTTP date.
+        :param value: the header value
+        :return: the delay in ms, None if there is no valid value
+        """
+        value = value.strip()
+        if value.isdigit():
+            return int(value) * 1000
+        date: QDateTime = QDateTime.fromString(value, Qt.RFC2822Date)
+        if date.isValid():
+            return max(QDateTime.currentDateTimeUtc().msecsTo(date), 0)
+        return None
+
+    def delay(self,
+              error: QNetworkReply.NetworkError,
+              status: Optional[int],
+              retry_after: str,
+              attempt: int,
+              elapsed: float) -> Optional[int]:
+        """
+        Get the delay before the next attempt.
+        :param error: the error of the failed attempt
+        :param status: the HTTP status code of the failed attempt, None if there is no response
+        :param retry_after: the 'Retry-After' header of the failed attempt, empty if there is none
+        :param attempt: the number of the failed attempt, starting from 1
+        :param elapsed: the time since the first attempt in ms
+        :return: the delay in ms, None if the request should not be sent again
+        """
+        if attempt >= self.max_attempts or not self.retryable(error, status):
+            return None
+        backoff: int = min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+        delay: int = backoff // 2 + random.randint(0, backoff // 2)
+        server_delay: Optional[int] = self.retry_after(retry_after) if retry_after else None
+        if server_delay is not None:
+            delay = max(delay, server_delay)
+        if elapsed + delay > self.budget:
+            return None
+        return delay
+
+    def delay_for(self, reply: QNetworkReply, attempt: int, elapsed: float) -> Optional[int]:
+        """
+        Get the delay before the next attempt of a failed reply.
+        :param reply: QNetworkReply
+        :param attempt: the number of the failed attempt, starting from 1
+        :param elapsed: the time since the first attempt in ms
+        :return: the delay in ms, None if the request should not be sent again
+        """
+        status: Any = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        return self.delay(reply.error(), status, raw_header(reply, "Retry-After"), attempt, elapsed)
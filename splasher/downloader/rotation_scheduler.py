@@ -0,0 +1,274 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+from PySide6.QtCore import SLOT, QObject, QSize, QTimer, QUrl, Signal, Slot
+from PySide6.QtDBus import QDBusConnection
+from PySide6.QtGui import QImage
+from PySide6.QtNetwork import QNetworkRequest
+
+from splasher.config import PATH, get_settings_arg, set_settings_arg
+from splasher.config.args import SETTINGS
+from splasher.image import PreviewDecoder
+
+from .cache_manager import get_cache_manager
+from .preview_fetcher import PreviewFetcher
+from .variant_builder import VariantBuilder
+from .wallpaper_setter import WallpaperSetter, shown
+
+# the longest time between two checks of the schedule, the timer does not run while the computer sleeps
+TICK: int = 60  # 1min
+# a check later than this shows that the computer has slept
+WAKE_GAP: int = 120  # 2min
+# how long to wait before preparing again after it failed
+RETRY_INTERVAL: int = 60000  # 1min
+# the size the next wallpaper is decoded to, decoding checks the image ahead of its slot
+CHECK_SIZE: QSize = QSize(320, 180)
+
+
+class RotationScheduler(QObject):
+    """
+    The RotationScheduler class changes the wallpaper on the schedule in the settings:
+    1. a rotation is due every 'ROTATION_INTERVAL' minutes, at the 'ROTATION_TIMES' of day,
+       and when the computer wakes up if 'ROTATION_ON_WAKE' is set,
+    2. the next wallpaper is fetched, sized for the screens and decoded right after a rotation,
+       so a slot only applies it and no request is on the critical path,
+    3. the slots missed while the computer slept or the app was closed are coalesced into one rotation,
+    4. the time of the last rotation and the prepared image are kept in the settings across restarts.
+    """
+
+    ready: Signal = Signal(str)  # the primary variant of the next wallpaper, emitted when it is prepared
+    failed: Signal = Signal()  # preparing the next wallpaper has failed, it is retried later
+
+    def __init__(self,
+                 parent: QObject,
+                 url: str,
+                 variants: Callable[[], list[dict[str, Any]]],
+                 clock: Callable[[], float] = time.time) -> None:
+        """
+        :param parent: MainWindow or another parent which provides 'manager' and 'show_message' to the downloaders
+        :param url: the url of a random image
+        :param variants: returns the variants of the screens, see 'screen_variants'
+        :param clock: returns the wall clock time in seconds, the timer is only a hint
+        """
+        super().__init__(parent)
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.url: str = url
+        self.variants: Callable[[], list[dict[str, Any]]] = variants
+        self.clock: Callable[[], float] = clock
+        self.prepared: Optional[list[tuple[str, str, list]]] = None  # the ready variants of the next wallpaper
+        self.checking: Optional[list[tuple[str, str, list]]] = None  # the variants being decoded
+        self.preparing: bool = False
+        self.due: bool = False  # a slot has arrived before the next wallpaper was ready
+        self.checked: float = 0  # when the schedule was last checked
+        self.expected: float = 0  # how long the timer was set for, in seconds
+        self.decoder: PreviewDecoder = PreviewDecoder(self)
+        self.decoder.ready.connect(self.on_decoded)  # pylint: disable=no-member
+        self.decoder.failed.connect(self.on_decode_failed)  # pylint: disable=no-member
+        self.timer: QTimer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.check)  # pylint: disable=no-member
+        self.retry_timer: QTimer = QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.setInterval(RETRY_INTERVAL)
+        self.retry_timer.timeout.connect(self.prepare)  # pylint: disable=no-member
+        # ======== logind announces when the computer wakes up ========
+        QDBusConnection.systemBus().connect("org.freedesktop.login1", "/org/freedesktop/login1",
+                                            "org.freedesktop.login1.Manager", "PrepareForSleep",
+                                            self, SLOT("on_prepare_for_sleep(bool)"))
+
+    @staticmethod
+    def setting(key: str) -> Any:
+        """
+        Get a value of the settings, the default if it can not be read.
+        :param key: the key
+        :return: the value
+        """
+        res, value = get_settings_arg(key)
+        return value if res else SETTINGS[key]
+
+    def next_slot(self, now: float) -> Optional[float]:
+        """
+        Get when the next rotation is due, a slot which has been missed is due now.
+        :param now: the wall clock time in seconds
+        :return: the time in seconds, None if nothing is scheduled
+        """
+        last: float = self.setting("ROTATION_LAST")
+        slots: list[float] = []
+        interval: float = self.setting("ROTATION_INTERVAL") * 60
+        if interval > 0:
+            slots.append(max(last + interval, now))
+        today: datetime = datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0)
+        for time_of_day in self.setting("ROTATION_TIMES"):
+            hour, minute = (int(part) for part in time_of_day.split(":"))
+            slot: datetime = today + timedelta(hours=hour, minutes=minute)
+            if slot.timestamp() > now:
+                slot -= timedelta(days=1)
+            # 'slot' is the latest occurrence, it is missed if nothing has rotated since
+            slots.append(now if 0 < last < slot.timestamp() else (slot + timedelta(days=1)).timestamp())
+        return min(slots) if slots else None
+
+    @Slot()
+    def start(self) -> None:
+        """
+        Start following the schedule and prepare the next wallpaper, the first schedule begins now.
+        """
+        self.logger.info("Start rotating the wallpaper")
+        self.checked = self.clock()
+        if not self.setting("ROTATION_LAST"):
+            set_settings_arg("ROTATION_LAST", self.checked)
+        self.prepare()
+        self.check()
+
+    @Slot()
+    def stop(self) -> None:
+        """
+        Stop following the schedule, the prepared wallpaper is kept for the next start.
+        """
+        self.timer.stop()
+        self.retry_timer.stop()
+        self.due = False
+
+    @Slot()
+    def check(self) -> None:
+        """
+        Rotate if a slot has arrived, then set the timer to the next slot, but no longer than 'TICK'.
+        A check much later than the timer was set for means the computer has slept.
+        """
+        now: float = self.clock()
+        if self.timer.interval() and now - self.checked > self.expected + WAKE_GAP:
+            self.on_wake()
+        self.checked = now
+        slot: Optional[float] = self.next_slot(now)
+        if slot is not None and slot <= now:
+            self.rotate()
+            slot = self.next_slot(self.clock())
+        if slot is None:
+            return
+        self.expected = min(max(slot - now, 1), TICK)
+        self.timer.start(round(self.expected * 1000))
+
+    @Slot(bool)
+    def on_prepare_for_sleep(self, sleeping: bool) -> None:
+        """
+        Handle logind going to sleep or waking up.
+        :param sleeping: False when the computer has woken up
+        """
+        if not sleeping:
+            self.on_wake()
+            self.check()
+
+    def on_wake(self) -> None:
+        """
+        Rotate after waking up if it is wanted, once even if both logind and the timer notice it.
+        """
+        self.logger.info("The computer has woken up")
+        if self.setting("ROTATION_ON_WAKE") and self.clock() - self.setting("ROTATION_LAST") > WAKE_GAP:
+            self.rotate()
+
+    def rotate(self) -> None:
+        """
+        Apply the prepared wallpaper, or apply it as soon as it is ready.
+        The slot is used up either way, so later checks do not rotate again for it.
+        """
+        set_settings_arg("ROTATION_LAST", self.clock())
+        if self.prepared is None:
+            self.logger.warning("The next wallpaper is not ready yet, apply it once it is")
+            self.due = True
+            self.prepare()
+            return
+        variants, self.prepared = self.prepared, None
+        self.logger.info("Rotate the wallpaper to '%s'", variants[0][1])
+        setter: WallpaperSetter = WallpaperSetter(self.parent())
+        setter.set_wallpapers(variants)
+        setter.done()
+        for _, img_name, _ in variants:
+            if f"{PATH['SUBFOLDER']}{img_name}" not in shown:  # the setter keeps those pinned
+                get_cache_manager().unpin(f"{PATH['SUBFOLDER']}{img_name}")
+        set_settings_arg("ROTATION_NEXT", "")
+        self.prepare()
+
+    @Slot()
+    def prepare(self) -> None:
+        """
+        Fetch a random image for the next rotation, unless one is prepared or being prepared.
+        An image prepared before a restart is reused from the cache.
+        """
+        if self.prepared is not None or self.preparing:
+            return
+        self.preparing = True
+        img_id: str = self.setting("ROTATION_NEXT")
+        if img_id:
+            self.on_fetched(f"{PATH['SUBFOLDER']}{img_id}")
+            return
+        fetcher: PreviewFetcher = PreviewFetcher(self.parent())
+        fetcher.fetched.connect(self.on_fetched)  # pylint: disable=no-member
+        fetcher.prefetch(QNetworkRequest(QUrl(self.url)))
+
+    def fail(self) -> None:
+        """
+        Prepare again later.
+        """
+        self.preparing = False
+        set_settings_arg("ROTATION_NEXT", "")
+        self.retry_timer.start()
+        self.failed.emit()
+
+    @Slot(str)
+    def on_fetched(self, img_subpath: str) -> None:
+        """
+        Size the fetched image for the screens.
+        :param img_subpath: the image name, e.g. "unsplash/photo-xxx", empty if the fetch failed
+        """
+        if not img_subpath:
+            self.fail()
+            return
+        img_id: str = img_subpath[len(PATH["SUBFOLDER"]):]
+        set_settings_arg("ROTATION_NEXT", img_id)
+        get_cache_manager().touch(f"{img_subpath}.jpg")
+        builder: VariantBuilder = VariantBuilder(self.parent(), img_id, self.variants(), apply=False)
+        builder.built.connect(self.on_built)  # pylint: disable=no-member
+        builder.build()
+
+    @Slot(list)
+    def on_built(self, variants: list[tuple[str, str, list]]) -> None:
+        """
+        Decode the primary variant, a broken image is found before its slot.
+        :param variants: the ready variants, empty if they could not be built
+        """
+        if not variants:
+            self.fail()
+            return
+        for _, img_name, _ in variants:
+            get_cache_manager().pin(f"{PATH['SUBFOLDER']}{img_name}")
+        self.checking = variants
+        self.decoder.decode(variants[0][0], CHECK_SIZE)
+
+    @Slot(str, QImage)
+    def on_decoded(self, img_path: str, image: QImage) -> None:  # pylint: disable=unused-argument
+        """
+        The next wallpaper is ready, apply it if its slot has already arrived.
+        :param img_path: the image path
+        :param image: the decoded image
+        """
+        self.prepared, self.checking = self.checking, None
+        self.preparing = False
+        self.logger.info("The next wallpaper '%s' is ready", img_path)
+        if self.due:
+            self.due = False
+            self.rotate()
+        else:
+            self.ready.emit(img_path)
+
+    @Slot(str)
+    def on_decode_failed(self, img_path: str) -> None:
+        """
+        Drop a broken wallpaper and prepare another one.
+        :param img_path: the image path
+        """
+        self.logger.error("The next wallpaper '%s' is broken", img_path)
+        for _, img_name, _ in self.checking or []:
+            get_cache_manager().unpin(f"{PATH['SUBFOLDER']}{img_name}")
+        self.checking = None
+        self.fail()
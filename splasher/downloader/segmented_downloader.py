@@ -0,0 +1,254 @@
+import os
+from typing import Any, Optional
+
+from PySide6.QtCore import QByteArray, QFile, QIODevice, QObject, QUrl, Signal, Slot
+from PySide6.QtNetwork import QNetworkReply, QNetworkRequest
+
+from .downloader import READ_BUFFER_SIZE, Downloader
+from .partial_download import raw_header
+
+# number of byte ranges fetched at the same time
+SEGMENTS: int = 4
+# smaller images are not worth the extra requests
+MIN_SEGMENTED_SIZE: int = 2 * 1024 * 1024  # 2MB
+
+
+class SegmentedDownloader(Downloader):
+    """
+    The SegmentedDownloader class downloads a large image over several connections:
+    1. a HEAD request checks 'Accept-Ranges' and 'Content-Length',
+    2. the image is split into 'SEGMENTS' byte ranges which are fetched at the same time,
+    3. each range is written at its offset of a preallocated '<path>.part' file,
+    4. the part file replaces the target when every range is complete.
+    It falls back to a single resumable stream if the server does not support ranges,
+    or a segment fails for good, e.g. a range is refused or runs out of retries.
+    """
+
+    # segment index, bytes received, bytes total of the segment
+    segment_progress: Signal = Signal(int, int, int)
+
+    def __init__(self, parent: QObject) -> None:
+        """
+        Create some variables that will be used later and initialize them.
+        :param parent: MainWindow or the headless parent of the CLI
+        """
+        super().__init__(parent)
+        self.request: Optional[QNetworkRequest] = None
+        self.length: int = 0
+        self.segments: list[dict[str, Any]] = []
+        self.failed: bool = False
+        self.single: bool = False  # whether the image is downloaded in a single stream
+
+    def fetch(self, request: QNetworkRequest, path: str) -> None:
+        """
+        Probe the server with a HEAD request, then choose the segmented or the single stream download.
+        A request answered by the HTTP cache skips the probe.
+        :param request: QNetworkRequest
+        :param path: the image saving path
+        """
+        self.request: QNetworkRequest = request
+        self.save_path: str = path
+        if request.attribute(QNetworkRequest.CacheLoadControlAttribute) == QNetworkRequest.AlwaysCache:
+            self.logger.info("Download '%s' from the HTTP cache", request.url().toString())
+            self.fetch_single()
+            return
+        self.head(QNetworkRequest(request), lambda head: head.finished.connect(lambda: self.on_head_finished(head)))
+
+    def on_head_finished(self, head: QNetworkReply) -> None:
+        """
+        Start the segmented download if the server supports ranges and the image is large enough.
+        :param head: the reply of the HEAD request
+        """
+        length: Any = head.header(QNetworkRequest.ContentLengthHeader)
+        ranges: bool = raw_header(head, "Accept-Ranges").lower() == "bytes"
+        url: QUrl = head.url()  # the redirected url, so the segments do not follow the redirect again
+        head.deleteLater()
+        if head.error() == QNetworkReply.NoError and ranges and length is not None \
+                and int(length) >= MIN_SEGMENTED_SIZE:
+            self.length = int(length)
+            self.start_segments(url)
+        else:
+            self.logger.info("Download '%s' in a single stream", self.request.url().toString())
+            self.fetch_single()
+
+    def fetch_single(self) -> None:
+        """
+        Download the image in a single resumable stream.
+        """
+        self.single = True
+        self.resume(self.save_path)
+        self.get(QNetworkRequest(self.request), self.on_single_sent)
+
+    def on_single_sent(self, reply: QNetworkReply) -> None:
+        """
+        Bind the reply of the single stream to the handler functions.
+        :param reply: QNetworkReply
+        """
+        self.run(reply)
+        self.stream()
+        self.reply.finished.connect(self.on_stream_finished)
+
+    @Slot()
+    def on_stream_finished(self) -> None:
+        """
+        Commit the single stream download, a transient failure is retried from where it stopped.
+        """
+        if self.reply:
+            if self.finish_stream():
+                self.on_saved()
+            elif self.retry():
+                return
+            self.reply.deleteLater()
+        self.done()
+
+    def start_segments(self, url: QUrl) -> None:
+        """
+        Preallocate the part file and send one range request per segment.
+        :param url: the image url
+        """
+        part_path: str = f"{self.save_path}.part"
+        part: QFile = QFile(part_path)
+        if not part.open(QIODevice.WriteOnly | QIODevice.Truncate) or not part.resize(self.length):
+            self.logger.error("Failed to preallocate '%s': %s", part_path, part.errorString())
+            part.close()
+            self.fetch_single()
+            return
+        part.close()
+
+        size: int = -(-self.length // SEGMENTS)  # ceil
+        self.logger.info("Download '%s' in %d segments", url.toString(), SEGMENTS)
+        for start in range(0, self.length, size):
+            end: int = min(start + size, self.length) - 1
+            file: QFile = QFile(part_path)
+            file.open(QIODevice.ReadWrite)
+            file.seek(start)
+            self.segments.append({"reply": None, "file": file, "start": start, "end": end, "kept": 0, "received": 0,
+                                  "done": False})
+        for index, segment in enumerate(self.segments):
+            request: QNetworkRequest = QNetworkRequest(self.request)
+            request.setUrl(url)
+            request.setRawHeader(QByteArray(b"Accept-Encoding"), QByteArray(b"identity"))
+            request.setRawHeader(QByteArray(b"Range"),
+                                 QByteArray(f"bytes={segment['start']}-{segment['end']}".encode("latin-1")))
+            self.get(request, lambda reply, i=index: self.on_segment_sent(i, reply))
+
+    def on_segment_sent(self, index: int, reply: QNetworkReply) -> None:
+        """
+        Bind the reply of a segment to the handler functions, a segment sent after a failure is aborted at once.
+        :param index: segment index
+        :param reply: QNetworkReply
+        """
+        segment: dict[str, Any] = self.segments[index]
+        segment["reply"] = reply
+        reply.setReadBufferSize(READ_BUFFER_SIZE)
+        reply.readyRead.connect(lambda: self.on_segment_ready_read(index))
+        reply.downloadProgress.connect(lambda received, total: self.on_segment_progress(index, received))
+        reply.finished.connect(lambda: self.on_segment_finished(index))
+        if self.failed:
+            reply.abort()
+
+    def on_segment_ready_read(self, index: int) -> None:
+        """
+        Write the buffered chunk of a segment at its position in the part file.
+        :param index: segment index
+        """
+        segment: dict[str, Any] = self.segments[index]
+        reply: QNetworkReply = segment["reply"]
+        status: Any = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        if self.failed or reply.error() != QNetworkReply.NoError or (status is not None and status >= 400):
+            return  # the error is handled when the segment finishes
+        if status != 206:
+            self.logger.warning("The server ignored the range of segment %d", index)
+            self.fall_back()
+            return
+        if segment["file"].write(reply.readAll()) == -1:
+            self.logger.error("Failed to write segment %d: %s", index, segment["file"].errorString())
+            self.fail()
+
+    def on_segment_progress(self, index: int, bytes_received: int) -> None:
+        """
+        Report the progress of a segment and of the whole image.
+        :param index: segment index
+        :param bytes_received: bytes received by the segment
+        """
+        segment: dict[str, Any] = self.segments[index]
+        segment["received"] = segment["kept"] + bytes_received
+        self.segment_progress.emit(index, bytes_received, segment["end"] - segment["start"] + 1)
+        self.on_progress(sum(s["received"] for s in self.segments), self.length)
+
+    def on_segment_finished(self, index: int) -> None:
+        """
+        Check a finished segment, commit the part file when all segments are done.
+        A segment with a transient failure is fetched again from its first missing byte,
+        any other failure restarts the download as a single stream.
+        :param index: segment index
+        """
+        segment: dict[str, Any] = self.segments[index]
+        reply: QNetworkReply = segment["reply"]
+        if not self.failed and reply.error() == QNetworkReply.NoError:
+            self.on_segment_ready_read(index)
+        elif not self.failed and segment["file"].pos() <= segment["end"] and self.retry_delay(reply) is not None:
+            self.resume_segment(index, reply)
+            self.retry(reply)
+            return
+        complete: bool = segment["file"].pos() == segment["end"] + 1
+        segment["file"].close()
+        segment["done"] = True
+        if not self.failed and (reply.error() != QNetworkReply.NoError or not complete):
+            self.logger.error("Segment %d failed: %s", index, reply.errorString())
+            self.fall_back()  # the single stream reports its own error if it fails as well
+        reply.deleteLater()
+
+        if not all(s["done"] for s in self.segments):
+            return
+        if not self.failed:
+            try:
+                os.replace(f"{self.save_path}.part", self.save_path)
+                self.on_saved()
+            except OSError:
+                self.logger.exception("Failed to move the part file onto '%s'", self.save_path)
+        if not self.single:  # otherwise the single stream is still running
+            self.done()
+
+    def resume_segment(self, index: int, reply: QNetworkReply) -> None:
+        """
+        Narrow the range of the next attempt of a failed segment to the bytes which are still missing,
+        the written ones are kept in the part file.
+        :param index: segment index
+        :param reply: the failed reply of the segment
+        """
+        segment: dict[str, Any] = self.segments[index]
+        offset: int = segment["file"].pos()
+        segment["kept"] = segment["received"] = offset - segment["start"]
+        self.attempts[reply]["request"].setRawHeader(QByteArray(b"Range"),
+                                                     QByteArray(f"bytes={offset}-{segment['end']}".encode("latin-1")))
+        self.logger.info("Resume segment %d from byte %d", index, offset)
+
+    def fall_back(self) -> None:
+        """
+        Abort all segments and download the image in a single stream instead, unless the download is canceled.
+        """
+        if self.canceled:
+            self.fail()
+            return
+        self.single = True  # so the last aborted segment does not delete the downloader
+        self.fail()
+        self.logger.info("Download '%s' in a single stream", self.request.url().toString())
+        self.fetch_single()
+
+    def fail(self) -> None:
+        """
+        Abort all segments and remove the part file.
+        """
+        self.failed = True
+        for segment in self.segments:
+            segment["file"].close()
+            if not segment["done"] and segment["reply"] is not None:
+                segment["reply"].abort()
+        QFile.remove(f"{self.save_path}.part")
+
+    def on_saved(self) -> None:
+        """
+        Called when the image has been saved into the path, subclasses can override it.
+        """
+        self.logger.info("Save '%s'", self.save_path)
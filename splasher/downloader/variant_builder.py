@@ -0,0 +1,176 @@
+import logging
+from math import ceil
+from typing import Any, Optional
+
+from PySide6.QtCore import QFileInfo, QObject, QSize, QUrl, Signal, Slot
+from PySide6.QtGui import QScreen
+from PySide6.QtNetwork import QAbstractNetworkCache, QNetworkRequest
+
+from splasher.config import PATH
+from splasher.image import ImageDeriver, get_size_prober
+
+from .endpoint_selector import get_endpoint_selector
+from .http_cache import HttpCache
+from .wallpaper_setter import WallpaperSetter
+
+# the arguments of a wallpaper url besides its size, see 'MainWindow.choose'
+URL_ARGS: str = "fit=crop&crop=faces,edges,entropy&fm=jpg&q=95&cs=srgb"
+
+
+def screen_variants(screens: list[QScreen]) -> list[dict[str, Any]]:
+    """
+    Group screens by the image they need, screens with the same size in device pixels share one variant.
+    Unsplash multiplies 'w' and 'h' by 'dpr', e.g. 1920x1080 at 2x and 3840x2160 at 1x need the same image.
+    :param screens: the screens, the primary screen first
+    :return: the variants in the order of their first screen,
+             [{"w": width, "h": height, "dpr": ratio, "size": QSize in device pixels, "screens": [QRect]}]
+    """
+    variants: dict[tuple[int, int], dict[str, Any]] = {}
+    for screen in screens:
+        width, height = screen.size().width(), screen.size().height()
+        ratio: int = min(ceil(screen.devicePixelRatio()), 5)  # default is 1 and the max is 5
+        key: tuple[int, int] = (width * ratio, height * ratio)
+        variant: dict[str, Any] = variants.setdefault(key, {
+            "w": width, "h": height, "dpr": ratio, "size": QSize(*key), "screens": [],
+        })
+        variant["screens"].append(screen.geometry())
+    return list(variants.values())
+
+
+class VariantBuilder(QObject):
+    """
+    The VariantBuilder class prepares the wallpaper of every screen from one photo, then sets them together:
+    1. every distinct screen size gets one variant, "<img_id>-<w>x<h>.jpg" in the cache,
+    2. a variant is taken from the cache if it exists, derived from a larger copy on the disk,
+       or downloaded from the fastest endpoint, the missing variants are built at the same time,
+    3. the variant of the primary screen is required, the screens of another failed variant show it as well,
+    4. the variants are set as the wallpaper, or only passed on by 'built' to be set later, e.g. by a rotation.
+    """
+
+    built: Signal = Signal(list)  # the ready variants for 'WallpaperSetter.set_wallpapers', empty if it failed
+
+    def __init__(self, parent: QObject, img_id: str, variants: list[dict[str, Any]], apply: bool = True) -> None:
+        """
+        :param parent: MainWindow or the headless parent of the CLI, the parent of the downloaders
+        :param img_id: the image id, e.g. "photo-xxx"
+        :param variants: the variants from 'screen_variants', the one of the primary screen first
+        :param apply: whether to set the variants as the wallpaper once they are ready
+        """
+        super().__init__(parent)
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.img_id: str = img_id
+        self.variants: list[dict[str, Any]] = variants
+        self.folder: str = f"{PATH['CACHE']}{PATH['SUBFOLDER']}"
+        self.apply: bool = apply
+        self.pending: dict[str, dict[str, Any]] = {}  # {target path: variant being built}
+        self.deriver: ImageDeriver = ImageDeriver(self)
+        self.deriver.ready.connect(self.on_derived)  # pylint: disable=no-member
+        self.deriver.failed.connect(self.on_derive_failed)  # pylint: disable=no-member
+
+    def target(self, variant: dict[str, Any]) -> str:
+        """
+        Get the path of a variant in the cache.
+        :param variant: the variant
+        :return: file path
+        """
+        return f"{self.folder}{self.img_id}-{variant['size'].width()}x{variant['size'].height()}.jpg"
+
+    def busy(self) -> bool:
+        """
+        Check whether a variant is being built by another builder.
+        :return: bool
+        """
+        return any(self.target(variant) in building for variant in self.variants)
+
+    def build(self) -> None:
+        """
+        Start building the missing variants, the wallpapers are set once all of them are over.
+        """
+        for variant in self.variants:
+            target: str = self.target(variant)
+            if get_size_prober().size(f"{self.folder}{self.img_id}.jpg") == variant["size"]:
+                variant["file"] = f"{self.folder}{self.img_id}.jpg"  # the cached image has the size already
+            elif get_size_prober().size(target) == variant["size"]:
+                variant["file"] = target
+            else:
+                self.pending[target] = variant
+                building.add(target)
+                source: Optional[str] = self.deriver.find_source([self.folder, PATH["BACKGROUND"]],
+                                                                 self.img_id, variant["size"])
+                if source is not None:
+                    self.deriver.derive(source, target, variant["size"])
+                else:
+                    self.download(variant)
+        self.logger.info("Build %d variants of '%s', %d of them are missing",
+                         len(self.variants), self.img_id, len(self.pending))
+        self.finish()
+
+    def download(self, variant: dict[str, Any]) -> None:
+        """
+        Download a variant from the fastest endpoint.
+        Please refer to the documentation for the construction of the url path:
+            https://unsplash.com/documentation#dynamically-resizable-images
+        :param variant: the variant
+        """
+        path: str = f"{self.img_id}?w={variant['w']}&h={variant['h']}&{URL_ARGS}&dpr={variant['dpr']}"
+        request: QNetworkRequest = QNetworkRequest(QUrl(get_endpoint_selector().route(path,
+                                                                                      self.parent().manager)))
+        cache: Optional[QAbstractNetworkCache] = self.parent().manager.cache()
+        setter: WallpaperSetter = WallpaperSetter(self.parent())
+        setter.fetched.connect(self.on_fetched)  # pylint: disable=no-member
+        setter.fetch_variant(cache.prefer_cache(request) if isinstance(cache, HttpCache) else request,
+                             self.target(variant))
+
+    @Slot(str)
+    def on_derived(self, target: str) -> None:
+        """
+        Use a derived variant.
+        :param target: the path of the variant
+        """
+        self.on_fetched(target, True)
+
+    @Slot(str)
+    def on_derive_failed(self, target: str) -> None:
+        """
+        Download a variant which can not be derived.
+        :param target: the path of the variant
+        """
+        self.logger.warning("Failed to derive '%s', download it instead", target)
+        self.download(self.pending[target])
+
+    @Slot(str, bool)
+    def on_fetched(self, target: str, res: bool) -> None:
+        """
+        Record a variant which is over, and set the wallpapers if it was the last one.
+        :param target: the path of the variant
+        :param res: whether the variant is ready
+        """
+        variant: Optional[dict[str, Any]] = self.pending.pop(target, None)
+        building.discard(target)
+        if variant is not None and res:
+            variant["file"] = target
+        self.finish()
+
+    def finish(self) -> None:
+        """
+        Set or pass on the ready variants once no variant is pending, then delete the builder.
+        """
+        if self.pending:
+            return
+        ready: list[tuple[str, str, list]] = [
+            (variant["file"], QFileInfo(variant["file"]).fileName(), variant["screens"])
+            for variant in self.variants if "file" in variant
+        ] if "file" in self.variants[0] else []
+        if not self.apply:
+            self.built.emit(ready)
+        elif ready:
+            setter: WallpaperSetter = WallpaperSetter(self.parent())
+            setter.set_wallpapers(ready)
+            setter.done()
+        else:
+            self.parent().show_message("Failed to prepare the wallpaper.")
+        self.deleteLater()
+
+
+# the target paths of the variants being built, by all builders
+building: set[str] = set()
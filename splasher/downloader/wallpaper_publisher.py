@@ -0,0 +1,120 @@
+import fcntl
+import logging
+import os
+from typing import Optional
+
+from PySide6.QtCore import QDir, QFile
+
+from splasher.config import PATH, get_settings_arg
+from splasher.config.args import SETTINGS
+
+# ioctl request of Linux to share the data blocks of two files, supported by Btrfs and XFS
+FICLONE: int = 0x40049409
+
+
+class WallpaperPublisher:
+    """
+    The WallpaperPublisher class puts images from the cache into the background folder
+    ($HOME/Pictures/splasher_background/):
+    1. a published image shares the data of its cached copy if possible,
+       trying a hardlink first, then a reflink, and copying only as the last resort,
+    2. 'current.jpg' is a symlink to the image in use, it is replaced atomically,
+    3. only the 'BACKGROUND_MAX_ENTRIES' most recent images are kept in the folder.
+
+    The cache never rewrites an image in place (QSaveFile and os.replace create a new file),
+    so a hardlinked wallpaper is not changed by later downloads.
+    """
+
+    def __init__(self, background_path: str = PATH["BACKGROUND"], max_entries: Optional[int] = None) -> None:
+        """
+        :param background_path: the background folder
+        :param max_entries: the number of images to keep, 'BACKGROUND_MAX_ENTRIES' in the settings is used if it is None
+        """
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.background_path: str = background_path
+        self.current_path: str = f"{background_path}current.jpg"
+        self.max_entries: Optional[int] = max_entries
+
+    def publish(self, img_fullpath: str, img_name: str) -> Optional[str]:
+        """
+        Publish an image into the background folder and point 'current.jpg' to it.
+        :param img_fullpath: the full path of the source image
+        :param img_name: the name of the published image
+        :return: the path of the published image, None if it failed
+        """
+        dst_path: str = f"{self.background_path}{img_name}"
+        if QFile.exists(dst_path) and os.path.samefile(img_fullpath, dst_path):
+            self.logger.info("'%s' is already published", dst_path)
+        else:
+            tmp_path: str = f"{dst_path}.tmp"
+            QFile.remove(tmp_path)
+            method: Optional[str] = self.link(img_fullpath, tmp_path)
+            if method is None:
+                return None
+            try:
+                os.replace(tmp_path, dst_path)
+            except OSError:
+                self.logger.exception("Failed to move '%s' to '%s'", tmp_path, dst_path)
+                QFile.remove(tmp_path)
+                return None
+            self.logger.info("Publish '%s' to '%s' by %s", img_fullpath, dst_path, method)
+        self.point_current(img_name)
+        self.clean()
+        return dst_path
+
+    def link(self, src_path: str, dst_path: str) -> Optional[str]:
+        """
+        Make dst_path a file with the same content as src_path, as cheaply as possible.
+        :param src_path: source file
+        :param dst_path: new file
+        :return: the method used, "hardlink", "reflink" or "copy", None if all of them failed
+        """
+        try:
+            os.link(src_path, dst_path)
+            return "hardlink"
+        except OSError:  # e.g. the folders are on different filesystems
+            pass
+        try:
+            with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return "reflink"
+        except OSError:  # e.g. the filesystem does not support reflinks
+            QFile.remove(dst_path)
+        if QFile.copy(src_path, dst_path):
+            return "copy"
+        self.logger.error("Failed to publish '%s' to '%s'", src_path, dst_path)
+        return None
+
+    def point_current(self, img_name: str) -> None:
+        """
+        Replace the 'current.jpg' symlink atomically.
+        :param img_name: the name of the image in use
+        """
+        tmp_path: str = f"{self.current_path}.tmp"
+        try:
+            if os.path.lexists(tmp_path):
+                os.remove(tmp_path)
+            os.symlink(img_name, tmp_path)  # relative, so the folder can be moved
+            os.replace(tmp_path, self.current_path)
+        except OSError:
+            self.logger.exception("Failed to point '%s' to '%s'", self.current_path, img_name)
+
+    def clean(self) -> None:
+        """
+        Remove the oldest images from the background folder, the image in use is always kept.
+        """
+        max_entries: Optional[int] = self.max_entries
+        if max_entries is None:
+            res, max_entries = get_settings_arg("BACKGROUND_MAX_ENTRIES")
+            if not res:
+                max_entries = SETTINGS["BACKGROUND_MAX_ENTRIES"]
+        current: str = os.path.realpath(self.current_path)
+        directory: QDir = QDir(self.background_path)
+        images: list[str] = [
+            info.absoluteFilePath()
+            for info in directory.entryInfoList(["*.jpg"], QDir.Files, QDir.Time)  # newest first
+            if not info.isSymLink() and info.absoluteFilePath() != current
+        ]
+        for img_path in images[max(max_entries - 1, 0):]:
+            if QFile.remove(img_path):
+                self.logger.info("Remove the old wallpaper '%s'", img_path)
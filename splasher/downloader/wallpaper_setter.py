@@ -1,141 +1,180 @@
-import os
 import re
+from typing import Optional
 
-from PySide6.QtCore import QFile, QIODevice, QProcess, QSaveFile, Slot
-from PySide6.QtNetwork import QNetworkReply
+from PySide6.QtCore import QCryptographicHash, QFile, QFileInfo, QIODevice, QRect, Signal, Slot
+from PySide6.QtNetwork import QNetworkReply, QNetworkRequest
 
-from splasher.config import PATH
+from splasher.config import PATH, set_settings_arg
 
+from .backend_registry import get_backend_registry
+from .cache_manager import get_cache_manager
 from .downloader import Downloader
+from .request_scheduler import Priority
+from .wallpaper_publisher import WallpaperPublisher
+
+# {(image path, size, modification time): the hash of its content}, an unchanged image is read once
+hashes: dict[tuple[str, int, int], str] = {}
+# the cached variants of the wallpaper on screen, pinned until another wallpaper is set
+shown: set[str] = set()
+
+
+def content_hash(img_path: str) -> str:
+    """
+    Hash the content of an image.
+    :param img_path: the image path
+    :return: the hex digest, "" if the image can not be read
+    """
+    file_info: QFileInfo = QFileInfo(img_path)
+    key: tuple[str, int, int] = (img_path, file_info.size(), file_info.lastModified().toMSecsSinceEpoch())
+    if key not in hashes:
+        file: QFile = QFile(img_path)
+        if not file.open(QIODevice.ReadOnly):
+            return ""
+        digest: QCryptographicHash = QCryptographicHash(QCryptographicHash.Sha256)
+        digest.addData(file)
+        file.close()
+        hashes[key] = digest.result().toHex().data().decode()
+    return hashes[key]
 
 
 class WallpaperSetter(Downloader):
     """
     The WallpaperSetter class contains the following functions:
     1. Bind the reply passed to different handler functions.
-    2. Save the image back to the same file and set it as the desktop wallpaper.
+    2. Stream the image back to the same file and set it as the desktop wallpaper.
+    3. Download a variant of the image for some screens without setting it.
+    4. Set one image per screen where the desktop environment supports it.
+    5. Skip applying the images which are already shown on the same screens.
     """
 
-    def fetch_wallpaper(self, reply: QNetworkReply) -> None:
+    fetched: Signal = Signal(str, bool)  # the path of the variant, whether it has been downloaded
+    priority: Priority = Priority.APPLY
+    variant: bool = False  # whether the image is only downloaded, by 'fetch_variant'
+
+    def fetch_wallpaper(self, request: QNetworkRequest) -> None:
+        """
+        Send the request and bind the reply to the handler functions.
+        A failed download is resumed by the next request of the same image.
+        :param request: QNetworkRequest
+        """
+        self.resume(self.img_fullpath(self.img_id(request)))
+        self.get(request, self.on_wallpaper_sent)
+
+    def fetch_variant(self, request: QNetworkRequest, path: str) -> None:
         """
-        Receive the network reply and bind the reply to the handler functions.
+        Download a variant of the image into the path, 'fetched' is emitted when it is over.
+        :param request: QNetworkRequest
+        :param path: the saving path
+        """
+        self.variant = True
+        self.resume(path)
+        self.get(request, self.on_wallpaper_sent)
+
+    def on_wallpaper_sent(self, reply: QNetworkReply) -> None:
+        """
+        Bind the reply of the wallpaper to the handler functions.
         :param reply: QNetworkReply
         """
         super().run(reply)
+        self.stream()
         self.reply.finished.connect(self.on_finished)
 
+    @staticmethod
+    def img_id(request: QNetworkRequest) -> str:
+        """
+        Get the image id from the request url.
+        :param request: QNetworkRequest
+        :return: image id, e.g. "photo-xxx"
+        """
+        return re.findall(r"photo-[0-9]{13}-[0-9a-z]{12}", request.url().path())[0]
+
+    @staticmethod
+    def img_fullpath(img_id: str) -> str:
+        """
+        Get the path of the image in the app cache folder.
+        :param img_id: image id
+        :return: file path
+        """
+        return f"{PATH['CACHE']}{PATH['SUBFOLDER']}{img_id}.jpg"
+
     @Slot()
     def on_finished(self) -> None:
         """
-        Read the replied image data and save the wallpaper back to the same file in the app cache folder,
+        Finish streaming the wallpaper back to the same file in the app cache folder,
         then set the image as the desktop wallpaper.
+        A transient failure is retried, the next attempt continues where this one stopped.
         """
         if self.reply:
-            if self.reply.error() == QNetworkReply.NoError:
-                # ======== variables ========
-                img_id: str = re.findall(r"photo-[0-9]{13}-[0-9a-z]{12}", self.reply.request().url().path())[0]
-                subfolder: str = PATH["SUBFOLDER"]
-                img_fullpath: str = f"{PATH['CACHE']}{subfolder}{img_id}.jpg"
-                failed: bool = False
-                # ======== save the wallpaper ========
-                file: QSaveFile = QSaveFile(img_fullpath)
-                if file.open(QIODevice.WriteOnly):
-                    self.logger.info("Open and write the wallpaper: '%s'", img_fullpath)
-                    if file.write(self.reply.readAll()) == -1:  # if an error occurred
-                        self.show_message("Failed to write a wallpaper back to its preview file.")
-                        self.logger.error("Failed to write a wallpaper back to its preview file.")
-                        failed: bool = True
+            if self.finish_stream():
+                if self.variant:
+                    self.fetched.emit(self.save_path, True)
                 else:
-                    self.show_message("Can not open file when trying to write a wallpaper.")
-                    self.logger.error("Can not open file '%s' when trying to write a wallpaper: '%s'", img_fullpath,
-                                      file.errorString())
-                    failed: bool = True
-                if failed:
-                    file.cancelWriting()
-                # ======== set as the desktop wallpaper ========
-                if file.commit():
-                    self.set_wallpaper(img_fullpath, f"{img_id}.jpg")
+                    img_id: str = self.img_id(self.reply.request())
+                    self.set_wallpaper(self.img_fullpath(img_id), f"{img_id}.jpg")
+            elif self.retry():
+                return
+            elif self.variant:
+                self.fetched.emit(self.save_path, False)
             self.reply.deleteLater()
+        self.done()
 
     def set_wallpaper(self, img_fullpath: str, img_name: str) -> None:
         """
-        Copy the image to a new folder, then set the wallpaper in different desktop environments.
+        Publish the image into the background folder, then set the wallpaper in different desktop environments.
         :param img_fullpath: the full path of the source image, the image name is included.
         :param img_name: the name of wallpaper.
         """
-        dst_path: str = f"{PATH['BACKGROUND']}{img_name}"
-        QFile.remove(dst_path)
-        if QFile.copy(img_fullpath, dst_path):
-            self.logger.info("Copy the wallpaper from '%s' to '%s'", img_fullpath, dst_path)
-
-            # ======== detect KDE/GNOME/XFCE... ========
-            env:str = os.getenv("XDG_CURRENT_DESKTOP")
-            match env:
-                case "KDE":
-                    self.set_kde(dst_path)
-                case "GNOME":
-                    self.set_gnome(dst_path)
-                case _:
-                    self.show_message(f"Unsupported desktop environment: {env}")
-                    self.logger.error("Detect an unsupported desktop environment: %s", env)
-                    return
-        else:
-            self.show_message("Failed to copy the wallpaper")
-            self.logger.error("Failed to copy the wallpaper from '%s' to '%s'", img_fullpath, dst_path)
-
-    def set_kde(self, img_path: str) -> None:
-        """
-        Set the wallpaper on KDE.
-        :param img_path: the new copied wallpaper path.
+        self.set_wallpapers([(img_fullpath, img_name, [])])
 
-        Command Reference:
-            https://www.reddit.com/r/linux4noobs/comments/emvwai/change_kde_background_image_through_terminal/
+    @staticmethod
+    def fingerprint(variants: list[tuple[str, str, list[QRect]]]) -> str:
         """
-        jscript: str = (
-            f"var allDesktops = desktops();\n"
-            f"for (i=0; i<allDesktops.length; i++) {{\n"
-            f"    d = allDesktops[i];\n"
-            f"    d.wallpaperPlugin = 'org.kde.image';\n"
-            f"    d.currentConfigGroup = Array('Wallpaper','org.kde.image','General');\n"
-            f"    d.writeConfig('Image', 'file://{img_path}');\n"
-            f"}}"
-        )
-
-        match QProcess.execute("qdbus", ["org.kde.plasmashell", "/PlasmaShell",
-                                               "org.kde.PlasmaShell.evaluateScript", jscript]):
-            case -2:
-                self.logger.error("The process can not be started")
-            case -1:
-                self.logger.error("The process crashed")
-            case _:
-                self.logger.info("Set '%s' as the desktop wallpaper", img_path)
-
-    def set_gnome(self, img_path: str) -> None:
+        Get the fingerprint of the variants of an image: the content of each variant and the screens showing it.
+        :param variants: see 'set_wallpapers'
+        :return: the hex digest
         """
-        Set the wallpaper in GNOME.
-        :param img_path: the copied wallpaper path.
+        digest: QCryptographicHash = QCryptographicHash(QCryptographicHash.Sha256)
+        for img_fullpath, _, geometries in variants:
+            rects: str = ";".join(",".join(map(str, geometry.getRect())) for geometry in geometries)
+            digest.addData(f"{content_hash(img_fullpath)}|{rects}\n".encode())
+        return digest.result().toHex().data().decode()
 
-        Command Reference:
-            https://askubuntu.com/questions/66914/how-to-change-desktop-background-from-command-line-in-unity
+    def set_wallpapers(self, variants: list[tuple[str, str, list[QRect]]]) -> None:
         """
-        process: QProcess = QProcess()
-        process.start("gsettings", ["get", "org.gnome.desktop.interface", "color-scheme"])
-        process.waitForFinished()
-        scheme: str = "picture-uri-dark" \
-            if "prefer-dark" in process.readAllStandardOutput().toStdString() else "picture-uri"
-        process.close()
-
-        match QProcess.execute("gsettings", ["set", "org.gnome.desktop.background", scheme, f"file://{img_path}"]):
-            case -2:
-                self.logger.error("The process can not be started")
-            case -1:
-                self.logger.error("The process crashed")
-            case _:
-                self.logger.info("Set '%s' as the desktop wallpaper", img_path)
-
-
-    def set_xfce(self, img_path: str) -> None:
-        """
-        Set the wallpaper in XFCE.
-        :param img_path: the copied wallpaper path.
+        Publish the variants of an image into the background folder, then set them in different desktop environments.
+        Desktops which support it show each variant on the screens it is made for, others show the first variant.
+        :param variants: (the full path of the source image, the name of the wallpaper, the geometries of its screens),
+                         the variant of the primary screen comes first
         """
+        fingerprint: str = self.fingerprint(variants)
+        if get_backend_registry().is_applied(fingerprint):
+            self.show_message("The wallpaper is already set.")
+            self.logger.info("Skip applying '%s' again", variants[0][1])
+            return
+        variant_subpaths: set[str] = {f"{PATH['SUBFOLDER']}{img_name}" for _, img_name, _ in variants}
+        for img_subpath in variant_subpaths:  # before the touches below, so no variant evicts another one
+            get_cache_manager().pin(img_subpath)
+        publisher: WallpaperPublisher = WallpaperPublisher()
+        screens: dict[str, str] = {}  # {"x,y" of a screen: the published wallpaper}
+        dst_path: Optional[str] = None
+        for img_fullpath, img_name, geometries in reversed(variants):  # 'current.jpg' ends on the primary variant
+            dst_path = publisher.publish(img_fullpath, img_name)
+            if dst_path is None:
+                continue
+            get_cache_manager().touch(f"{PATH['SUBFOLDER']}{img_name}")
+            for geometry in geometries:
+                screens[f"{geometry.x()},{geometry.y()}"] = dst_path
+        if dst_path is not None:
+            # ======== keep the wallpaper in the cache, the variants of the other screens stay pinned ========
+            set_settings_arg("WALLPAPER", f"{PATH['SUBFOLDER']}{variants[0][1]}")
+            for img_subpath in shown - variant_subpaths:
+                get_cache_manager().unpin(img_subpath)
+            shown.clear()
+            shown.update(variant_subpaths)
+
+            # ======== set it through the backend of the running desktop, without waiting ========
+            get_backend_registry().apply(dst_path, screens, fingerprint)
+        else:
+            for img_subpath in variant_subpaths - shown:
+                get_cache_manager().unpin(img_subpath)
+            self.show_message("Failed to publish the wallpaper")
@@ -1,16 +1,19 @@
 import logging
 import re
-from math import ceil
-from typing import Optional
+from typing import Any, Optional
 
-from PySide6.QtCore import QDir, QFileInfo, Qt, QUrl, Slot
-from PySide6.QtGui import QGuiApplication, QIcon, QPixmap, QScreen
-from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+from PySide6.QtCore import QDir, QFileInfo, QSize, Qt, QUrl, Slot
+from PySide6.QtGui import QGuiApplication, QIcon, QImage, QPixmap, QScreen
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest
 from PySide6.QtWidgets import (QFileDialog, QHBoxLayout, QLabel, QMainWindow, QPushButton, QStatusBar, QVBoxLayout,
                                QWidget)
 
-from splasher.config import APP, PATH, UNSPLASH, get_settings_arg
-from splasher.downloader import AreaDetector, PreviewFetcher, WallpaperDownloader, WallpaperSetter
+from splasher.config import APP, PATH, UNSPLASH, get_settings_arg, set_settings_arg
+from splasher.downloader import (HttpCache, PreviewFetcher, PreviewPrefetcher, RotationScheduler, VariantBuilder,
+                                 WallpaperDownloader, get_backend_registry, get_cache_manager, get_connection_warmer,
+                                 get_endpoint_selector, get_request_registry, screen_variants)
+from splasher.downloader.network_estimator import DEFAULT_TIMEOUT
+from splasher.image import PreviewDecoder
 
 from . import icons_rc  # pylint: disable=unused-import
 
@@ -52,6 +55,10 @@ class MainWindow(QMainWindow):
         self.logger: logging.Logger = logging.getLogger(__name__)
         # self.settings_window: Optional[SettingsWindow] = None
         self.manager: Optional[QNetworkAccessManager] = None
+        self.http_cache: Optional[HttpCache] = None
+        self.prefetcher: Optional[PreviewPrefetcher] = None
+        self.decoder: PreviewDecoder = PreviewDecoder(self)
+        self.decoder.ready.connect(self.show_preview)  # pylint: disable=no-member
         # -------------------------------------------------------------
         # ======== draw ui ========
         self.draw_window_ui()
@@ -59,6 +66,20 @@ class MainWindow(QMainWindow):
         # -------------------------------------------------------------
         # ======== QNetWorkAccessManager ========
         self.init_manager()
+        self.warm_up()
+        # -------------------------------------------------------------
+        # ======== report the wallpapers the desktop could not set ========
+        get_backend_registry().failed.connect(self.show_message)  # pylint: disable=no-member
+        # -------------------------------------------------------------
+        # ======== keep previews ready for refreshing ========
+        self.prefetcher = PreviewPrefetcher(self, self.preview_url(), self.preview_size())
+        self.prefetcher.refill()
+        # -------------------------------------------------------------
+        # ======== change the wallpaper on a schedule ========
+        self.rotation = RotationScheduler(self, self.preview_url(), self.variants)
+        res, rotation = get_settings_arg("ROTATION")
+        if res and rotation:
+            self.rotation.start()
         # -------------------------------------------------------------
 
     def draw_window_ui(self) -> None:
@@ -127,51 +148,101 @@ class MainWindow(QMainWindow):
 
     def set_preview(self) -> None:
         """
-        Set a preivew image for QLabel and refresh.
+        Set a preivew image for QLabel.
+        The image is decoded and scaled to the QLabel's size in the background, then shown by 'show_preview'.
         """
         res, img_subpath = get_settings_arg("PREVIEW")
         if res and img_subpath:
-            img: QPixmap = QPixmap(f"{PATH['CACHE']}{img_subpath}.jpg")
-            self.img_label.setPixmap(img)
-            self.img_label.setScaledContents(True)  # adjust the image size to fit the window
-            self.img_label.setAlignment(Qt.AlignCenter)
-            self.img_label.repaint()
+            self.decoder.decode(f"{PATH['CACHE']}{img_subpath}.jpg", self.preview_size())
+            get_cache_manager().touch(f"{img_subpath}.jpg")
         elif not res:
             self.logger.error("Failed to get the value of 'PREVIEW' from 'settings.json'")
 
+    def preview_size(self) -> QSize:
+        """
+        Get the size previews are decoded to, the QLabel's size in device pixels.
+        :return: QSize
+        """
+        ratio: float = self.devicePixelRatioF()
+        return QSize(round(self.img_label.width() * ratio), round(self.img_label.height() * ratio))
+
+    def preview_url(self) -> str:
+        """
+        Get the url of a random preview, the image's resolution is based on the QLabel's size.
+        :return: url string
+        """
+        img_resolution: str = f"{self.img_label.size().width()}x{self.img_label.size().height()}"  # 960x497
+        return f"{UNSPLASH['SOURCE']}{img_resolution}"
+
+    @Slot(str, QImage)
+    def show_preview(self, img_path: str, image: QImage) -> None:  # pylint: disable=unused-argument
+        """
+        Show a decoded preview, it already has the QLabel's size, so it is not scaled again when painting.
+        :param img_path: the image path
+        :param image: the decoded image
+        """
+        image.setDevicePixelRatio(self.devicePixelRatioF())
+        self.img_label.setPixmap(QPixmap.fromImage(image))
+        self.img_label.setAlignment(Qt.AlignCenter)
+
     def init_manager(self) -> None:
         """
-        Init a QNetworkAccessManager to handle functions related to images.
+        Init a QNetworkAccessManager to handle functions related to images,
+        cacheable responses are kept in the HTTP disk cache.
         """
         self.manager: QNetworkAccessManager = QNetworkAccessManager(self)
         self.manager.setAutoDeleteReplies(True)
-        self.manager.setTransferTimeout(5000)  # 5s
-        # ======== detect area in order to use mirror site ========
-        request: QNetworkRequest = QNetworkRequest(QUrl("https://www.google.com"))
-        request.setTransferTimeout(500)  # 500ms
-        AreaDetector(self).detect(self.manager.head(request))
+        self.manager.setTransferTimeout(DEFAULT_TIMEOUT)  # requests of the downloaders get adaptive timeouts
+        self.http_cache = HttpCache(self.manager)
+        self.manager.setCache(self.http_cache)
+
+    def variants(self) -> list[dict[str, Any]]:
+        """
+        Get the wallpaper variants the screens need, the one of the primary screen first.
+        :return: see 'screen_variants'
+        """
+        primary: QScreen = QGuiApplication.primaryScreen()
+        return screen_variants(sorted(QGuiApplication.screens(), key=lambda screen: screen is not primary))
+
+    @Slot()
+    def warm_up(self) -> None:
+        """
+        Open connections to the preview source and the image endpoint in the background,
+        so the next refresh or choose does not wait for the DNS lookup and the handshakes.
+        """
+        get_connection_warmer().warm(self.manager, [UNSPLASH["SOURCE"], get_endpoint_selector().best()])
 
     @Slot()
     def refresh(self) -> None:
         """
-        Use 'PreviewFetcher' to load a previewed image.
+        Show a prefetched preview if one is ready,
+        otherwise use 'PreviewFetcher' to load a previewed image.
         Create a network request and use 'get' function to precess the response.
         The image's resolution is based on the QLabel's size.
         """
-        self.show_message("Attempt to fetch a new preview.")
         self.logger.info("The refresh button is clicked.")
+        self.warm_up()  # choosing the new preview is likely next
 
-        img_resolution: str = f"{self.img_label.size().width()}x{self.img_label.size().height()}"  # 960x497
-        url: str = f"{UNSPLASH['SOURCE']}{img_resolution}"
-        reply: QNetworkReply = self.manager.get(QNetworkRequest(QUrl(url)))
-        PreviewFetcher(self).fetch_preview(reply)
+        prefetched: Optional[tuple[str, QImage]] = self.prefetcher.take()
+        if prefetched is not None:
+            img_subpath, image = prefetched
+            if set_settings_arg("PREVIEW", img_subpath):
+                get_cache_manager().touch(f"{img_subpath}.jpg")
+                get_request_registry().cancel("preview")  # a pending fetch must not replace the prefetched preview
+                self.decoder.cancel()
+                self.show_preview(f"{PATH['CACHE']}{img_subpath}.jpg", image)
+                return
+            self.logger.error("Failed to set the value of 'PREVIEW' from 'settings.json'")
+
+        self.show_message("Attempt to fetch a new preview.")
+        PreviewFetcher(self).fetch_preview(QNetworkRequest(QUrl(self.preview_url())))
 
     @Slot()
     def choose(self) -> None:
         """
         Set the current image as the desktop wallpaper.
 
-        The image's resolution is based on the primary screen's resolution.
+        The image's resolution is based on each screen's resolution, screens of the same size share one image.
         Please refer to the documentation for the construction of the url path:
             https://unsplash.com/documentation#dynamically-resizable-images
 
@@ -193,33 +264,20 @@ class MainWindow(QMainWindow):
         self.logger.info("The choose button is clicked.")
 
         res, img_name = get_settings_arg("PREVIEW")
-        _, is_cnm = get_settings_arg("CNM")
         if res and img_name:
             img_id: str = re.findall(r"photo-[0-9]{13}-[0-9a-z]{12}", img_name)[0]
-            screen: QScreen = QGuiApplication.primaryScreen()
-            screen_w: int = screen.size().width()
-            screen_h: int = screen.size().height()
-            ratio: int = ceil(screen.devicePixelRatio())  # default is 1 and the max is 5.
-            api: str = UNSPLASH["IMAGES-MIRROR"] if is_cnm else UNSPLASH["IMAGES"]
-            url: str = (f"{api}{img_id}?w={screen_w}&h={screen_h}&fit=crop&crop=faces,edges,entropy"
-                        f"&fm=jpg&q=95&dpr={ratio}&cs=srgb")
-            # ======== check the image's resolution ========
-            subfolder: str = PATH["SUBFOLDER"]
-            img_fullpath: str = f"{PATH['CACHE']}{subfolder}{img_id}.jpg"
+            builder: VariantBuilder = VariantBuilder(self, img_id, self.variants())
+            img_fullpath: str = f"{PATH['CACHE']}{PATH['SUBFOLDER']}{img_id}.jpg"
             file_info: QFileInfo = QFileInfo(img_fullpath)
-            if file_info.exists() and file_info.isFile():
-                img: QPixmap = QPixmap(img_fullpath)
-                img_w: int = img.size().width()
-                img_h: int = img.size().height()
-                if img_w != screen_w or img_h != screen_h:
-                    # ======== send the request, download and set ========
-                    reply: QNetworkReply = self.manager.get(QNetworkRequest(QUrl(url)))
-                    WallpaperSetter(self).fetch_wallpaper(reply)
-                else:
-                    # ======== set the wallpaper only ========
-                    WallpaperSetter(self).set_wallpaper(img_fullpath, f"{img_id}.jpg")
-            else:
+            if not file_info.exists() or not file_info.isFile():
                 self.logger.error("Failed to find the image file: '%s'", img_fullpath)
+                builder.deleteLater()
+            elif builder.busy():
+                self.show_message("The wallpaper is already being prepared.")
+                builder.deleteLater()
+            else:
+                # ======== take, derive or download a variant per screen size, then set ========
+                builder.build()
         else:
             self.logger.error("Failed to get the value of 'PREVIEW' from 'settings.json'")
 
@@ -232,7 +290,6 @@ class MainWindow(QMainWindow):
         self.logger.info("The download button is clicked.")
 
         res, img_name = get_settings_arg("PREVIEW")
-        _, is_cnm = get_settings_arg("CNM")
         if res and img_name:
             img_id: str = re.findall(r"photo-[0-9]{13}-[0-9a-z]{12}", img_name)[0]
             img_path: str = QFileDialog.getSaveFileName(self,
@@ -240,12 +297,12 @@ class MainWindow(QMainWindow):
                                                         f"{QDir.homePath()}/{img_id}.jpg",
                                                         "Images (*.png *.jpg)",
                                                         options=QFileDialog.DontResolveSymlinks)[0]
-            api: str = UNSPLASH["IMAGES-MIRROR"] if is_cnm else UNSPLASH["IMAGES"]
-            url: str = f"{api}{img_id}"
+            url: str = get_endpoint_selector().route(img_id, self.manager)
             # ======== send the request and download ========
-            if img_path:
-                reply: QNetworkReply = self.manager.get(QNetworkRequest(QUrl(url)))
-                WallpaperDownloader(self).download(reply, img_path)
+            if img_path and get_request_registry().busy(img_path):
+                self.show_message("The image is already being downloaded.")
+            elif img_path:
+                WallpaperDownloader(self).download(HttpCache.no_store(QNetworkRequest(QUrl(url))), img_path)
         else:
             self.logger.error("Failed to get the value of 'PREVIEW' from 'settings.json'")
 
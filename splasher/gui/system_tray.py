@@ -65,7 +65,9 @@ class SystemTray(QSystemTrayIcon):
     def show_app(self) -> None:
         """
         Display the main window if it does not exist, otherwise show the main window on the top.
+        Connections are warmed up meanwhile, as a refresh or a choice is likely to follow.
         """
+        self.main_window.warm_up()
         if not self.main_window.isVisible():
             self.main_window.show()
         elif self.main_window.isMinimized():
@@ -0,0 +1,3 @@
+from .image_deriver import ImageDeriver
+from .preview_decoder import PreviewDecoder
+from .size_prober import SizeProber, get_size_prober
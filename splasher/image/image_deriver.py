@@ -0,0 +1,186 @@
+import logging
+from typing import Optional
+
+from PySide6.QtCore import QDir, QIODevice, QObject, QRect, QRunnable, QSaveFile, QSize, Qt, QThreadPool, Signal, Slot
+from PySide6.QtGui import QImage, QImageReader
+
+from .size_prober import get_size_prober
+
+# the long side of the thumbnail the crop is chosen on
+THUMB_SIZE: int = 64
+# how much detail a crop may give up to stay closer to the center of the image
+CENTER_BIAS: float = 0.1
+# the quality of derived images, the same as the images requested from Unsplash
+QUALITY: int = 95
+
+
+def crop_rect(image: QImage, size: QSize) -> QRect:
+    """
+    Choose the largest part of an image which has the aspect ratio of the target size.
+    Like the "edges,entropy" crop of Unsplash, the part is moved along the image to where it has the most detail,
+    measured by the gradients of a small grayscale thumbnail, with a slight preference for the center.
+    :param image: the source image
+    :param size: the target size
+    :return: the crop rectangle in source pixels
+    """
+    width, height = image.width(), image.height()
+    crop_w: int = min(width, round(height * size.width() / size.height()))
+    crop_h: int = min(height, round(crop_w * size.height() / size.width()))
+    if crop_w == width and crop_h == height:
+        return QRect(0, 0, width, height)
+    # ======== the detail of each column or row of the thumbnail ========
+    thumb: QImage = image.scaled(THUMB_SIZE, THUMB_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation) \
+        .convertToFormat(QImage.Format_Grayscale8)
+    thumb_w, thumb_h, line = thumb.width(), thumb.height(), thumb.bytesPerLine()
+    bits: bytes = bytes(thumb.constBits())
+    horizontal: bool = crop_w < width  # the crop moves along the x axis
+    profile: list[int] = [0] * (thumb_w if horizontal else thumb_h)
+    for y in range(thumb_h - 1):
+        for x in range(thumb_w - 1):
+            pixel: int = bits[y * line + x]
+            edge: int = abs(bits[y * line + x + 1] - pixel) + abs(bits[(y + 1) * line + x] - pixel)
+            profile[x if horizontal else y] += edge
+    # ======== slide the crop window over the profile ========
+    window: int = max(1, round(len(profile) * (crop_w / width if horizontal else crop_h / height)))
+    sums: list[int] = [0]
+    for value in profile:
+        sums.append(sums[-1] + value)
+    slack: int = len(profile) - window
+    total: int = max(sums[-1], 1)
+
+    def score(offset: int) -> float:
+        return (sums[offset + window] - sums[offset]) / total - CENTER_BIAS * abs(offset - slack / 2) / max(slack, 1)
+
+    best: int = max(range(slack + 1), key=score)
+    if horizontal:
+        return QRect(min(round(best * width / thumb_w), width - crop_w), 0, crop_w, crop_h)
+    return QRect(0, min(round(best * height / thumb_h), height - crop_h), crop_w, crop_h)
+
+
+def sufficient(source: QSize, size: QSize) -> bool:
+    """
+    Check whether an image can be cropped and scaled down to a target size without upscaling.
+    :param source: the size of the image
+    :param size: the target size
+    :return: bool
+    """
+    return source.isValid() and source.width() >= size.width() and source.height() >= size.height()
+
+
+class DeriveTask(QRunnable):
+    """
+    Crop and scale an image on a thread of QThreadPool.
+    """
+
+    def __init__(self, deriver: "ImageDeriver", src_path: str, dst_path: str, size: QSize) -> None:
+        """
+        :param deriver: the ImageDeriver which receives the result
+        :param src_path: the source image path
+        :param dst_path: the target image path
+        :param size: the target size in pixels
+        """
+        super().__init__()
+        self.deriver: ImageDeriver = deriver
+        self.src_path: str = src_path
+        self.dst_path: str = dst_path
+        self.size: QSize = size
+
+    def run(self) -> None:
+        """
+        Decode the source, crop, resample smoothly and save the result through QSaveFile,
+        so an existing target is replaced by a new file and never rewritten in place.
+        The result is delivered to the GUI thread by a queued signal.
+        """
+        logger: logging.Logger = logging.getLogger(__name__)
+        reader: QImageReader = QImageReader(self.src_path)
+        reader.setAutoTransform(True)
+        image: QImage = reader.read()
+        res: bool = False
+        if image.isNull():
+            logger.error("Failed to decode '%s': %s", self.src_path, reader.errorString())
+        else:
+            image = image.copy(crop_rect(image, self.size)).scaled(self.size, Qt.IgnoreAspectRatio,
+                                                                   Qt.SmoothTransformation)
+            file: QSaveFile = QSaveFile(self.dst_path)
+            if file.open(QIODevice.WriteOnly) and image.save(file, "JPG", QUALITY):
+                res = file.commit()
+            else:
+                file.cancelWriting()
+            if not res:
+                logger.error("Failed to save '%s'", self.dst_path)
+        self.deriver.derived.emit(self.dst_path, res)
+
+
+class ImageDeriver(QObject):
+    """
+    The ImageDeriver class makes images of a target size from larger copies on the disk,
+    so a wallpaper is only downloaded when no copy is large enough:
+    1. 'find_source' picks the smallest image of the same photo which covers the target size,
+    2. 'derive' crops it to the target aspect ratio and scales it down on a QThreadPool worker.
+    """
+
+    derived: Signal = Signal(str, bool)  # target path, success; emitted by workers
+    ready: Signal = Signal(str)  # target path
+    failed: Signal = Signal(str)  # target path
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        """
+        :param parent: QObject
+        """
+        super().__init__(parent)
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.pending: set[str] = set()  # target paths being derived
+        self.derived.connect(self.on_derived)
+
+    def find_source(self, folders: list[str], img_id: str, size: QSize) -> Optional[str]:
+        """
+        Find the smallest copy of a photo which is large enough for the target size.
+        :param folders: the folders to look in, e.g. the cache and the background folder
+        :param img_id: the image id, copies are named "<img_id>*.jpg"
+        :param size: the target size in pixels
+        :return: the image path, None if no copy is large enough
+        """
+        best: Optional[str] = None
+        best_area: int = 0
+        for folder in folders:
+            for name in QDir(folder).entryList([f"{img_id}*.jpg"], QDir.Files):
+                path: str = f"{folder}{name}"
+                source: QSize = get_size_prober().size(path)  # read the header only
+                area: int = source.width() * source.height()
+                if sufficient(source, size) and (best is None or area < best_area):
+                    best, best_area = path, area
+        return best
+
+    def derive(self, src_path: str, dst_path: str, size: QSize) -> None:
+        """
+        Start deriving an image, a target which is already being derived is ignored.
+        :param src_path: the source image path
+        :param dst_path: the target image path
+        :param size: the target size in pixels
+        """
+        if dst_path in self.pending:
+            return
+        self.pending.add(dst_path)
+        self.logger.info("Derive '%s' from '%s'", dst_path, src_path)
+        QThreadPool.globalInstance().start(DeriveTask(self, src_path, dst_path, size))
+
+    def busy(self, dst_path: str) -> bool:
+        """
+        Check whether a target is being derived.
+        :param dst_path: the target image path
+        :return: bool
+        """
+        return dst_path in self.pending
+
+    @Slot(str, bool)
+    def on_derived(self, dst_path: str, res: bool) -> None:
+        """
+        Pass on the result of a worker.
+        :param dst_path: the target image path
+        :param res: whether the image has been saved
+        """
+        self.pending.discard(dst_path)
+        if res:
+            self.ready.emit(dst_path)
+        else:
+            self.failed.emit(dst_path)
@@ -0,0 +1,93 @@
+import logging
+from typing import Optional
+
+from PySide6.QtCore import QObject, QRunnable, QSize, QThreadPool, Signal, Slot
+from PySide6.QtGui import QImage, QImageReader
+
+
+class DecodeTask(QRunnable):
+    """
+    Decode an image at the target size on a thread of QThreadPool.
+    """
+
+    def __init__(self, decoder: "PreviewDecoder", ticket: int, img_path: str, size: QSize) -> None:
+        """
+        :param decoder: the PreviewDecoder which receives the result
+        :param ticket: the number of the decode request
+        :param img_path: the image path
+        :param size: the target size in device pixels
+        """
+        super().__init__()
+        self.decoder: PreviewDecoder = decoder
+        self.ticket: int = ticket
+        self.img_path: str = img_path
+        self.size: QSize = size
+
+    def run(self) -> None:
+        """
+        Let QImageReader scale while decoding, which is cheaper than decoding at full size and scaling afterwards.
+        The result is delivered to the GUI thread by a queued signal.
+        """
+        reader: QImageReader = QImageReader(self.img_path)
+        reader.setAutoTransform(True)
+        reader.setScaledSize(self.size)
+        image: QImage = reader.read()
+        if image.isNull():
+            logging.getLogger(__name__).error("Failed to decode '%s': %s", self.img_path, reader.errorString())
+        self.decoder.decoded.emit(self.ticket, self.img_path, image)
+
+
+class PreviewDecoder(QObject):
+    """
+    The PreviewDecoder class decodes previews off the GUI thread:
+    1. each request is decoded and scaled to its target size by a QThreadPool worker,
+    2. only the result of the newest request is passed on, older ones are dropped,
+       unless every result is wanted, e.g. when previews are decoded ahead of time.
+    """
+
+    decoded: Signal = Signal(int, str, QImage)  # ticket, image path, image; emitted by workers
+    ready: Signal = Signal(str, QImage)  # image path, image; only for the newest request
+    failed: Signal = Signal(str)  # image path
+
+    def __init__(self, parent: Optional[QObject] = None, latest_only: bool = True) -> None:
+        """
+        :param parent: QObject
+        :param latest_only: whether results of earlier requests are dropped
+        """
+        super().__init__(parent)
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.ticket: int = 0
+        self.latest_only: bool = latest_only
+        self.decoded.connect(self.on_decoded)
+
+    def decode(self, img_path: str, size: QSize) -> int:
+        """
+        Start decoding an image, results of earlier requests will be dropped.
+        :param img_path: the image path
+        :param size: the target size in device pixels
+        :return: the ticket of the request
+        """
+        self.ticket += 1
+        QThreadPool.globalInstance().start(DecodeTask(self, self.ticket, img_path, size))
+        return self.ticket
+
+    def cancel(self) -> None:
+        """
+        Drop the results of all pending requests, e.g. when an image is shown without decoding.
+        """
+        self.ticket += 1
+
+    @Slot(int, str, QImage)
+    def on_decoded(self, ticket: int, img_path: str, image: QImage) -> None:
+        """
+        Pass on the result if it belongs to the newest request.
+        :param ticket: the number of the decode request
+        :param img_path: the image path
+        :param image: the decoded image
+        """
+        if self.latest_only and ticket != self.ticket:
+            self.logger.info("Drop the stale preview '%s'", img_path)
+        elif image.isNull():
+            self.failed.emit(img_path)
+        else:
+            self.ready.emit(img_path, image)
@@ -0,0 +1,140 @@
+import json
+import logging
+from typing import Any, Optional
+
+from PySide6.QtCore import QCoreApplication, QFile, QFileInfo, QIODevice, QSaveFile, QSize, QTimer
+from PySide6.QtGui import QImageReader
+
+from splasher.config import PATH
+
+# default window (ms) in which new probes are coalesced into one write of the index
+FLUSH_INTERVAL: int = 5000  # 5s
+
+
+class SizeProber:
+    """
+    The SizeProber class gets the dimensions of images without decoding them:
+    1. QImageReader only parses the image header (the SOF segment of a JPEG),
+    2. the results are kept in a sidecar index ('sizes.json' in the cache folder),
+       keyed by path and checked against the modification time, so a rewritten image is probed again.
+
+    Like 'CacheManager', new probes are kept in memory and written in batches by a timer and when the app quits,
+    a probe lost by a crash is only probed again.
+    """
+
+    def __init__(self, index_path: str = f"{PATH['CACHE']}sizes.json", flush_interval: int = FLUSH_INTERVAL) -> None:
+        """
+        :param index_path: the path of the sidecar index
+        :param flush_interval: changes within this window (ms) are coalesced into one write
+        """
+        self.logger: logging.Logger = logging.getLogger(__name__)
+        self.index_path: str = index_path
+        self.index: Optional[dict[str, list[int]]] = None
+        self.flush_interval: int = flush_interval
+        self.dirty: bool = False
+        self.timer: Optional[QTimer] = None
+
+    def load(self) -> dict[str, list[int]]:
+        """
+        Read the sidecar index.
+        :return: the index, {path: [mtime in ms, width, height]}
+        """
+        if self.index is None:
+            self.index = {}
+            file: QFile = QFile(self.index_path)
+            if file.open(QIODevice.ReadOnly | QIODevice.Text | QIODevice.ExistingOnly):
+                try:
+                    self.index = json.loads(bytes(file.readAll().data()).decode("utf-8"))
+                except json.JSONDecodeError:
+                    self.logger.warning("'%s' is broken", self.index_path)
+            file.close()
+        return self.index
+
+    def schedule_flush(self) -> None:
+        """
+        Mark the index as changed and start the flush timer unless it is already running.
+        Without a running Qt application there is nothing to drive the timer, so the index is written at once.
+        """
+        self.dirty = True
+        if self.flush_interval <= 0 or QCoreApplication.instance() is None:
+            self.flush()
+            return
+        if self.timer is None:
+            self.timer = QTimer()
+            self.timer.setSingleShot(True)
+            self.timer.timeout.connect(self.flush)  # pylint: disable=no-member
+            QCoreApplication.instance().aboutToQuit.connect(self.flush)
+        if not self.timer.isActive():
+            self.timer.start(self.flush_interval)
+
+    def flush(self) -> bool:
+        """
+        Write the index if it has changed since the last write.
+        :return: bool, False if the write failed
+        """
+        if self.timer is not None:
+            self.timer.stop()
+        if not self.dirty:
+            return True
+        self.dirty = not self.save()
+        return not self.dirty
+
+    def save(self) -> bool:
+        """
+        Write the sidecar index.
+        :return: bool
+        """
+        file: QSaveFile = QSaveFile(self.index_path)
+        if file.open(QIODevice.WriteOnly | QIODevice.Text):
+            file.write(json.dumps(self.index).encode("utf-8"))
+            return file.commit()
+        file.cancelWriting()
+        self.logger.error("Failed to open '%s'", self.index_path)
+        return False
+
+    def size(self, img_path: str) -> QSize:
+        """
+        Get the dimensions of an image.
+        :param img_path: the image path
+        :return: QSize, invalid if the image does not exist or can not be read
+        """
+        info: QFileInfo = QFileInfo(img_path)
+        if not info.exists():
+            return QSize()
+        mtime: int = info.lastModified().toMSecsSinceEpoch()
+        index: dict[str, list[int]] = self.load()
+        entry: Any = index.get(img_path)
+        if entry is not None and entry[0] == mtime:
+            return QSize(entry[1], entry[2])
+
+        reader: QImageReader = QImageReader(img_path)
+        size: QSize = reader.size()
+        if size.isValid():
+            index[img_path] = [mtime, size.width(), size.height()]
+            self.schedule_flush()
+        else:
+            self.logger.error("Failed to read the size of '%s': %s", img_path, reader.errorString())
+        return size
+
+    def forget(self, img_path: str) -> None:
+        """
+        Remove an image from the index, e.g. when it is evicted from the cache.
+        :param img_path: the image path
+        """
+        if self.load().pop(img_path, None) is not None:
+            self.schedule_flush()
+
+
+# one prober per sidecar index, shared by the whole process
+probers: dict[str, SizeProber] = {}
+
+
+def get_size_prober(index_path: str = f"{PATH['CACHE']}sizes.json") -> SizeProber:
+    """
+    Get the process-wide prober of a sidecar index, create it on the first call.
+    :param index_path: the path of the sidecar index
+    :return: SizeProber
+    """
+    if index_path not in probers:
+        probers[index_path] = SizeProber(index_path)
+    return probers[index_path]
@@ -1,16 +1,19 @@
 import logging
 
 from PySide6.QtCore import QLockFile
-from PySide6.QtWidgets import QMessageBox
 
 from splasher.config import PATH, init_app
-from splasher.gui import Application
 
 
 def main() -> None:
     """
     The main function of the application.
+    The widgets are imported here, so importing 'splasher' for the headless CLI does not load QtWidgets.
     """
+    from PySide6.QtWidgets import QMessageBox  # pylint: disable=import-outside-toplevel
+
+    from splasher.gui import Application  # pylint: disable=import-outside-toplevel
+
     init_app()
     # -------------------------------------------------------------
     logger: logging.Logger = logging.getLogger(__name__)
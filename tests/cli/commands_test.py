@@ -0,0 +1,93 @@
+import http.server
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Any
+
+import pytest
+from PySide6.QtCore import QRect, QSize
+
+from splasher.cli import commands, headless
+from splasher.downloader import EndpointSelector, HttpCache, endpoint_selector, screen_variants
+
+DATA: bytes = os.urandom(64 * 1024)
+IMG_ID: str = "photo-1234567890123-0123456789ab"
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for the image endpoint.
+    """
+
+    def do_HEAD(self) -> None:  # pylint: disable=invalid-name
+        """
+        Answer a probe.
+        """
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(DATA)))
+        self.end_headers()
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Serve the image.
+        """
+        self.do_HEAD()
+        self.wfile.write(DATA)
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        """
+        Keep the test output quiet.
+        """
+
+
+def test_no_widgets() -> None:
+    """
+    Test that the CLI does not load QtWidgets.
+    """
+    loaded: str = subprocess.run([sys.executable, "-c", "import sys, splasher.cli; print(list(sys.modules))"],
+                                 capture_output=True, text=True, check=True).stdout
+    # assert
+    assert "PySide6.QtCore" in loaded
+    assert "PySide6.QtWidgets" not in loaded
+
+
+def test_screens() -> None:
+    """
+    Test function "screen_size" and "screens", the screens of '--size' are placed from left to right.
+    """
+    placed: list[commands.Screen] = commands.screens([commands.screen_size("1920x1080@2"),
+                                                      commands.screen_size("3840x2160")])
+    variants: list[dict[str, Any]] = screen_variants(placed)
+    # assert
+    assert commands.screen_size("2560x1440") == (2560, 1440, 1.0)
+    with pytest.raises(Exception):
+        commands.screen_size("2560x")
+    assert [screen.geometry() for screen in placed] == [QRect(0, 0, 1920, 1080), QRect(1920, 0, 3840, 2160)]
+    assert len(variants) == 1  # both screens need 3840x2160 device pixels
+    assert variants[0]["size"] == QSize(3840, 2160)
+
+
+def test_download(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test the command "download", the preview is downloaded to the given path,
+    and the exit code tells whether it has been saved.
+    """
+    server: http.server.ThreadingHTTPServer = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url: str = f"http://127.0.0.1:{server.server_port}/"
+    monkeypatch.setattr(endpoint_selector, "selector", EndpointSelector(endpoints=[url]))
+    monkeypatch.setattr(commands, "init_app", lambda: None)
+    monkeypatch.setattr(commands, "get_settings_arg", lambda key: (True, f"unsplash/{IMG_ID}"))
+    monkeypatch.setattr(headless, "HttpCache",
+                        lambda manager: HttpCache(manager, f"{tmp_path}/http/", 1024 * 1024))
+    path: Path = tmp_path / f"{IMG_ID}.jpg"
+    # assert
+    assert commands.main(["download", str(path)]) == 0
+    assert path.read_bytes() == DATA
+    monkeypatch.setattr(commands, "get_settings_arg", lambda key: (True, ""))
+    assert commands.main(["download", str(tmp_path / "missing.jpg")]) == 1
+    assert not (tmp_path / "missing.jpg").exists()
+    # clean
+    server.shutdown()
@@ -0,0 +1,95 @@
+import json
+import random
+import string
+import time
+from pathlib import Path
+
+from PySide6.QtCore import QCoreApplication
+
+from splasher.config.settings import SettingsStore, get_settings_store
+
+
+def random_str(length: int = random.randint(5, 10)) -> str:
+    """
+    Randomly generate a string which contains 5-10 characters.
+    :return: random string name
+    """
+    return "".join(random.choice(string.ascii_letters) for _ in range(length))
+
+
+def test_get_settings_store(tmp_path: Path) -> None:
+    """
+    Test function "get_settings_store".
+    The same file path always returns the same store.
+    """
+    tmp_file: str = str((tmp_path / f"{random_str()}.json").resolve())
+    # assert
+    assert get_settings_store(tmp_file) is get_settings_store(tmp_file)
+
+
+def test_settings_store(tmp_path: Path) -> None:
+    """
+    Test class "SettingsStore".
+    Create a temporary json file and read a value,
+    change the file behind the store's back to check that reads are served from memory,
+    modify a value with coalescing disabled to check that it is written through to the file.
+    """
+    dict_key: str = random_str()
+    dict_value: str = random_str()
+    tmp_file: Path = tmp_path / f"{random_str()}.json"
+    tmp_file.write_text(json.dumps({dict_key: ""}))
+    store: SettingsStore = SettingsStore(str(tmp_file.resolve()), flush_interval=0)
+    # assert
+    assert store.get(dict_key) == (True, "")
+    tmp_file.write_text(json.dumps({dict_key: "changed"}))
+    assert store.get(dict_key) == (True, "")
+    assert store.set("123", dict_value) is False
+    assert store.set(dict_key, dict_value) is True
+    assert store.get(dict_key) == (True, dict_value)
+    assert json.loads(tmp_file.read_text()) == {dict_key: dict_value}
+    # clean
+    tmp_file.unlink()
+
+
+def test_settings_store_coalesce(tmp_path: Path) -> None:
+    """
+    Test the coalesced writes of class "SettingsStore".
+    Modify two values within the flush window, check that the file is untouched and both updates are in the journal,
+    then run the event loop until the window ends and check that both values are committed together.
+    """
+    app: QCoreApplication = QCoreApplication.instance() or QCoreApplication([])
+    tmp_file: Path = tmp_path / f"{random_str()}.json"
+    tmp_file.write_text(json.dumps({"A": "", "B": ""}))
+    store: SettingsStore = SettingsStore(str(tmp_file.resolve()), flush_interval=50)
+    # assert
+    assert store.set("A", "a") is True
+    assert store.set("B", "b") is True
+    assert json.loads(tmp_file.read_text()) == {"A": "", "B": ""}
+    assert len(Path(store.journal_path).read_text().splitlines()) == 2
+    deadline: float = time.monotonic() + 2
+    while Path(store.journal_path).exists() and time.monotonic() < deadline:
+        app.processEvents()
+    assert json.loads(tmp_file.read_text()) == {"A": "a", "B": "b"}
+    assert Path(store.journal_path).exists() is False
+    # clean
+    tmp_file.unlink()
+
+
+def test_settings_store_journal(tmp_path: Path) -> None:
+    """
+    Test the journal replay of class "SettingsStore".
+    Simulate a run that was killed before flushing, including a half-written last line,
+    check that a new store replays the journal into the file and removes it.
+    """
+    tmp_file: Path = tmp_path / f"{random_str()}.json"
+    tmp_file.write_text(json.dumps({"A": "", "B": ""}))
+    journal: Path = tmp_path / f"{tmp_file.name}.journal"
+    journal.write_text(json.dumps(["A", "a"]) + "\n" + json.dumps(["B", "b"]) + "\n" + '["B", "brok')
+    store: SettingsStore = SettingsStore(str(tmp_file.resolve()))
+    # assert
+    assert store.get("A") == (True, "a")
+    assert store.get("B") == (True, "b")
+    assert json.loads(tmp_file.read_text()) == {"A": "a", "B": "b"}
+    assert journal.exists() is False
+    # clean
+    tmp_file.unlink()
@@ -0,0 +1,215 @@
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from PySide6.QtCore import ClassInfo, QByteArray, QCoreApplication, QObject, Slot
+from PySide6.QtDBus import QDBusConnection, QDBusMessage, QDBusVariant
+
+from splasher.desktop import DBusBackend, GnomeBackend, KdeBackend, XfceBackend, dconf_changeset
+
+# the channel file of xfconf with two monitors
+CHANNEL: str = """<?xml version="1.0" encoding="UTF-8"?>
+<channel name="xfce4-desktop" version="1.0">
+  <property name="backdrop" type="empty">
+    <property name="screen0" type="empty">
+      <property name="monitorDP-1" type="empty">
+        <property name="workspace0" type="empty">
+          <property name="last-image" type="string" value="/old.jpg"/>
+        </property>
+      </property>
+      <property name="monitorDP-2" type="empty">
+        <property name="workspace0" type="empty">
+          <property name="image-style" type="int" value="5"/>
+          <property name="last-image" type="string" value="/old.jpg"/>
+        </property>
+      </property>
+    </property>
+  </property>
+</channel>
+"""
+
+
+@ClassInfo({"D-Bus Interface": "org.kde.PlasmaShell"})
+class PlasmaShell(QObject):
+    """
+    A stand-in for the scripting interface of Plasma.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.scripts: list[str] = []
+
+    @Slot(str)
+    def evaluateScript(self, script: str) -> None:  # pylint: disable=invalid-name
+        """
+        Record the script.
+        """
+        self.scripts.append(script)
+
+
+@ClassInfo({"D-Bus Interface": "org.freedesktop.portal.Settings"})
+class Portal(QObject):
+    """
+    A stand-in for the settings portal which prefers the dark scheme.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.reads: int = 0
+
+    @Slot(str, str, result=QDBusVariant)
+    def Read(self, namespace: str, key: str) -> QDBusVariant:  # pylint: disable=invalid-name
+        """
+        Answer "prefer dark" wrapped twice, like the real portal.
+        """
+        self.reads += 1
+        return QDBusVariant(QDBusVariant(1))
+
+
+@ClassInfo({"D-Bus Interface": "ca.desrt.dconf.Writer"})
+class Writer(QObject):
+    """
+    A stand-in for the dconf writer.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.changes: list[bytes] = []
+
+    @Slot(QByteArray, result=str)
+    def Change(self, blob: QByteArray) -> str:  # pylint: disable=invalid-name
+        """
+        Record the changeset.
+        """
+        self.changes.append(bytes(blob.data()))
+        return "tag"
+
+
+@ClassInfo({"D-Bus Interface": "org.xfce.Xfconf"})
+class Xfconf(QObject):
+    """
+    A stand-in for xfconf.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.properties: dict[str, str] = {}
+
+    @Slot(str, str, QDBusVariant)
+    def SetProperty(self, channel: str, key: str, value: QDBusVariant) -> None:  # pylint: disable=invalid-name
+        """
+        Record the property.
+        """
+        self.properties[f"{channel}{key}"] = value.variant()
+
+
+@pytest.fixture(name="bus")
+def fixture_bus() -> Iterator[str]:
+    """
+    Run a private session bus, the real one is never touched.
+    """
+    if shutil.which("dbus-daemon") is None:
+        pytest.skip("dbus-daemon is not installed")
+    daemon: subprocess.Popen = subprocess.Popen(["dbus-daemon", "--session", "--nofork", "--print-address=1"],
+                                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    yield daemon.stdout.readline().strip()
+    daemon.kill()
+    daemon.wait()
+
+
+def wait(app: QCoreApplication, backend: DBusBackend, results: list[str]) -> None:
+    """
+    Wait until the backend has answered.
+    """
+    deadline: float = time.monotonic() + 10
+    while not results and time.monotonic() < deadline:
+        app.processEvents()
+    assert not backend.busy()
+
+
+def test_dconf_changeset() -> None:
+    """
+    Test function "dconf_changeset", the bytes are the same as GLib serializes "{'/a': @mv <'b'>}".
+    """
+    assert dconf_changeset({"/a": "b"}) == b"/a\0\0\0\0\0\0b\0\0s\0\x03\x0e"
+
+
+def test_dbus_backends(bus: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test classes "KdeBackend", "GnomeBackend" and "XfceBackend" against stand-ins of the desktop services
+    on a private bus. Plasma receives the script, a dark scheme writes 'picture-uri-dark' to dconf,
+    every monitor of XFCE gets the image, and a missing service fails without blocking.
+    """
+    app: QCoreApplication = QCoreApplication.instance() or QCoreApplication([])
+    server: QDBusConnection = QDBusConnection.connectToBus(bus, "desktop")
+    shell, portal, writer, xfconf = PlasmaShell(), Portal(), Writer(), Xfconf()
+    for service, path, obj in (("org.kde.plasmashell", "/PlasmaShell", shell),
+                               ("org.freedesktop.portal.Desktop", "/org/freedesktop/portal/desktop", portal),
+                               ("ca.desrt.dconf", "/ca/desrt/dconf/Writer/user", writer),
+                               ("org.xfce.Xfconf", "/org/xfce/Xfconf", xfconf)):
+        assert server.registerService(service)
+        assert server.registerObject(path, obj, QDBusConnection.ExportAllSlots)
+    client: QDBusConnection = QDBusConnection.connectToBus(bus, "splasher")
+    results: list[str] = []
+    # ======== KDE ========
+    kde: KdeBackend = KdeBackend(connection=client)
+    kde.applied.connect(results.append)
+    kde.apply("/tmp/a.jpg", {"1920,0": "/tmp/b.jpg"})
+    assert kde.busy()
+    wait(app, kde, results)
+    # assert
+    assert results == ["/tmp/a.jpg"]
+    assert "'1920,0': 'file:///tmp/b.jpg'" in shell.scripts[0]
+    assert "|| 'file:///tmp/a.jpg'" in shell.scripts[0]
+    # ======== GNOME ========
+    results.clear()
+    gnome: GnomeBackend = GnomeBackend(connection=client)
+    gnome.applied.connect(results.append)
+    gnome.apply("/tmp/a.jpg")
+    wait(app, gnome, results)
+    # assert
+    assert results == ["/tmp/a.jpg"]
+    assert writer.changes == [dconf_changeset({"/org/gnome/desktop/background/picture-uri-dark": "file:///tmp/a.jpg"})]
+    # the scheme is followed, it is not read again
+    results.clear()
+    changed: QDBusMessage = QDBusMessage.createSignal("/org/freedesktop/portal/desktop",
+                                                      "org.freedesktop.portal.Settings", "SettingChanged")
+    changed.setArguments(["org.freedesktop.appearance", "color-scheme", QDBusVariant(0)])
+    server.send(changed)
+    deadline: float = time.monotonic() + 10
+    while gnome.state().endswith("dark") and time.monotonic() < deadline:
+        app.processEvents()
+    gnome.apply("/tmp/b.jpg")
+    wait(app, gnome, results)
+    assert results == ["/tmp/b.jpg"]
+    assert writer.changes[-1] == dconf_changeset({"/org/gnome/desktop/background/picture-uri": "file:///tmp/b.jpg"})
+    assert portal.reads == 1
+    # ======== XFCE ========
+    results.clear()
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+    (tmp_path / "xfce4/xfconf/xfce-perchannel-xml").mkdir(parents=True)
+    (tmp_path / "xfce4/xfconf/xfce-perchannel-xml/xfce4-desktop.xml").write_text(CHANNEL)
+    xfce: XfceBackend = XfceBackend(connection=client)
+    xfce.applied.connect(results.append)
+    xfce.apply("/tmp/a.jpg")
+    wait(app, xfce, results)
+    # assert
+    assert results == ["/tmp/a.jpg"]
+    assert xfconf.properties == {
+        "xfce4-desktop/backdrop/screen0/monitorDP-1/workspace0/last-image": "/tmp/a.jpg",
+        "xfce4-desktop/backdrop/screen0/monitorDP-2/workspace0/last-image": "/tmp/a.jpg",
+    }
+    # ======== no service ========
+    results.clear()
+    server.unregisterService("org.kde.plasmashell")
+    kde.failed.connect(lambda path, msg: results.append(msg))
+    kde.apply("/tmp/a.jpg")
+    wait(app, kde, results)
+    # assert
+    assert results == ["Failed to set the wallpaper through Plasma"]
+    # clean
+    QDBusConnection.disconnectFromBus("desktop")
+    QDBusConnection.disconnectFromBus("splasher")
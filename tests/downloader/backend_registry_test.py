@@ -0,0 +1,97 @@
+import json
+import struct
+import time
+from pathlib import Path
+
+import pytest
+from PySide6.QtCore import QCoreApplication
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+from splasher.desktop import CinnamonBackend, GnomeBackend, PortalBackend, SwayBackend
+from splasher.downloader import BackendRegistry
+
+HEADER: struct.Struct = struct.Struct("=6sII")
+
+
+class Sway:
+    """
+    A stand-in for the IPC socket of sway with two outputs side by side.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.server: QLocalServer = QLocalServer()
+        self.server.listen(path)
+        self.server.newConnection.connect(self.on_connection)
+        self.commands: list[str] = []
+
+    def on_connection(self) -> None:
+        """
+        Answer the messages of a client.
+        """
+        socket: QLocalSocket = self.server.nextPendingConnection()
+
+        def on_ready_read() -> None:
+            data: bytes = socket.readAll().data()
+            _, length, kind = HEADER.unpack_from(data)
+            payload: str = data[HEADER.size:HEADER.size + length].decode()
+            if kind == 3:
+                reply: list = [{"name": "DP-1", "rect": {"x": 0, "y": 0}},
+                               {"name": "DP-2", "rect": {"x": 1920, "y": 0}}]
+            else:
+                self.commands.append(payload)
+                reply = [{"success": True}]
+            body: bytes = json.dumps(reply).encode()
+            socket.write(HEADER.pack(b"i3-ipc", len(body), kind) + body)
+
+        socket.readyRead.connect(on_ready_read)
+
+
+def test_detect(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test method "BackendRegistry.detect", the desktop is detected once and unknown desktops use the portal.
+    """
+    monkeypatch.delenv("SWAYSOCK", raising=False)
+    for desktop, backend_class in (("ubuntu:GNOME", GnomeBackend), ("X-Cinnamon", CinnamonBackend),
+                                   ("Unknown", PortalBackend), ("", PortalBackend)):
+        monkeypatch.setenv("XDG_CURRENT_DESKTOP", desktop)
+        registry: BackendRegistry = BackendRegistry()
+        # assert
+        assert isinstance(registry.detect(), backend_class)
+        monkeypatch.setenv("XDG_CURRENT_DESKTOP", "KDE")
+        assert isinstance(registry.detect(), backend_class)
+    assert registry.capabilities == {"name": "generic", "desktops": [], "per_screen": False}
+
+
+def test_backend_registry(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, app: QCoreApplication) -> None:
+    """
+    Test class "BackendRegistry" with the sway backend.
+    'apply' does not wait for the desktop, each output gets the image of its position and the time is recorded.
+    """
+    sway: Sway = Sway(str(tmp_path / "sway.sock"))
+    monkeypatch.setenv("XDG_CURRENT_DESKTOP", "")
+    monkeypatch.setenv("SWAYSOCK", str(tmp_path / "sway.sock"))
+    registry: BackendRegistry = BackendRegistry()
+    results: list[str] = []
+    registry.applied.connect(lambda path, elapsed: results.append(path))
+    registry.failed.connect(results.append)
+    registry.apply("/tmp/a.jpg", {"1920,0": "/tmp/b.jpg"})
+    # assert
+    assert isinstance(registry.backend, SwayBackend)
+    assert registry.busy()
+    deadline: float = time.monotonic() + 10
+    while not results and time.monotonic() < deadline:
+        app.processEvents()
+    assert results == ["/tmp/a.jpg"]
+    assert sway.commands == ['output "DP-1" bg "/tmp/a.jpg" fill; output "DP-2" bg "/tmp/b.jpg" fill']
+    assert registry.stats()["sway"]["count"] == 1
+    assert not registry.busy()
+    # ======== sway is gone ========
+    results.clear()
+    sway.server.close()
+    registry.apply("/tmp/a.jpg")
+    deadline = time.monotonic() + 10
+    while not results and time.monotonic() < deadline:
+        app.processEvents()
+    # assert
+    assert results == ["Failed to set the wallpaper through sway."]
+    assert registry.stats()["sway"]["failures"] == 1
@@ -0,0 +1,43 @@
+import json
+import os
+import time
+from pathlib import Path
+
+from PySide6.QtCore import QCoreApplication
+
+from splasher.downloader import CacheManager
+
+
+def test_cache_manager(tmp_path: Path, app: QCoreApplication) -> None:  # pylint: disable=unused-argument
+    """
+    Test class "CacheManager".
+    Fill a temporary cache folder with images of different access times,
+    check that the index is built from the folder on the first load,
+    then touch a new image and check that the least recently accessed images are evicted,
+    except the pinned one and the one in use, and that the index is only written by a flush.
+    """
+    subfolder: Path = tmp_path / "unsplash"
+    subfolder.mkdir()
+    for i in range(4):
+        img: Path = subfolder / f"photo-{i}.jpg"
+        img.write_bytes(b"0" * 100)
+        os.utime(img, (time.time() - 100 + i, time.time() - 100 + i))
+    manager: CacheManager = CacheManager(f"{tmp_path}/", "unsplash/", max_bytes=1000, max_entries=3,
+                                         current=lambda: {"unsplash/photo-1.jpg"})
+    index: Path = tmp_path / "index.json"
+    # assert
+    assert sorted(manager.load()) == [f"unsplash/photo-{i}.jpg" for i in range(4)]
+    assert index.exists() is False
+    assert manager.flush() is True
+    assert index.exists() is True
+    manager.pin("unsplash/photo-0.jpg")
+    (subfolder / "photo-4.jpg").write_bytes(b"0" * 100)
+    manager.touch("unsplash/photo-4.jpg")
+    manager.touch("unsplash/photo-4.jpg")
+    assert sorted(p.name for p in subfolder.iterdir()) == ["photo-0.jpg", "photo-1.jpg", "photo-4.jpg"]
+    assert len(json.loads(index.read_text())) == 4  # not written yet
+    assert manager.timer.isActive()
+    manager.flush()
+    assert sorted(json.loads(index.read_text())) == [
+        "unsplash/photo-0.jpg", "unsplash/photo-1.jpg", "unsplash/photo-4.jpg"
+    ]
@@ -0,0 +1,60 @@
+import http.server
+import threading
+from typing import Callable, Iterator
+
+import pytest
+from PySide6.QtCore import QCoreApplication, QObject
+from PySide6.QtNetwork import QNetworkAccessManager
+
+
+class Window(QObject):
+    """
+    The minimal parent a downloader needs, it records status bar messages.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.manager: QNetworkAccessManager = QNetworkAccessManager(self)
+        self.messages: list[str] = []
+
+    def show_message(self, msg: str, timeout: int = 5000) -> None:  # pylint: disable=unused-argument
+        """
+        Record status bar messages.
+        """
+        self.messages.append(msg)
+
+
+@pytest.fixture(name="app")
+def fixture_app() -> QCoreApplication:
+    """
+    The application, tests run its event loop by 'processEvents'.
+    """
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture(name="window")
+def fixture_window(app: QCoreApplication) -> Window:  # pylint: disable=unused-argument
+    """
+    A new parent for the downloaders of a test.
+    """
+    return Window()
+
+
+@pytest.fixture(name="http_server")
+def fixture_http_server() -> Iterator[Callable[[type], http.server.ThreadingHTTPServer]]:
+    """
+    Start local stand-ins for servers, they are shut down after the test.
+    :return: a function which starts a server on a free port with a request handler class
+    """
+    servers: list[http.server.ThreadingHTTPServer] = []
+
+    def start(handler: type) -> http.server.ThreadingHTTPServer:
+        server: http.server.ThreadingHTTPServer = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,86 @@
+import http.server
+import time
+from typing import Callable
+
+from conftest import Window
+from PySide6.QtCore import QCoreApplication, QUrl
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+
+from splasher.downloader import ConnectionWarmer, PreviewFetcher
+
+
+class KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for the image server which keeps connections alive and counts them.
+    """
+    protocol_version: str = "HTTP/1.1"
+    connections: int = 0
+
+    def setup(self) -> None:
+        """
+        Count a new connection.
+        """
+        super().setup()
+        KeepAliveHandler.connections += 1
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Serve a small body.
+        """
+        self.send_response(200)
+        self.send_header("Content-Length", "4")
+        self.end_headers()
+        self.wfile.write(b"data")
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        """
+        Keep the test output quiet.
+        """
+
+
+def test_connection_warmer(app: QCoreApplication, http_server: Callable) -> None:
+    """
+    Test class "ConnectionWarmer".
+    A warmed connection is opened before the request and reused by it,
+    repeated warm-ups do not open more connections, and the time to first byte is recorded as warm.
+    """
+    server: http.server.ThreadingHTTPServer = http_server(KeepAliveHandler)
+    url: str = f"http://127.0.0.1:{server.server_port}/"
+    manager: QNetworkAccessManager = QNetworkAccessManager()
+    warmer: ConnectionWarmer = ConnectionWarmer()
+    warmer.warm(manager, [url, url, "https://127.0.0.1:9/"])  # nothing listens on the HTTPS one
+    deadline: float = time.monotonic() + 10
+    while not KeepAliveHandler.connections and time.monotonic() < deadline:
+        app.processEvents()
+    # assert
+    assert KeepAliveHandler.connections == 1
+    warmer.warm(manager, [url])  # too soon
+    reply: QNetworkReply = manager.get(QNetworkRequest(QUrl(url)))
+    sent: float = time.monotonic()
+    while not reply.isFinished() and time.monotonic() < deadline:
+        app.processEvents()
+    warmer.record_ttfb(QUrl(url), (time.monotonic() - sent) * 1000)
+    warmer.record_ttfb(QUrl("https://example.com/"), 100)
+    assert bytes(reply.readAll().data()) == b"data"
+    assert KeepAliveHandler.connections == 1
+    assert warmer.stats()["warm"]["count"] == 1
+    assert warmer.stats()["cold"] == {"count": 1, "avg_ms": 100}
+
+
+def test_keep_alive(app: QCoreApplication, window: Window) -> None:
+    """
+    Test the requests of the scheduler, they allow HTTP/2 and leave the 'Connection' header to Qt.
+    """
+    replies: list[QNetworkReply] = []
+    fetcher: PreviewFetcher = PreviewFetcher(window)
+    fetcher.get(QNetworkRequest(QUrl("http://127.0.0.1:9/")), replies.append)
+    deadline: float = time.monotonic() + 10
+    while not replies and time.monotonic() < deadline:
+        app.processEvents()
+    request: QNetworkRequest = replies[0].request()
+    # assert
+    assert request.attribute(QNetworkRequest.Http2AllowedAttribute) is True
+    assert request.hasRawHeader("Connection") is False
+    # clean
+    fetcher.cancel()
+    replies[0].abort()
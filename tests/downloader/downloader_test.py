@@ -0,0 +1,84 @@
+import http.server
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+from conftest import Window
+from PySide6.QtCore import QCoreApplication, QUrl
+from PySide6.QtNetwork import QNetworkReply, QNetworkRequest
+
+from splasher.downloader.downloader import READ_BUFFER_SIZE, Downloader
+
+DATA: bytes = os.urandom(4 * READ_BUFFER_SIZE)
+
+
+class ChunkedHandler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for the image server, it sends 'DATA' in several chunks.
+    '/broken' closes the connection halfway through the body.
+    """
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Serve 'DATA' chunk by chunk.
+        """
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(DATA)))
+        self.end_headers()
+        chunk: int = len(DATA) // 8
+        for start in range(0, len(DATA) // 2 if self.path == "/broken" else len(DATA), chunk):
+            self.wfile.write(DATA[start:start + chunk])
+            self.wfile.flush()
+            time.sleep(0.02)
+        self.close_connection = True
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        """
+        Keep the test output quiet.
+        """
+
+
+def download(app: QCoreApplication, window: Window, url: str, path: Path) -> tuple[bool, list[bool]]:
+    """
+    Stream the url into the path and wait until the reply finishes.
+    :return: whether the target has been replaced, and whether the target existed at each chunk
+    """
+    finished: list[bool] = []
+    chunks: list[bool] = []
+
+    def started(reply: QNetworkReply) -> None:
+        downloader.run(reply)
+        downloader.stream(str(path))
+        reply.readyRead.connect(lambda: chunks.append(path.exists()))
+        reply.finished.connect(lambda: finished.append(downloader.finish_stream()))
+
+    downloader: Downloader = Downloader(window)
+    downloader.retry_policy = None
+    downloader.get(QNetworkRequest(QUrl(url)), started)
+    deadline: float = time.monotonic() + 10
+    while not finished and time.monotonic() < deadline:
+        app.processEvents()
+    return finished[0], chunks
+
+
+def test_stream(tmp_path: Path, app: QCoreApplication, window: Window, http_server: Callable) -> None:
+    """
+    Test the streaming mode of "Downloader".
+    The body arrives in several chunks and only replaces the target once it is complete,
+    a broken transfer leaves the previous file untouched.
+    """
+    server: http.server.ThreadingHTTPServer = http_server(ChunkedHandler)
+    path: Path = tmp_path / "photo.jpg"
+    # assert
+    res, chunks = download(app, window, f"http://127.0.0.1:{server.server_port}/photo", path)
+    assert res is True
+    assert len(chunks) > 1
+    assert not any(chunks)  # the target only appears once the body is complete
+    assert path.read_bytes() == DATA
+    path.write_bytes(b"previous")
+    res, chunks = download(app, window, f"http://127.0.0.1:{server.server_port}/broken", path)
+    assert res is False
+    assert chunks
+    assert path.read_bytes() == b"previous"
+    assert [child.name for child in tmp_path.iterdir()] == ["photo.jpg"]  # no temporary file is left
@@ -0,0 +1,116 @@
+import http.server
+import os
+import random
+import string
+import time
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from conftest import Window
+from PySide6.QtCore import QCoreApplication, QUrl
+from PySide6.QtNetwork import QNetworkRequest
+
+from splasher.downloader import EndpointSelector, RetryPolicy, WallpaperDownloader, endpoint_selector
+
+DATA: bytes = os.urandom(64 * 1024)
+
+
+def random_str(length: int = random.randint(5, 10)) -> str:
+    """
+    Randomly generate a string which contains 5-10 characters.
+    :return: random string name
+    """
+    return "".join(random.choice(string.ascii_letters) for _ in range(length))
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for an image endpoint, the slow one takes a while to answer.
+    """
+    requests: list[tuple[int, str]] = []
+
+    def answer(self, body: bool) -> None:
+        """
+        Record the request, then serve 'DATA'.
+        :param body: whether to send the body
+        """
+        self.requests.append((self.server.server_port, self.command))
+        if getattr(self.server, "slow", False):
+            time.sleep(0.3)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(DATA)))
+        self.end_headers()
+        if body:
+            self.wfile.write(DATA)
+
+    def do_HEAD(self) -> None:  # pylint: disable=invalid-name
+        """
+        Answer a race or a probe.
+        """
+        self.answer(False)
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Serve the image.
+        """
+        self.answer(True)
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        """
+        Keep the test output quiet.
+        """
+
+
+def download(app: QCoreApplication, window: Window, url: str, path: Path) -> None:
+    """
+    Download an image and wait until it is over.
+    """
+    window.messages.clear()
+    downloader: WallpaperDownloader = WallpaperDownloader(window)
+    downloader.retry_policy = RetryPolicy(base_delay=20, max_delay=100, budget=10000)
+    downloader.download(QNetworkRequest(QUrl(url)), str(path))
+    deadline: float = time.monotonic() + 10
+    while not window.messages[-1:] == ["Download and save the wallpaper successfully."] \
+            and time.monotonic() < deadline:
+        app.processEvents()
+
+
+def test_endpoint_selector(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, app: QCoreApplication, window: Window,
+                           http_server: Callable) -> None:
+    """
+    Test class "EndpointSelector".
+    The first request goes to the first endpoint and races the other one, which turns out to be faster,
+    when the faster endpoint goes down, the retries of a request fail over to the slow one.
+    """
+    servers: list[http.server.ThreadingHTTPServer] = []
+    for slow in (True, False):
+        server: http.server.ThreadingHTTPServer = http_server(Handler)
+        server.slow = slow
+        servers.append(server)
+    slow_url, fast_url = (f"http://127.0.0.1:{server.server_port}/" for server in servers)
+    selector: EndpointSelector = EndpointSelector(endpoints=[slow_url, fast_url])
+    monkeypatch.setattr(endpoint_selector, "selector", selector)
+    # ======== race ========
+    url: str = selector.route("photo", window.manager)
+    download(app, window, url, tmp_path / f"{random_str()}.jpg")
+    deadline: float = time.monotonic() + 10
+    while selector.probing and time.monotonic() < deadline:
+        app.processEvents()
+    # assert
+    assert url == f"{slow_url}photo"
+    assert (servers[1].server_port, "HEAD") in Handler.requests
+    assert selector.report()[fast_url]["samples"] >= 1  # the GET may already be rerouted to the winner
+    assert selector.report()[slow_url]["latency_ms"] > selector.report()[fast_url]["latency_ms"]
+    assert selector.route("photo", window.manager) == f"{fast_url}photo"
+    # ======== fail over ========
+    servers[1].shutdown()
+    servers[1].server_close()
+    Handler.requests.clear()
+    path: Path = tmp_path / f"{random_str()}.jpg"
+    download(app, window, selector.route("photo", window.manager), path)
+    # assert
+    assert path.read_bytes() == DATA
+    assert (servers[0].server_port, "GET") in Handler.requests
+    assert selector.report()[fast_url]["healthy"] is False
+    assert selector.route("photo") == f"{slow_url}photo"
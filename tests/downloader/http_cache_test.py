@@ -0,0 +1,87 @@
+import http.server
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+from conftest import Window
+from PySide6.QtCore import QCoreApplication, QUrl
+from PySide6.QtNetwork import QNetworkReply, QNetworkRequest
+
+from splasher.downloader import HttpCache
+from splasher.downloader.downloader import Downloader
+
+DATA: bytes = os.urandom(64 * 1024)
+
+
+class CacheableHandler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for the image server, its responses are stale at once,
+    so they must be revalidated before they are reused.
+    """
+    requests: list[str] = []
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Serve 'DATA', or answer 304 if the client already has it.
+        """
+        etag: str = self.headers.get("If-None-Match", "")
+        self.requests.append(etag)
+        if etag == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Expires", "Thu, 01 Jan 1970 00:00:00 GMT")
+        self.send_header("Content-Length", str(len(DATA)))
+        self.end_headers()
+        self.wfile.write(DATA)
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        """
+        Keep the test output quiet.
+        """
+
+
+def get(app: QCoreApplication, window: Window, request: QNetworkRequest) -> bytes:
+    """
+    Send the request through a downloader and wait for the body.
+    """
+    replies: list[QNetworkReply] = []
+    Downloader(window).get(request, replies.append)
+    deadline: float = time.monotonic() + 10
+    while not (replies and replies[0].isFinished()) and time.monotonic() < deadline:
+        app.processEvents()
+    app.processEvents()
+    return bytes(replies[0].readAll().data())
+
+
+def test_http_cache(tmp_path: Path, app: QCoreApplication, window: Window, http_server: Callable) -> None:
+    """
+    Test class "HttpCache".
+    The first request is a miss, the second one is revalidated and answered by the cache,
+    the third one prefers the cache and does not reach the server at all,
+    a scaled variant is stored and preferred the next time, an original is downloaded without being stored.
+    """
+    server: http.server.ThreadingHTTPServer = http_server(CacheableHandler)
+    url: QUrl = QUrl(f"http://127.0.0.1:{server.server_port}/photo")
+    cache: HttpCache = HttpCache(window.manager, f"{tmp_path}/http/", 1024 * 1024)
+    window.manager.setCache(cache)
+    # assert
+    assert get(app, window, QNetworkRequest(url)) == DATA
+    assert cache.cached(url) is True
+    assert get(app, window, QNetworkRequest(url)) == DATA
+    assert CacheableHandler.requests == ["", '"v1"']
+    assert get(app, window, cache.prefer_cache(QNetworkRequest(url))) == DATA
+    assert len(CacheableHandler.requests) == 2
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+    variant: QUrl = QUrl(f"http://127.0.0.1:{server.server_port}/photo?w=1920&h=1080&dpr=1")
+    assert get(app, window, cache.prefer_cache(QNetworkRequest(variant))) == DATA
+    assert get(app, window, cache.prefer_cache(QNetworkRequest(variant))) == DATA
+    assert len(CacheableHandler.requests) == 3
+    original: QUrl = QUrl(f"http://127.0.0.1:{server.server_port}/original")
+    assert get(app, window, HttpCache.no_store(QNetworkRequest(original))) == DATA
+    assert cache.cached(original) is False
@@ -0,0 +1,38 @@
+from splasher.downloader.network_estimator import DEFAULT_TIMEOUT, MAX_TIMEOUT, MIN_TIMEOUT, NetworkEstimator
+
+
+def test_network_estimator() -> None:
+    """
+    Test class "NetworkEstimator".
+    An unknown host gets the default timeout, a measured host gets a timeout from its latency and throughput,
+    which doubles after a timeout and is reset by the next answer.
+    """
+    estimator: NetworkEstimator = NetworkEstimator()
+    # assert
+    assert estimator.timeout("example.com") == DEFAULT_TIMEOUT
+    # a fast host is bounded below
+    estimator.record_latency("example.com", 50)
+    assert estimator.timeout("example.com", 0) == MIN_TIMEOUT
+    # a slow but steady host: the latency and its deviation
+    for _ in range(50):
+        estimator.record_latency("slow.example.com", 1000)
+    assert estimator.timeout("slow.example.com", 0) == MIN_TIMEOUT
+    estimator.record_latency("slow.example.com", 4000)
+    assert estimator.timeout("slow.example.com", 0) == int(1375 + 4 * 750)
+    # a slow transfer: 64KB at 4 bytes/ms take 16s
+    estimator.record_transfer("slow.example.com", 1024, 1)  # too small to be measured
+    assert estimator.stats()["slow.example.com"]["throughput_kbps"] == 0
+    estimator.record_transfer("slow.example.com", 160 * 1024, 40 * 1024)
+    assert estimator.timeout("slow.example.com", 0) == 4375
+    assert estimator.timeout("slow.example.com", 32 * 1024) == 8192
+    assert estimator.timeout("slow.example.com") == 16384
+    # back off after timeouts
+    estimator.record_timeout("slow.example.com")
+    assert estimator.timeout("slow.example.com", 0) == 8750
+    for _ in range(10):
+        estimator.record_timeout("slow.example.com")
+    assert estimator.timeout("slow.example.com", 0) == MAX_TIMEOUT
+    estimator.record_timeout("unknown.example.com")
+    assert estimator.timeout("unknown.example.com") == 2 * DEFAULT_TIMEOUT
+    estimator.record_latency("slow.example.com", 1375)
+    assert estimator.timeout("slow.example.com", 0) < 8750
@@ -0,0 +1,162 @@
+import http.server
+import os
+import random
+import string
+import time
+from pathlib import Path
+from typing import Callable
+
+from conftest import Window
+from PySide6.QtCore import QByteArray, QCoreApplication, QIODevice, QUrl
+from PySide6.QtNetwork import QNetworkReply, QNetworkRequest
+
+from splasher.downloader.downloader import Downloader
+from splasher.downloader.partial_download import PartialDownload
+
+DATA: bytes = os.urandom(512 * 1024)
+
+
+def random_str(length: int = random.randint(5, 10)) -> str:
+    """
+    Randomly generate a string which contains 5-10 characters.
+    :return: random string name
+    """
+    return "".join(random.choice(string.ascii_letters) for _ in range(length))
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for the image server, it supports 'Range' and 'If-Range'.
+    The first response stalls in the middle, so the client can give up on it like on a timeout.
+    """
+    ranges: list[str] = []
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Serve 'DATA', either in full or from the requested offset.
+        """
+        byte_range: str = self.headers.get("Range", "")
+        self.ranges.append(byte_range)
+        start: int = 0
+        if byte_range and self.headers.get("If-Range") == '"v1"':
+            start = int(byte_range[len("bytes="):-1])
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(DATA) - 1}/{len(DATA)}")
+        else:
+            self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(DATA) - start))
+        self.end_headers()
+        try:
+            if len(self.ranges) == 1:  # stall the first transfer
+                self.wfile.write(DATA[:len(DATA) // 2])
+                self.wfile.flush()
+                time.sleep(1)
+                self.wfile.write(DATA[len(DATA) // 2:])
+            else:
+                self.wfile.write(DATA[start:])
+        except OSError:  # the client gave up
+            self.close_connection = True
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        """
+        Keep the test output quiet.
+        """
+
+
+class BusyHandler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for an overloaded image server, it answers with an error page.
+    """
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Serve the error page.
+        """
+        self.send_response(503)
+        self.send_header("Content-Length", "4")
+        self.end_headers()
+        self.wfile.write(b"busy")
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        """
+        Keep the test output quiet.
+        """
+
+
+def download(app: QCoreApplication, window: Window, url: str, path: str, stop: int = 0) -> None:
+    """
+    Download the url to the path and wait until the reply finishes.
+    :param stop: abort the reply once this many bytes have been written, 0 means never
+    """
+    finished: list[bool] = []
+
+    def started(reply: QNetworkReply) -> None:
+        downloader.run(reply)
+        downloader.stream()
+        if stop:
+            reply.readyRead.connect(lambda: downloader.partial.file.pos() >= stop and reply.abort())
+        reply.finished.connect(lambda: finished.append(downloader.finish_stream()))
+
+    downloader: Downloader = Downloader(window)
+    downloader.retry_policy = None
+    downloader.resume(path)
+    downloader.get(QNetworkRequest(QUrl(url)), started)
+    deadline: float = time.monotonic() + 10
+    while not finished and time.monotonic() < deadline:
+        app.processEvents()
+
+
+def test_resume_download(tmp_path: Path, app: QCoreApplication, window: Window, http_server: Callable) -> None:
+    """
+    Test the resumable mode of "Downloader".
+    The first download is aborted in the middle and leaves a partial file with its validators,
+    the second download only asks for the missing bytes and completes the image.
+    """
+    server: http.server.ThreadingHTTPServer = http_server(RangeHandler)
+    url: str = f"http://127.0.0.1:{server.server_port}/photo"
+    path: Path = tmp_path / f"{random_str()}.jpg"
+    # assert
+    download(app, window, url, str(path), stop=len(DATA) // 2)
+    assert path.exists() is False
+    assert Path(f"{path}.part").stat().st_size == len(DATA) // 2
+    assert Path(f"{path}.part.json").exists() is True
+    download(app, window, url, str(path))
+    assert RangeHandler.ranges == ["", f"bytes={len(DATA) // 2}-"]
+    assert path.read_bytes() == DATA
+    assert Path(f"{path}.part").exists() is False
+    assert Path(f"{path}.part.json").exists() is False
+    # clean
+    path.unlink()
+
+
+def test_error_page(tmp_path: Path, app: QCoreApplication, window: Window, http_server: Callable) -> None:
+    """
+    Test that the body of an error response is not appended to a partial file.
+    """
+    server: http.server.ThreadingHTTPServer = http_server(BusyHandler)
+    url: str = f"http://127.0.0.1:{server.server_port}/photo"
+    path: Path = tmp_path / f"{random_str()}.jpg"
+    Path(f"{path}.part").write_bytes(DATA[:1024])
+    Path(f"{path}.part.json").write_text(f'{{"url": "{url}", "etag": "\\"v1\\"", "last_modified": "", '
+                                         f'"length": {len(DATA)}}}')
+    # assert
+    download(app, window, url, str(path))
+    assert path.exists() is False
+    assert Path(f"{path}.part").read_bytes() == DATA[:1024]
+
+
+def test_commit(tmp_path: Path) -> None:
+    """
+    Test "PartialDownload.commit", a short file is kept for resuming and a long one is discarded.
+    """
+    path: Path = tmp_path / f"{random_str()}.jpg"
+    partial: PartialDownload = PartialDownload(str(path))
+    partial.length = 8
+    for data, kept in ((b"1234", True), (b"1234567890", False)):
+        partial.file.open(QIODevice.WriteOnly | QIODevice.Truncate)
+        partial.write(QByteArray(data))
+        # assert
+        assert partial.commit() is False
+        assert Path(f"{path}.part").exists() is kept
+        assert path.exists() is False
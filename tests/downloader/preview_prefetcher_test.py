@@ -0,0 +1,88 @@
+import http.server
+import time
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from conftest import Window
+from PySide6.QtCore import QBuffer, QCoreApplication, QIODevice, QSize
+from PySide6.QtGui import QImage
+
+from splasher.config import PATH
+from splasher.downloader import PreviewPrefetcher
+
+
+def jpeg() -> bytes:
+    """
+    Encode a small image.
+    :return: JPEG data
+    """
+    buffer: QBuffer = QBuffer()
+    buffer.open(QIODevice.WriteOnly)
+    QImage(400, 300, QImage.Format_RGB32).save(buffer, "JPG")
+    return bytes(buffer.data().data())
+
+
+class SourceHandler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for the random image source, every request is redirected to a new photo.
+    """
+    redirects: int = 0
+    data: bytes = b""
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Redirect '/random' to a new photo, or serve the photo.
+        """
+        if self.path.startswith("/random"):
+            SourceHandler.redirects += 1
+            self.send_response(302)
+            self.send_header("Location", f"/photo-{SourceHandler.redirects}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(self.data)))
+            self.end_headers()
+            self.wfile.write(self.data)
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        """
+        Keep the test output quiet.
+        """
+
+
+def wait(app: QCoreApplication, prefetcher: PreviewPrefetcher, count: int) -> None:
+    """
+    Process events until the prefetcher has the number of ready previews.
+    """
+    deadline: float = time.monotonic() + 10
+    while len(prefetcher.queue) < count and time.monotonic() < deadline:
+        app.processEvents()
+
+
+def test_preview_prefetcher(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, app: QCoreApplication, window: Window,
+                            http_server: Callable) -> None:
+    """
+    Test class "PreviewPrefetcher".
+    Fill the queue from a local source, check that the previews are decoded to the target size,
+    then take one and check that the queue is refilled with a new photo.
+    """
+    monkeypatch.setitem(PATH, "CACHE", f"{tmp_path}/")
+    (tmp_path / PATH["SUBFOLDER"]).mkdir()
+    SourceHandler.data = jpeg()
+    server: http.server.ThreadingHTTPServer = http_server(SourceHandler)
+    prefetcher: PreviewPrefetcher = PreviewPrefetcher(window, f"http://127.0.0.1:{server.server_port}/random/200x150",
+                                                      QSize(200, 150), count=2, max_in_flight=1)
+    prefetcher.refill()
+    # assert
+    assert prefetcher.in_flight == 1
+    wait(app, prefetcher, 2)
+    assert [name for name, _ in prefetcher.queue] == ["unsplash/photo-1", "unsplash/photo-2"]
+    assert all(image.size() == QSize(200, 150) for _, image in prefetcher.queue)
+    img_subpath, _ = prefetcher.take()
+    assert img_subpath == "unsplash/photo-1"
+    assert (tmp_path / f"{img_subpath}.jpg").exists() is True
+    wait(app, prefetcher, 2)
+    assert [name for name, _ in prefetcher.queue] == ["unsplash/photo-2", "unsplash/photo-3"]
+    assert SourceHandler.redirects == 3
@@ -0,0 +1,65 @@
+import http.server
+import time
+from typing import Callable
+
+from conftest import Window
+from PySide6.QtCore import QCoreApplication, QUrl
+from PySide6.QtNetwork import QNetworkReply, QNetworkRequest
+
+from splasher.downloader import RequestRegistry, get_request_registry
+from splasher.downloader.downloader import Downloader
+
+
+class SlowHandler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for the image server, it takes a while to answer.
+    """
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Wait, then serve a small body.
+        """
+        time.sleep(0.3)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Length", "4")
+            self.end_headers()
+            self.wfile.write(b"data")
+        except OSError:  # the client gave up
+            self.close_connection = True
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        """
+        Keep the test output quiet.
+        """
+
+
+def test_request_registry(app: QCoreApplication, window: Window, http_server: Callable) -> None:
+    """
+    Test class "RequestRegistry".
+    Two downloaders of the same group send a request in a row, the first one is canceled
+    and only the second one is current, the key stays busy until every reply has finished.
+    """
+    server: http.server.ThreadingHTTPServer = http_server(SlowHandler)
+    url: str = f"http://127.0.0.1:{server.server_port}/random"
+    registry: RequestRegistry = get_request_registry()
+    downloaders: list[Downloader] = []
+    replies: list[QNetworkReply] = []
+    for _ in range(2):
+        downloader: Downloader = Downloader(window)
+        registry.supersede("preview", downloader)
+        downloader.get(QNetworkRequest(QUrl(url)), lambda reply, d=downloader: (d.run(reply), replies.append(reply)))
+        downloaders.append(downloader)
+    # assert
+    assert registry.busy(url) is True
+    deadline: float = time.monotonic() + 10
+    while registry.busy(url) and time.monotonic() < deadline:
+        app.processEvents()
+    assert replies[0].error() == QNetworkReply.OperationCanceledError
+    assert replies[1].error() == QNetworkReply.NoError
+    assert downloaders[0].canceled is True
+    assert registry.is_current("preview", downloaders[0]) is False
+    assert registry.is_current("preview", downloaders[1]) is True
+    assert registry.busy(url) is False
+    # clean
+    registry.cancel("preview")
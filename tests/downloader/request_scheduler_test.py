@@ -0,0 +1,67 @@
+import http.server
+import time
+from typing import Callable
+
+from PySide6.QtCore import QCoreApplication, QUrl
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+
+from splasher.downloader.request_scheduler import Priority, RequestScheduler
+
+
+class SlowHandler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for the image server, it takes a while to answer.
+    """
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Wait, then serve a small body.
+        """
+        time.sleep(0.2)
+        self.send_response(200)
+        self.send_header("Content-Length", "4")
+        self.end_headers()
+        self.wfile.write(b"data")
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        """
+        Keep the test output quiet.
+        """
+
+
+def test_request_scheduler(app: QCoreApplication, http_server: Callable) -> None:
+    """
+    Test class "RequestScheduler".
+    With one connection for background classes and two for interactive ones,
+    a preview starts next to a running prefetch, and a queued download starts before a queued prefetch.
+    """
+    server: http.server.ThreadingHTTPServer = http_server(SlowHandler)
+    manager: QNetworkAccessManager = QNetworkAccessManager()
+    scheduler: RequestScheduler = RequestScheduler(limits={
+        Priority.PREVIEW: 2, Priority.APPLY: 2, Priority.DOWNLOAD: 1, Priority.PREFETCH: 1
+    })
+    started: list[str] = []
+    replies: list[QNetworkReply] = []
+
+    def submit(name: str, priority: Priority) -> None:
+        request: QNetworkRequest = QNetworkRequest(QUrl(f"http://127.0.0.1:{server.server_port}/{name}"))
+        scheduler.submit(manager, "GET", request, priority, lambda reply: (started.append(name), replies.append(reply)))
+
+    for name, priority in (("prefetch-1", Priority.PREFETCH), ("prefetch-2", Priority.PREFETCH),
+                           ("download", Priority.DOWNLOAD), ("preview", Priority.PREVIEW)):
+        submit(name, priority)
+    # assert
+    assert started == ["prefetch-1", "preview"]
+    assert scheduler.stats()["PREFETCH"]["queued"] == 1
+    assert scheduler.stats()["DOWNLOAD"]["queued"] == 1
+    deadline: float = time.monotonic() + 10
+    while not (len(replies) == 4 and all(reply.isFinished() for reply in replies)) and time.monotonic() < deadline:
+        app.processEvents()
+    assert started == ["prefetch-1", "preview", "download", "prefetch-2"]
+    assert replies[1].request().priority() == QNetworkRequest.HighPriority
+    assert replies[3].request().priority() == QNetworkRequest.LowPriority
+    stats: dict[str, dict[str, float]] = scheduler.stats()
+    assert stats["PREFETCH"]["sent"] == 2
+    assert stats["PREFETCH"]["max_queued"] == 1
+    assert stats["PREFETCH"]["max_wait_ms"] > 100
+    assert stats["PREVIEW"]["max_wait_ms"] < 100
@@ -0,0 +1,110 @@
+import http.server
+import os
+import random
+import string
+import time
+from pathlib import Path
+from typing import Callable
+
+from conftest import Window
+from PySide6.QtCore import QCoreApplication, QUrl
+from PySide6.QtNetwork import QNetworkReply, QNetworkRequest
+
+from splasher.downloader import WallpaperDownloader
+from splasher.downloader.retry_policy import RetryPolicy
+
+DATA: bytes = os.urandom(64 * 1024)
+
+
+def random_str(length: int = random.randint(5, 10)) -> str:
+    """
+    Randomly generate a string which contains 5-10 characters.
+    :return: random string name
+    """
+    return "".join(random.choice(string.ascii_letters) for _ in range(length))
+
+
+class FlakyHandler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for an overloaded image server:
+    the first GET is answered with 503, the second one loses its connection, the third one succeeds.
+    '/missing' is always answered with 404.
+    """
+    gets: list[str] = []
+
+    def do_HEAD(self) -> None:  # pylint: disable=invalid-name
+        """
+        Answer the probe, without ranges so the image is downloaded in a single stream.
+        """
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(DATA)))
+        self.end_headers()
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Fail or serve 'DATA' depending on the number of attempts.
+        """
+        self.gets.append(self.path)
+        if self.path == "/missing":
+            self.send_error(404)
+        elif len(self.gets) == 1:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif len(self.gets) == 2:
+            self.close_connection = True  # close without an answer
+        else:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(DATA)))
+            self.end_headers()
+            self.wfile.write(DATA)
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        """
+        Keep the test output quiet.
+        """
+
+
+def test_retry_policy_delay() -> None:
+    """
+    Test class "RetryPolicy".
+    Only transient failures are retried, 'Retry-After' is honoured, and the attempts and the time budget are capped.
+    """
+    policy: RetryPolicy = RetryPolicy(max_attempts=3, base_delay=1000, max_delay=8000, budget=10000)
+    # assert
+    assert policy.delay(QNetworkReply.ContentNotFoundError, 404, "", 1, 0) is None
+    assert policy.delay(QNetworkReply.ContentAccessDenied, 403, "", 1, 0) is None
+    assert 500 <= policy.delay(QNetworkReply.RemoteHostClosedError, None, "", 1, 0) <= 1000
+    assert 1000 <= policy.delay(QNetworkReply.ServiceUnavailableError, 503, "", 2, 0) <= 2000
+    assert policy.delay(QNetworkReply.ServiceUnavailableError, 503, "5", 1, 0) == 5000
+    assert policy.delay(QNetworkReply.ServiceUnavailableError, 503, "", 3, 0) is None
+    assert policy.delay(QNetworkReply.ServiceUnavailableError, 503, "20", 1, 0) is None
+    assert policy.delay(QNetworkReply.TimeoutError, None, "", 1, 9500) is None
+
+
+def test_retry_download(tmp_path: Path, app: QCoreApplication, window: Window, http_server: Callable) -> None:
+    """
+    Test the retries of "Downloader" against a flaky local server.
+    The image is saved after two transient failures without an error message, a missing image is not retried.
+    """
+    server: http.server.ThreadingHTTPServer = http_server(FlakyHandler)
+    paths: list[Path] = []
+    for name in ("photo", "missing"):
+        paths.append(tmp_path / f"{random_str()}.jpg")
+        downloader: WallpaperDownloader = WallpaperDownloader(window)
+        downloader.retry_policy = RetryPolicy(base_delay=20, max_delay=100, budget=5000)
+        downloader.download(QNetworkRequest(QUrl(f"http://127.0.0.1:{server.server_port}/{name}")), str(paths[-1]))
+        deadline: float = time.monotonic() + 10
+        while not window.messages and time.monotonic() < deadline:
+            app.processEvents()
+        if name == "photo":
+            # assert
+            assert paths[-1].read_bytes() == DATA
+            assert FlakyHandler.gets == ["/photo"] * 3
+            assert window.messages[-1] == "Download and save the wallpaper successfully."
+            window.messages.clear()
+    # assert
+    assert FlakyHandler.gets[3:] == ["/missing"]
+    assert window.messages[0].startswith("An error occured")
+    assert paths[-1].exists() is False
@@ -0,0 +1,138 @@
+import http.server
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+from conftest import Window
+from PySide6.QtCore import QBuffer, QByteArray, QCoreApplication, QIODevice, QObject, QRect, QSize, Qt
+from PySide6.QtGui import QImage
+
+from splasher.config import PATH
+from splasher.downloader import RotationScheduler, WallpaperSetter, rotation_scheduler
+
+
+def jpeg(width: int, height: int) -> bytes:
+    """
+    Encode a flat gray image.
+    """
+    image: QImage = QImage(width, height, QImage.Format_RGB32)
+    image.fill(Qt.gray)
+    data: QByteArray = QByteArray()
+    buffer: QBuffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "JPG")
+    return bytes(data.data())
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for the random image source, every request redirects to a new photo.
+    """
+    requests: list[str] = []
+    body: bytes = jpeg(1920, 1080)
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Redirect a random request, serve a photo.
+        """
+        self.requests.append(self.path)
+        if self.path.startswith("/random"):
+            self.send_response(302)
+            self.send_header("Location", f"/photo-1234567890123-abcdefabc{len(self.requests):03d}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        """
+        Keep the test output quiet.
+        """
+
+
+@pytest.fixture(name="settings")
+def fixture_settings(monkeypatch: pytest.MonkeyPatch) -> dict[str, Any]:
+    """
+    Keep the settings of the scheduler in memory.
+    """
+    settings: dict[str, Any] = {"ROTATION_INTERVAL": 60, "ROTATION_TIMES": [], "ROTATION_ON_WAKE": False,
+                                "ROTATION_LAST": 0, "ROTATION_NEXT": ""}
+    monkeypatch.setattr(rotation_scheduler, "get_settings_arg", lambda key: (True, settings[key]))
+    monkeypatch.setattr(rotation_scheduler, "set_settings_arg", settings.__setitem__)
+    return settings
+
+
+def test_next_slot(settings: dict[str, Any]) -> None:
+    """
+    Test method "RotationScheduler.next_slot".
+    Missed slots are due now, however many of them were missed.
+    """
+    parent: QObject = QObject()
+    scheduler: RotationScheduler = RotationScheduler(parent, "", list)
+    now: float = datetime(2024, 5, 2, 9, 0).timestamp()
+    # assert
+    settings["ROTATION_LAST"] = now - 1800
+    assert scheduler.next_slot(now) == now + 1800
+    settings["ROTATION_LAST"] = now - 5 * 3600
+    assert scheduler.next_slot(now) == now
+    settings.update(ROTATION_INTERVAL=0, ROTATION_TIMES=["08:00", "20:00"])
+    assert scheduler.next_slot(now) == now  # 08:00 today was missed
+    settings["ROTATION_LAST"] = datetime(2024, 5, 2, 8, 30).timestamp()
+    assert scheduler.next_slot(now) == datetime(2024, 5, 2, 20, 0).timestamp()
+    settings["ROTATION_TIMES"] = []
+    assert scheduler.next_slot(now) is None
+
+
+def test_rotation_scheduler(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, settings: dict[str, Any],
+                            app: QCoreApplication, window: Window, http_server: Callable) -> None:
+    """
+    Test class "RotationScheduler".
+    The next wallpaper is fetched and sized before its slot, the slot applies it without any request,
+    and the slots missed during a sleep are coalesced into one rotation.
+    """
+    server: http.server.ThreadingHTTPServer = http_server(Handler)
+    monkeypatch.setitem(PATH, "CACHE", f"{tmp_path}/")
+    (tmp_path / PATH["SUBFOLDER"]).mkdir()
+    applied: list[tuple[list, int]] = []
+    monkeypatch.setattr(WallpaperSetter, "set_wallpapers",
+                        lambda self, variants: applied.append((variants, len(Handler.requests))))
+    now: list[float] = [datetime(2024, 5, 2, 9, 0).timestamp()]
+    variants: list[dict] = [{"w": 800, "h": 450, "dpr": 1, "size": QSize(800, 450), "screens": [QRect(0, 0, 800, 450)]}]
+    scheduler: RotationScheduler = RotationScheduler(window, f"http://127.0.0.1:{server.server_port}/random",
+                                                     lambda: [dict(variant) for variant in variants],
+                                                     lambda: now[0])
+
+    def wait_prepared() -> None:
+        deadline: float = time.monotonic() + 10
+        while scheduler.prepared is None and time.monotonic() < deadline:
+            app.processEvents()
+
+    scheduler.start()
+    wait_prepared()
+    # assert
+    assert not applied
+    assert settings["ROTATION_LAST"] == now[0]
+    assert scheduler.prepared[0][1] == "photo-1234567890123-abcdefabc001-800x450.jpg"
+    assert settings["ROTATION_NEXT"] == "photo-1234567890123-abcdefabc001"
+    requests: int = len(Handler.requests)
+    now[0] += 3600
+    scheduler.check()
+    assert len(applied) == 1
+    assert applied[0][1] == requests  # no request before the switch
+    assert applied[0][0][0][1] == "photo-1234567890123-abcdefabc001-800x450.jpg"
+    wait_prepared()
+    assert scheduler.prepared[0][1] != applied[0][0][0][1]
+    # ======== sleep through five slots ========
+    now[0] += 5 * 3600
+    scheduler.check()
+    scheduler.check()
+    assert len(applied) == 2
+    assert settings["ROTATION_LAST"] == now[0]
+    assert scheduler.timer.isActive()
+    # clean
+    scheduler.stop()
@@ -0,0 +1,177 @@
+import http.server
+import os
+import random
+import string
+import time
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from conftest import Window
+from PySide6.QtCore import QCoreApplication, QEvent, QUrl
+from PySide6.QtNetwork import QNetworkRequest
+
+from splasher.downloader import RetryPolicy, WallpaperDownloader, live_downloaders
+from splasher.downloader.segmented_downloader import MIN_SEGMENTED_SIZE, SEGMENTS
+
+DATA: bytes = os.urandom(MIN_SEGMENTED_SIZE + 12345)
+
+
+def random_str(length: int = random.randint(5, 10)) -> str:
+    """
+    Randomly generate a string which contains 5-10 characters.
+    :return: random string name
+    """
+    return "".join(random.choice(string.ascii_letters) for _ in range(length))
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    """
+    A local stand-in for the image server, it answers 'Range' requests when 'ranges' is enabled.
+    A range starting at an offset of 'broken' stalls halfway once, one at an offset of 'refused' is forbidden.
+    """
+    ranges: bool = True
+    broken: set[int] = set()
+    refused: set[int] = set()
+    requests: list[str] = []
+
+    def send_head(self) -> tuple[int, int]:
+        """
+        Send the status and headers of 'DATA'.
+        :return: the first and the last byte to send
+        """
+        byte_range: str = self.headers.get("Range", "")
+        self.requests.append(f"{self.command} {byte_range}")
+        start, end = 0, len(DATA) - 1
+        if self.ranges and byte_range:
+            start, end = (int(n) for n in byte_range[len("bytes="):].split("-"))
+            if start in self.refused:
+                self.send_response(403)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return start, start - 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(DATA)}")
+        else:
+            self.send_response(200)
+        if self.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        return start, end
+
+    def do_HEAD(self) -> None:  # pylint: disable=invalid-name
+        """
+        Answer the probe.
+        """
+        self.send_head()
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Serve 'DATA' or a range of it.
+        """
+        start, end = self.send_head()
+        if start in self.broken:
+            self.broken.discard(start)
+            self.wfile.write(DATA[start:(start + end + 1) // 2])
+            self.wfile.flush()
+            time.sleep(1)  # until the transfer timeout of the client
+            self.close_connection = True
+            return
+        self.wfile.write(DATA[start:end + 1])
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        """
+        Keep the test output quiet.
+        """
+
+
+@pytest.mark.parametrize("ranges", [True, False])
+def test_segmented_download(tmp_path: Path, ranges: bool, app: QCoreApplication, window: Window,
+                            http_server: Callable) -> None:
+    """
+    Test class "SegmentedDownloader" through "WallpaperDownloader".
+    With ranges, the image is fetched in 'SEGMENTS' range requests,
+    without ranges, it falls back to a single stream. Both produce the same file,
+    and the downloader deletes itself afterwards.
+    """
+    RangeHandler.ranges = ranges
+    RangeHandler.broken = set()
+    RangeHandler.refused = set()
+    RangeHandler.requests = []
+    server: http.server.ThreadingHTTPServer = http_server(RangeHandler)
+    path: Path = tmp_path / f"{random_str()}.jpg"
+    progress: list[int] = []
+    downloader: WallpaperDownloader = WallpaperDownloader(window)
+    downloader.segment_progress.connect(lambda index, received, total: progress.append(index))
+    downloader.download(QNetworkRequest(QUrl(f"http://127.0.0.1:{server.server_port}/photo")), str(path))
+    deadline: float = time.monotonic() + 10
+    while not path.exists() and time.monotonic() < deadline:
+        app.processEvents()
+    # assert
+    assert path.read_bytes() == DATA
+    assert Path(f"{path}.part").exists() is False
+    gets: list[str] = [request for request in RangeHandler.requests if request.startswith("GET")]
+    if ranges:
+        assert len(gets) == SEGMENTS
+        assert set(progress) == set(range(SEGMENTS))
+    else:
+        assert gets == ["GET "]
+        assert not progress
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    assert "WallpaperDownloader" not in live_downloaders()
+    # clean
+    path.unlink()
+
+
+def test_segment_resume(tmp_path: Path, app: QCoreApplication, window: Window, http_server: Callable) -> None:
+    """
+    Test that a segment which times out halfway is fetched again from its first missing byte,
+    not from its start, and the image is still complete.
+    """
+    size: int = -(-len(DATA) // SEGMENTS)
+    RangeHandler.ranges = True
+    RangeHandler.broken = {size}
+    RangeHandler.refused = set()
+    RangeHandler.requests = []
+    server: http.server.ThreadingHTTPServer = http_server(RangeHandler)
+    path: Path = tmp_path / f"{random_str()}.jpg"
+    downloader: WallpaperDownloader = WallpaperDownloader(window)
+    downloader.retry_policy = RetryPolicy(base_delay=20, max_delay=100, budget=5000)
+    request: QNetworkRequest = QNetworkRequest(QUrl(f"http://127.0.0.1:{server.server_port}/photo"))
+    request.setTransferTimeout(300)
+    downloader.download(request, str(path))
+    deadline: float = time.monotonic() + 10
+    while not path.exists() and time.monotonic() < deadline:
+        app.processEvents()
+    # assert
+    assert path.read_bytes() == DATA
+    gets: list[str] = [request for request in RangeHandler.requests if request.startswith("GET")]
+    assert len(gets) == SEGMENTS + 1
+    retried: str = gets[-1]
+    first: int = int(retried[len("GET bytes="):].split("-")[0])
+    assert size < first <= size + size // 2  # the first half has been kept
+    assert retried.endswith(f"-{2 * size - 1}")
+
+
+def test_segment_fallback(tmp_path: Path, app: QCoreApplication, window: Window, http_server: Callable) -> None:
+    """
+    Test that a segment which fails for good, here a refused range, restarts the download as a single stream,
+    the image is complete and the part file of the segments is gone.
+    """
+    size: int = -(-len(DATA) // SEGMENTS)
+    RangeHandler.ranges = True
+    RangeHandler.broken = set()
+    RangeHandler.refused = {size}
+    RangeHandler.requests = []
+    server: http.server.ThreadingHTTPServer = http_server(RangeHandler)
+    path: Path = tmp_path / f"{random_str()}.jpg"
+    downloader: WallpaperDownloader = WallpaperDownloader(window)
+    downloader.download(QNetworkRequest(QUrl(f"http://127.0.0.1:{server.server_port}/photo")), str(path))
+    deadline: float = time.monotonic() + 10
+    while not path.exists() and time.monotonic() < deadline:
+        app.processEvents()
+    # assert
+    assert path.read_bytes() == DATA
+    assert RangeHandler.requests[-1] == "GET "
+    assert not [msg for msg in window.messages if msg.startswith("An error")]  # the failed segment is not reported
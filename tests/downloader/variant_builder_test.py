@@ -0,0 +1,110 @@
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import pytest
+from conftest import Window
+from PySide6.QtCore import QCoreApplication, QRect, QSize, Qt
+from PySide6.QtGui import QImage
+
+from splasher.config import PATH
+from splasher.desktop import WallpaperBackend
+from splasher.downloader import (BackendRegistry, CacheManager, VariantBuilder, WallpaperPublisher, backend_registry,
+                                 screen_variants, wallpaper_setter)
+
+
+class Screen:
+    """
+    A stand-in for QScreen.
+    """
+
+    def __init__(self, x: int, width: int, height: int, ratio: float) -> None:
+        self.rect: QRect = QRect(x, 0, width, height)
+        self.ratio: float = ratio
+
+    def size(self) -> QSize:
+        return self.rect.size()
+
+    def devicePixelRatio(self) -> float:  # pylint: disable=invalid-name
+        return self.ratio
+
+    def geometry(self) -> QRect:
+        return self.rect
+
+
+class Backend(WallpaperBackend):
+    """
+    A stand-in for the backend of the desktop, which records the wallpapers it is asked to set.
+    """
+
+    NAME: str = "test"
+    PER_SCREEN: bool = True
+    calls: list[dict[str, str]] = []
+
+    @classmethod
+    def matches(cls, desktops: list[str]) -> bool:
+        return True
+
+    def apply(self, img_path: str, screens: Optional[dict[str, str]] = None) -> None:
+        self.calls.append(screens)
+        self.succeed(img_path)
+
+
+def test_screen_variants() -> None:
+    """
+    Test function "screen_variants".
+    Screens with the same size in device pixels share one variant, in the order of their first screen.
+    """
+    screens: list[Screen] = [Screen(0, 1920, 1080, 2), Screen(1920, 3840, 2160, 1), Screen(5760, 1280, 1024, 1.25)]
+    variants: list[dict] = screen_variants(screens)
+    # assert
+    assert [variant["size"].toTuple() for variant in variants] == [(3840, 2160), (2560, 2048)]
+    assert (variants[0]["w"], variants[0]["h"], variants[0]["dpr"]) == (1920, 1080, 2)
+    assert [rect.x() for rect in variants[0]["screens"]] == [0, 1920]
+    assert variants[1]["dpr"] == 2
+
+
+def test_variant_builder(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, app: QCoreApplication,
+                         window: Window) -> None:
+    """
+    Test class "VariantBuilder".
+    The variants are derived from a larger cached copy without any request, then set together,
+    the primary variant first. Choosing the same image again is skipped.
+    """
+    monkeypatch.setitem(PATH, "CACHE", f"{tmp_path}/")
+    monkeypatch.setitem(PATH, "BACKGROUND", f"{tmp_path}/background/")
+    (tmp_path / PATH["SUBFOLDER"]).mkdir()
+    (tmp_path / "background").mkdir()
+    folder: str = f"{tmp_path}/{PATH['SUBFOLDER']}"
+    image: QImage = QImage(3200, 1800, QImage.Format_RGB32)
+    image.fill(Qt.gray)
+    image.save(f"{folder}photo-xxx.jpg", "JPG")
+    settings: dict[str, Any] = {}
+    Backend.calls = []
+    monkeypatch.setattr(backend_registry, "BACKENDS", [Backend])
+    monkeypatch.setattr(backend_registry, "registry", BackendRegistry())
+    monkeypatch.setattr(wallpaper_setter, "WallpaperPublisher", lambda: WallpaperPublisher(f"{tmp_path}/background/"))
+    monkeypatch.setattr(wallpaper_setter, "get_cache_manager", lambda: CacheManager(f"{tmp_path}/", current=set))
+    monkeypatch.setattr(wallpaper_setter, "set_settings_arg", settings.__setitem__)
+    screens: list[Screen] = [Screen(0, 1920, 1080, 1), Screen(1920, 1280, 1024, 1), Screen(3200, 1920, 1080, 1)]
+    builder: VariantBuilder = VariantBuilder(window, "photo-xxx", screen_variants(screens))
+    builder.build()
+    # assert
+    assert builder.busy()
+    assert VariantBuilder(window, "photo-xxx", screen_variants(screens[1:2])).busy()
+    deadline: float = time.monotonic() + 10
+    while not Backend.calls and time.monotonic() < deadline:
+        app.processEvents()
+    assert settings["WALLPAPER"] == f"{PATH['SUBFOLDER']}photo-xxx-1920x1080.jpg"
+    assert sorted(Path(path).name for path in Backend.calls[0].values()) == [
+        "photo-xxx-1280x1024.jpg", "photo-xxx-1920x1080.jpg", "photo-xxx-1920x1080.jpg"
+    ]
+    assert Backend.calls[0]["1920,0"].endswith("photo-xxx-1280x1024.jpg")
+    assert QImage(f"{folder}photo-xxx-1280x1024.jpg").size().toTuple() == (1280, 1024)
+    assert not window.messages
+    assert not builder.busy()
+    VariantBuilder(window, "photo-xxx", screen_variants(screens)).build()  # the same image is chosen again
+    while not window.messages and time.monotonic() < deadline:
+        app.processEvents()
+    assert window.messages == ["The wallpaper is already set."]
+    assert len(Backend.calls) == 1
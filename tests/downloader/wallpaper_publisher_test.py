@@ -0,0 +1,29 @@
+import os
+import time
+from pathlib import Path
+
+from splasher.downloader import WallpaperPublisher
+
+
+def test_wallpaper_publisher(tmp_path: Path) -> None:
+    """
+    Test class "WallpaperPublisher".
+    Publish cached images into a temporary background folder,
+    check that they share the data of the cached copies, that 'current.jpg' points to the latest one,
+    and that only the most recent images are kept.
+    """
+    cache: Path = tmp_path / "cache"
+    background: Path = tmp_path / "background"
+    cache.mkdir()
+    background.mkdir()
+    publisher: WallpaperPublisher = WallpaperPublisher(f"{background}/", max_entries=2)
+    for i in range(3):
+        img: Path = cache / f"photo-{i}.jpg"
+        img.write_bytes(os.urandom(100))
+        dst_path: str = publisher.publish(str(img), img.name)
+        os.utime(dst_path, (time.time() + i, time.time() + i))
+        # assert
+        assert os.path.samefile(dst_path, img) is True
+        assert os.readlink(background / "current.jpg") == img.name
+    assert publisher.publish(str(cache / "photo-2.jpg"), "photo-2.jpg") == f"{background}/photo-2.jpg"
+    assert sorted(p.name for p in background.iterdir()) == ["current.jpg", "photo-1.jpg", "photo-2.jpg"]
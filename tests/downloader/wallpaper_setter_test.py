@@ -0,0 +1,136 @@
+import json
+import struct
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+from conftest import Window
+from PySide6.QtCore import QCoreApplication, QRect
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+from splasher.downloader import (BackendRegistry, CacheManager, WallpaperPublisher, WallpaperSetter, backend_registry,
+                                 wallpaper_setter)
+
+HEADER: struct.Struct = struct.Struct("=6sII")
+
+
+class Sway:
+    """
+    A stand-in for the IPC socket of sway with one output, which counts the commands.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.server: QLocalServer = QLocalServer()
+        self.server.listen(path)
+        self.server.newConnection.connect(self.on_connection)
+        self.commands: list[str] = []
+
+    def on_connection(self) -> None:
+        """
+        Run the commands of a client.
+        """
+        socket: QLocalSocket = self.server.nextPendingConnection()
+
+        def on_ready_read() -> None:
+            data: bytes = socket.readAll().data()
+            _, length, kind = HEADER.unpack_from(data)
+            if kind == 3:
+                reply: list = [{"name": "DP-1", "rect": {"x": 0, "y": 0}}]
+            else:
+                self.commands.append(data[HEADER.size:HEADER.size + length].decode())
+                reply = [{"success": True}]
+            body: bytes = json.dumps(reply).encode()
+            socket.write(HEADER.pack(b"i3-ipc", len(body), kind) + body)
+
+        socket.readyRead.connect(on_ready_read)
+
+
+def test_applied_state(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, app: QCoreApplication, window: Window) -> None:
+    """
+    Test the fingerprint of "WallpaperSetter".
+    Applying the same image on the same screens again is skipped without publishing,
+    a new image or another screen layout is applied, and a new process applies it again.
+    """
+    (tmp_path / "background").mkdir()
+    monkeypatch.setattr(wallpaper_setter, "WallpaperPublisher",
+                        lambda: WallpaperPublisher(f"{tmp_path}/background/", max_entries=2))
+    settings: dict[str, Any] = {}
+    monkeypatch.setattr(wallpaper_setter, "set_settings_arg", settings.__setitem__)
+    monkeypatch.setenv("XDG_CURRENT_DESKTOP", "sway")
+    monkeypatch.setenv("SWAYSOCK", str(tmp_path / "sway.sock"))
+    monkeypatch.setattr(backend_registry, "registry", BackendRegistry())
+    sway: Sway = Sway(str(tmp_path / "sway.sock"))
+    image: Path = tmp_path / "photo-xxx.jpg"
+    image.write_bytes(b"first")
+
+    def apply(geometries: list[QRect]) -> None:
+        applied: int = len(sway.commands)
+        WallpaperSetter(window).set_wallpapers([(str(image), image.name, geometries)])
+        deadline: float = time.monotonic() + 10
+        while backend_registry.registry.busy() and time.monotonic() < deadline:
+            app.processEvents()
+        while len(sway.commands) == applied and window.messages[-1:] != ["The wallpaper is already set."] \
+                and time.monotonic() < deadline:
+            app.processEvents()
+
+    # assert
+    apply([QRect(0, 0, 1920, 1080)])
+    assert len(sway.commands) == 1
+    assert backend_registry.registry.last_applied.startswith("sway:")
+    assert "APPLIED" not in settings  # the desktop may change the wallpaper while the app is not running
+    (tmp_path / "background" / image.name).unlink()
+    apply([QRect(0, 0, 1920, 1080)])
+    assert len(sway.commands) == 1
+    assert window.messages[-1] == "The wallpaper is already set."
+    assert not (tmp_path / "background" / image.name).exists()  # nothing is published again
+    window.messages.clear()
+    apply([QRect(0, 0, 1920, 1080)])  # a second Choose of the same image
+    assert len(sway.commands) == 1
+    assert window.messages == ["The wallpaper is already set."]
+    monkeypatch.setattr(backend_registry, "registry", BackendRegistry())  # a new process
+    apply([QRect(0, 0, 1920, 1080)])
+    assert len(sway.commands) == 2
+    apply([QRect(0, 0, 2560, 1440)])
+    assert len(sway.commands) == 3
+    time.sleep(0.01)
+    image.write_bytes(b"second")
+    apply([QRect(0, 0, 2560, 1440)])
+    assert len(sway.commands) == 4
+
+
+def test_shown_variants(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, app: QCoreApplication,
+                        window: Window) -> None:
+    """
+    Test that every variant of the wallpaper on screen is pinned in the cache, not only the primary one,
+    and that the variants of the previous wallpaper are released when another one is set.
+    """
+    (tmp_path / "background").mkdir()
+    (tmp_path / "unsplash").mkdir()
+    monkeypatch.setattr(wallpaper_setter, "WallpaperPublisher",
+                        lambda: WallpaperPublisher(f"{tmp_path}/background/", max_entries=4))
+    manager: CacheManager = CacheManager(f"{tmp_path}/", "unsplash/", current=set)
+    monkeypatch.setattr(wallpaper_setter, "get_cache_manager", lambda: manager)
+    monkeypatch.setattr(wallpaper_setter, "set_settings_arg", lambda key, value: None)
+    monkeypatch.setenv("XDG_CURRENT_DESKTOP", "sway")
+    monkeypatch.setenv("SWAYSOCK", str(tmp_path / "sway.sock"))
+    monkeypatch.setattr(backend_registry, "registry", BackendRegistry())
+    sway: Sway = Sway(str(tmp_path / "sway.sock"))
+    wallpaper_setter.shown.clear()
+
+    def apply(img_id: str) -> None:
+        variants: list[tuple[str, str, list[QRect]]] = []
+        for index, name in enumerate([f"{img_id}-1920x1080.jpg", f"{img_id}-1280x1024.jpg"]):
+            (tmp_path / "unsplash" / name).write_bytes(name.encode())
+            variants.append((str(tmp_path / "unsplash" / name), name, [QRect(1920 * index, 0, 1920, 1080)]))
+        applied: int = len(sway.commands)
+        WallpaperSetter(window).set_wallpapers(variants)
+        deadline: float = time.monotonic() + 10
+        while len(sway.commands) == applied and time.monotonic() < deadline:
+            app.processEvents()
+
+    # assert
+    apply("photo-a")
+    assert manager.pinned == {"unsplash/photo-a-1920x1080.jpg", "unsplash/photo-a-1280x1024.jpg"}
+    apply("photo-b")
+    assert manager.pinned == {"unsplash/photo-b-1920x1080.jpg", "unsplash/photo-b-1280x1024.jpg"}
@@ -0,0 +1,71 @@
+import random
+import time
+from pathlib import Path
+
+from PySide6.QtCore import QCoreApplication, QRect, QSize, Qt
+from PySide6.QtGui import QColor, QImage
+
+from splasher.image import ImageDeriver
+from splasher.image.image_deriver import crop_rect
+
+
+def detailed_image(width: int, height: int, detail_x: int) -> QImage:
+    """
+    Create a flat gray image with random noise in a band starting at 'detail_x'.
+    """
+    image: QImage = QImage(width, height, QImage.Format_RGB32)
+    image.fill(QColor(128, 128, 128))
+    for x in range(detail_x, min(detail_x + width // 4, width)):
+        for y in range(height):
+            value: int = random.randint(0, 255)
+            image.setPixelColor(x, y, QColor(value, value, value))
+    return image
+
+
+def test_crop_rect() -> None:
+    """
+    Test function "crop_rect".
+    The crop has the target aspect ratio and moves to the detailed part of the image,
+    it stays in the center of a flat image.
+    """
+    image: QImage = detailed_image(800, 200, 600)
+    rect: QRect = crop_rect(image, QSize(100, 100))
+    # assert
+    assert rect.size().toTuple() == (200, 200)
+    assert rect.left() >= 500
+    flat: QImage = QImage(200, 800, QImage.Format_RGB32)
+    flat.fill(Qt.gray)
+    assert crop_rect(flat, QSize(100, 100)).getRect() == (0, 300, 200, 200)
+    assert crop_rect(flat, QSize(50, 200)).getRect() == (0, 0, 200, 800)
+
+
+def test_image_deriver(tmp_path: Path) -> None:
+    """
+    Test class "ImageDeriver".
+    The smallest copy which is large enough is chosen, and the derived image has the target size.
+    """
+    app: QCoreApplication = QCoreApplication.instance() or QCoreApplication([])
+    folders: list[str] = []
+    for name, size in (("cache", (1600, 900)), ("background", (3200, 1800))):
+        (tmp_path / name).mkdir()
+        folders.append(f"{tmp_path / name}/")
+        image: QImage = QImage(*size, QImage.Format_RGB32)
+        image.fill(Qt.gray)
+        image.save(f"{folders[-1]}photo-xxx.jpg", "JPG")
+    deriver: ImageDeriver = ImageDeriver()
+    results: list[str] = []
+    deriver.ready.connect(results.append)
+    # assert
+    assert deriver.find_source(folders, "photo-xxx", QSize(1920, 1080)) == f"{folders[1]}photo-xxx.jpg"
+    assert deriver.find_source(folders, "photo-xxx", QSize(2000, 2000)) is None
+    source: str = deriver.find_source(folders, "photo-xxx", QSize(800, 600))
+    assert source == f"{folders[0]}photo-xxx.jpg"
+    target: str = f"{folders[0]}photo-xxx-800x600.jpg"
+    deriver.derive(source, target, QSize(800, 600))
+    assert deriver.busy(target)
+    deadline: float = time.monotonic() + 10
+    while not results and time.monotonic() < deadline:
+        app.processEvents()
+    assert results == [target]
+    assert QImage(target).size().toTuple() == (800, 600)
+    assert not deriver.busy(target)
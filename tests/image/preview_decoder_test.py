@@ -0,0 +1,32 @@
+import time
+from pathlib import Path
+
+from PySide6.QtCore import QCoreApplication, QSize
+from PySide6.QtGui import QImage
+
+from splasher.image import PreviewDecoder
+
+
+def test_preview_decoder(tmp_path: Path) -> None:
+    """
+    Test class "PreviewDecoder".
+    Request two decodes in a row, check that only the newest result is passed on,
+    and that it is already scaled to the target size.
+    """
+    app: QCoreApplication = QCoreApplication.instance() or QCoreApplication([])
+    paths: list[str] = []
+    for i in range(2):
+        paths.append(str(tmp_path / f"photo-{i}.jpg"))
+        QImage(400, 300, QImage.Format_RGB32).save(paths[i], "JPG")
+    results: list[tuple[str, tuple[int, int]]] = []
+    decoder: PreviewDecoder = PreviewDecoder()
+    decoder.ready.connect(lambda img_path, image: results.append((img_path, image.size().toTuple())))
+    decoder.decode(paths[0], QSize(200, 150))
+    decoder.decode(paths[1], QSize(200, 150))
+    deadline: float = time.monotonic() + 5
+    while not results and time.monotonic() < deadline:
+        app.processEvents()
+    time.sleep(0.1)
+    app.processEvents()
+    # assert
+    assert results == [(paths[1], (200, 150))]
@@ -0,0 +1,36 @@
+import os
+import time
+from pathlib import Path
+
+from PySide6.QtCore import QCoreApplication
+from PySide6.QtGui import QImage
+
+from splasher.image import SizeProber
+
+
+def test_size_prober(tmp_path: Path) -> None:
+    """
+    Test class "SizeProber".
+    Probe a temporary JPEG, check the size and the sidecar index,
+    check that a cached size is used while the modification time is unchanged,
+    and that the image is probed again when it is rewritten.
+    New probes are written together by a flush, not one by one.
+    """
+    app: QCoreApplication = QCoreApplication.instance() or QCoreApplication([])  # pylint: disable=unused-variable
+    img_path: Path = tmp_path / "photo.jpg"
+    QImage(64, 48, QImage.Format_RGB32).save(str(img_path), "JPG")
+    other_path: Path = tmp_path / "other.jpg"
+    QImage(16, 8, QImage.Format_RGB32).save(str(other_path), "JPG")
+    prober: SizeProber = SizeProber(str(tmp_path / "sizes.json"))
+    # assert
+    assert prober.size(str(img_path)).toTuple() == (64, 48)
+    assert prober.size(str(other_path)).toTuple() == (16, 8)
+    assert (tmp_path / "sizes.json").exists() is False
+    assert prober.timer.isActive()
+    assert prober.flush() is True
+    assert SizeProber(str(tmp_path / "sizes.json")).load()[str(other_path)][1:] == [16, 8]
+    assert SizeProber(str(tmp_path / "sizes.json")).load()[str(img_path)][1:] == [64, 48]
+    QImage(32, 16, QImage.Format_RGB32).save(str(img_path), "JPG")
+    os.utime(img_path, (time.time() + 10, time.time() + 10))
+    assert prober.size(str(img_path)).toTuple() == (32, 16)
+    assert prober.size(str(tmp_path / "missing.jpg")).isValid() is False